@@ -0,0 +1,505 @@
+/**
+ * @file   AcceptanceModel.cxx
+ * @author Suvayu Ali <Suvayu.Ali@cern.ch>
+ *
+ * @brief  Decay PDF with a decay time acceptance, with a fast
+ *         normalisation integral.
+ *
+ */
+
+#include <cmath>
+#include <cassert>
+#include <string>
+#include <algorithm>
+
+#include <RooArgSet.h>
+#include <RooProduct.h>
+#include <TIterator.h>
+
+#include "AcceptanceModel.hxx"
+#include "PowLawAcceptance.hxx"
+#include "AcceptanceRatio.hxx"
+
+
+namespace {
+  // 15-point Kronrod abscissae & weights, and the embedded 7-point
+  // Gauss weights (abscissae: xgk[1], xgk[3], xgk[5], xgk[7])
+  const Double_t xgk[8] = {
+    0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+    0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+    0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+    0.207784955007898467600689403773245, 0.000000000000000000000000000000000
+  };
+  const Double_t wgk[8] = {
+    0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+    0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+    0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+    0.204432940075298892414161999234649, 0.209482141084727828012999174891714
+  };
+  const Double_t wg[4] = {
+    0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+    0.381830050505118944950369775488975, 0.417959183673469387755102040816327
+  };
+  const unsigned maxdepth(30);
+
+  // 10-point Gauss-Legendre abscissae & weights (positive half), for
+  // the cached-normalisation grid
+  const Double_t xgl[5] = {
+    0.148874338981631210884826001129720, 0.433395394129247190799265943165784,
+    0.679409568299024406234327365114874, 0.865063366688984510732096688423493,
+    0.973906528517171720077964012084452
+  };
+  const Double_t wgl[5] = {
+    0.295524224714752870173892994651338, 0.269266719309996355091226921569469,
+    0.219086362515982043995534934228163, 0.149451349150580593145776339657697,
+    0.066671344308688137593568809893332
+  };
+  const size_t maxcache(10000);
+
+  struct CacheStats {
+    CacheStats() : normhits(0), normmisses(0), gridhits(0), gridmisses(0) {}
+    ULong64_t normhits, normmisses, gridhits, gridmisses;
+  };
+
+  CacheStats& cachestats(const char* name)
+  {
+    static std::map<std::string, CacheStats> stats;
+    return stats[name];
+  }
+
+  /// Add Gauss-Legendre nodes & weights for [tmin, tmax]
+  void gausslegendre(Double_t tmin, Double_t tmax, std::vector<Double_t>& nodes,
+		     std::vector<Double_t>& weights)
+  {
+    const Double_t centre(0.5 * (tmin + tmax)), half(0.5 * (tmax - tmin));
+    for (unsigned j = 0; j < 5; ++j) {
+      nodes.push_back(centre - half * xgl[j]);
+      nodes.push_back(centre + half * xgl[j]);
+      weights.push_back(half * wgl[j]);
+      weights.push_back(half * wgl[j]);
+    }
+  }
+}
+
+
+/**
+ * Default constructor, used during ROOT I/O.
+ *
+ */
+AcceptanceModel::AcceptanceModel() :
+  _epsrel(1e-9), _cachenorm(kFALSE), _ncells(50)
+{
+}
+
+
+AcceptanceModel::AcceptanceModel(const char *name, const char *title,
+				 RooAbsRealLValue& time, RooAbsPdf& decay,
+				 RooAbsReal& acceptance) :
+  RooAbsPdf(name, title),
+  _time("time", "time", this, time),
+  _decay("decay", "decay", this, decay),
+  _acceptance("acceptance", "acceptance", this, acceptance),
+  _epsrel(1e-9), _cachenorm(kFALSE), _ncells(50)
+{
+}
+
+
+AcceptanceModel::AcceptanceModel(const AcceptanceModel& other,
+				 const char* name) :
+  RooAbsPdf(other, name),
+  _time("time", this, other._time),
+  _decay("decay", this, other._decay),
+  _acceptance("acceptance", this, other._acceptance),
+  _epsrel(other._epsrel), _cachenorm(other._cachenorm),
+  _ncells(other._ncells), _binedges(other._binedges)
+{
+}
+
+
+AcceptanceModel::~AcceptanceModel() {}
+
+
+TObject* AcceptanceModel::clone(const char* newname) const
+{
+  return new AcceptanceModel(*this, newname);
+}
+
+
+Double_t AcceptanceModel::evaluate() const
+{
+  if (_binedges.empty()) return density();
+
+  // bin average
+  const Double_t time(_time);
+  std::vector<Double_t>::const_iterator edge(
+    std::upper_bound(_binedges.begin(), _binedges.end(), time));
+  if (edge == _binedges.begin()) return density();
+  if (edge == _binedges.end()) {
+    if (time > _binedges.back()) return density();
+    --edge;			// upper edge, in the last bin
+  }
+  const Double_t lo(*(edge - 1)), hi(*edge);
+  RooAbsRealLValue* tvar(dynamic_cast<RooAbsRealLValue*>(_time.absArg()));
+  const Double_t avg(integral(lo, hi) / (hi - lo));
+  tvar->setVal(time);
+  return avg;
+}
+
+
+Double_t AcceptanceModel::density() const
+{
+  // unnormalised decay, the product is normalised as a whole
+  return _acceptance.arg().getVal() * _decay.arg().getVal();
+}
+
+
+Int_t AcceptanceModel::getAnalyticalIntegral(RooArgSet& allVars,
+					     RooArgSet& analVars,
+					     const char* /* rangeName */) const
+{
+  if (matchArgs(allVars, analVars, _time)) return 1;
+  return 0;
+}
+
+
+Double_t AcceptanceModel::analyticalIntegral(Int_t code,
+					     const char* rangeName) const
+{
+  assert(code == 1);
+  const Double_t tmin(_time.min(rangeName)), tmax(_time.max(rangeName));
+  RooAbsRealLValue* time(dynamic_cast<RooAbsRealLValue*>(_time.absArg()));
+  Double_t saved(time->getVal()), sum(0.);
+  if (_cachenorm) {
+    sum = cachedIntegral(tmin, tmax);
+  } else {
+    sum = integral(tmin, tmax);
+  }
+  time->setVal(saved);
+  return sum;
+}
+
+
+/**
+ * Integral of the unnormalised PDF, split at the breakpoints of the
+ * acceptance.  Changes the value of the decay time.
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ *
+ * @return Integral
+ */
+Double_t AcceptanceModel::integral(Double_t tmin, Double_t tmax) const
+{
+  std::vector<Double_t> points;
+  breakpoints(tmin, tmax, points);
+  Double_t sum(0.);
+  for (unsigned i = 1; i < points.size(); ++i)
+    sum += integrate(points[i-1], points[i], 0);
+  return sum;
+}
+
+
+/**
+ * Integral in cached-normalisation mode (see class description).
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ *
+ * @return Integral
+ */
+Double_t AcceptanceModel::cachedIntegral(Double_t tmin, Double_t tmax) const
+{
+  CacheStats& stats(cachestats(GetName()));
+
+  // decay grid, depends on decay parameters & range only
+  std::vector<Double_t> gridkey;
+  parameters(_decay.arg(), gridkey);
+  gridkey.push_back(tmin);
+  gridkey.push_back(tmax);
+  gridkey.push_back(_ncells);
+
+  std::vector<Double_t> key(gridkey);
+  parameters(_acceptance.arg(), key);
+  NormCache::const_iterator cached(_normcache.find(key));
+  if (cached != _normcache.end()) {
+    ++stats.normhits;
+    return cached->second;
+  }
+  ++stats.normmisses;
+
+  if (gridkey == _gridkey) {
+    ++stats.gridhits;
+  } else {
+    ++stats.gridmisses;
+    _gridkey = gridkey;
+    _nodes.clear();
+    _weights.clear();
+    const Double_t width((tmax - tmin) / _ncells);
+    for (Int_t i = 0; i < _ncells; ++i)
+      gausslegendre(tmin + i * width, tmin + (i + 1) * width, _nodes, _weights);
+    _decayvals.resize(_nodes.size());
+    RooAbsRealLValue* time(dynamic_cast<RooAbsRealLValue*>(_time.absArg()));
+    for (unsigned i = 0; i < _nodes.size(); ++i) {
+      time->setVal(_nodes[i]);
+      _decayvals[i] = _decay.arg().getVal();
+    }
+  }
+
+  // interior breakpoints
+  std::vector<Double_t> points;
+  breakpoints(tmin, tmax, points);
+  std::vector<Double_t>::const_iterator point(points.begin() + 1),
+    end(points.end() - 1);
+
+  // acceptance on the grid, in one go when possible
+  std::vector<Double_t> accvals;
+  const bool batch(acceptanceBatch(_nodes, accvals));
+
+  const Double_t width((tmax - tmin) / _ncells);
+  RooAbsRealLValue* time(dynamic_cast<RooAbsRealLValue*>(_time.absArg()));
+  Double_t sum(0.);
+  for (Int_t i = 0; i < _ncells; ++i) {
+    const Double_t lo(tmin + i * width), hi(tmin + (i + 1) * width);
+    while (point != end && *point <= lo) ++point;
+    if (point != end && *point < hi) {
+      // breakpoint in cell: split, the decay is not on the grid
+      std::vector<Double_t> nodes, weights;
+      Double_t edge(lo);
+      for (; point != end && *point < hi; ++point) {
+	gausslegendre(edge, *point, nodes, weights);
+	edge = *point;
+      }
+      gausslegendre(edge, hi, nodes, weights);
+      for (unsigned j = 0; j < nodes.size(); ++j)
+	sum += weights[j] * integrand(nodes[j]);
+    } else if (batch) {
+      for (Int_t j = 10 * i; j < 10 * (i + 1); ++j)
+	sum += _weights[j] * accvals[j] * _decayvals[j];
+    } else {
+      for (Int_t j = 10 * i; j < 10 * (i + 1); ++j) {
+	time->setVal(_nodes[j]);
+	sum += _weights[j] * _acceptance.arg().getVal() * _decayvals[j];
+      }
+    }
+  }
+
+  if (_normcache.size() >= maxcache) _normcache.clear();
+  _normcache[key] = sum;
+  return sum;
+}
+
+
+/**
+ * Evaluate the acceptance for an array of decay times with the batch
+ * interface of PowLawAcceptance and AcceptanceRatio.  Supported: one
+ * of them, or a RooProduct of them and time independent factors.
+ *
+ * @param times Decay times
+ * @param out Acceptance values (output)
+ *
+ * @return False if the acceptance is not supported
+ */
+bool AcceptanceModel::acceptanceBatch(const std::vector<Double_t>& times,
+				      std::vector<Double_t>& out) const
+{
+  const UInt_t n(times.size());
+  const RooAbsArg* acc(_acceptance.absArg());
+  out.assign(n, 1.0);
+  if (n == 0) return true;
+  if (batchFactor(*acc, times, out)) return true;
+
+  const RooProduct* prod(dynamic_cast<const RooProduct*>(acc));
+  if (!prod) return false;
+  TIterator* iter(prod->serverIterator());
+  bool supported(true);
+  for (RooAbsArg* arg = 0; supported && (arg = (RooAbsArg*) iter->Next()); )
+    supported = batchFactor(*arg, times, out);
+  delete iter;
+  return supported;
+}
+
+
+/**
+ * Multiply `out' by factor `arg' evaluated for an array of decay
+ * times (see acceptanceBatch).
+ *
+ * @return False if `arg' is not supported
+ */
+bool AcceptanceModel::batchFactor(const RooAbsArg& arg,
+				  const std::vector<Double_t>& times,
+				  std::vector<Double_t>& out) const
+{
+  const UInt_t n(times.size());
+  std::vector<Double_t> buf(n);
+  if (const PowLawAcceptance* acc =
+      dynamic_cast<const PowLawAcceptance*>(&arg)) {
+    acc->evaluateBatch(&times[0], &buf[0], n);
+  } else if (const AcceptanceRatio* ratio =
+	     dynamic_cast<const AcceptanceRatio*>(&arg)) {
+    ratio->evaluateBatch(&times[0], &buf[0], n);
+  } else if (const RooAbsReal* real = dynamic_cast<const RooAbsReal*>(&arg)) {
+    if (real->dependsOn(*_time.absArg())) return false;
+    buf.assign(n, real->getVal());
+  } else {
+    return false;
+  }
+  for (UInt_t i = 0; i < n; ++i) out[i] *= buf[i];
+  return true;
+}
+
+
+/**
+ * Values of the parameters (leaf nodes, except decay time) of `arg'.
+ *
+ * @param arg Function
+ * @param values Parameter values are appended
+ */
+void AcceptanceModel::parameters(const RooAbsArg& arg,
+				 std::vector<Double_t>& values) const
+{
+  RooArgSet leaves;
+  arg.leafNodeServerList(&leaves);
+  TIterator* iter(leaves.createIterator());
+  for (RooAbsArg* leaf = 0; (leaf = (RooAbsArg*) iter->Next()); ) {
+    if (leaf == _time.absArg()) continue;
+    if (RooAbsReal* real = dynamic_cast<RooAbsReal*>(leaf))
+      values.push_back(real->getVal());
+  }
+  delete iter;
+}
+
+
+void AcceptanceModel::setCacheNorm(Bool_t flag, Int_t ncells)
+{
+  _cachenorm = flag;
+  _ncells = ncells;
+  _normcache.clear();
+  _gridkey.clear();
+}
+
+
+void AcceptanceModel::setBinIntegration(const RooAbsBinning& binning)
+{
+  const Double_t* edges(binning.array());
+  _binedges.assign(edges, edges + binning.numBoundaries());
+  setValueDirty();
+}
+
+
+void AcceptanceModel::clearBinIntegration()
+{
+  _binedges.clear();
+  setValueDirty();
+}
+
+
+ULong64_t AcceptanceModel::getNormHits() const
+{
+  return cachestats(GetName()).normhits;
+}
+
+
+ULong64_t AcceptanceModel::getNormMisses() const
+{
+  return cachestats(GetName()).normmisses;
+}
+
+
+ULong64_t AcceptanceModel::getGridHits() const
+{
+  return cachestats(GetName()).gridhits;
+}
+
+
+ULong64_t AcceptanceModel::getGridMisses() const
+{
+  return cachestats(GetName()).gridmisses;
+}
+
+
+void AcceptanceModel::resetCacheStats() const
+{
+  cachestats(GetName()) = CacheStats();
+}
+
+
+void AcceptanceModel::printCacheStats(std::ostream& os) const
+{
+  const CacheStats& stats(cachestats(GetName()));
+  ULong64_t norm(stats.normhits + stats.normmisses),
+    grid(stats.gridhits + stats.gridmisses);
+  os << GetName() << ": normalisation cache " << stats.normhits << "/"
+     << norm << " hits, decay grid " << stats.gridhits << "/" << grid
+     << " reused" << std::endl;
+}
+
+
+/**
+ * Points in [tmin, tmax] where the acceptance is not smooth,
+ * including the end points.  All PowLawAcceptance and
+ * AcceptanceRatio components of the acceptance are considered.
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ * @param points Sorted breakpoints
+ */
+void AcceptanceModel::breakpoints(Double_t tmin, Double_t tmax,
+				  std::vector<Double_t>& points) const
+{
+  points.clear();
+  points.push_back(tmin);
+  points.push_back(tmax);
+
+  RooArgSet comps;
+  _acceptance.arg().branchNodeServerList(&comps);
+  TIterator* iter(comps.createIterator());
+  for (RooAbsArg* arg = 0; (arg = (RooAbsArg*) iter->Next()); ) {
+    if (PowLawAcceptance* acc = dynamic_cast<PowLawAcceptance*>(arg))
+      acc->breakpoints(tmin, tmax, points);
+    else if (AcceptanceRatio* ratio = dynamic_cast<AcceptanceRatio*>(arg))
+      ratio->breakpoints(tmin, tmax, points);
+  }
+  delete iter;
+
+  std::sort(points.begin(), points.end());
+  points.erase(std::unique(points.begin(), points.end()), points.end());
+}
+
+
+Double_t AcceptanceModel::integrand(Double_t time) const
+{
+  dynamic_cast<RooAbsRealLValue*>(_time.absArg())->setVal(time);
+  return density();
+}
+
+
+/**
+ * Adaptive Gauss-Kronrod integration: the interval is bisected until
+ * the 7 and 15-point rules agree to the requested precision.
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ * @param depth Bisection depth
+ *
+ * @return Integral
+ */
+Double_t AcceptanceModel::integrate(Double_t tmin, Double_t tmax,
+				    unsigned depth) const
+{
+  const Double_t centre(0.5 * (tmin + tmax)), half(0.5 * (tmax - tmin));
+  Double_t fc(integrand(centre)), gauss(wg[3] * fc), kronrod(wgk[7] * fc);
+  for (unsigned j = 0; j < 7; ++j) {
+    Double_t dt(half * xgk[j]);
+    Double_t fsum(integrand(centre - dt) + integrand(centre + dt));
+    kronrod += wgk[j] * fsum;
+    if (j % 2) gauss += wg[j/2] * fsum;
+  }
+  kronrod *= half;
+  gauss *= half;
+
+  if (depth >= maxdepth ||
+      std::abs(kronrod - gauss) <= _epsrel * std::abs(kronrod))
+    return kronrod;
+  return (integrate(tmin, centre, depth + 1) +
+	  integrate(centre, tmax, depth + 1));
+}
@@ -0,0 +1,126 @@
+/**
+ * @file   AcceptanceModel.hxx
+ * @author Suvayu Ali <Suvayu.Ali@cern.ch>
+ *
+ * @brief  Decay PDF with a decay time acceptance, with a fast
+ *         normalisation integral.
+ *
+ *         Same as RooEffProd(decay, acceptance), but the integral over
+ *         decay time is done by the PDF itself.  The integration range
+ *         is split at the points where the acceptance is not smooth
+ *         (the 0.2 ps cut, the turn-on, and 1/β), and each piece is
+ *         integrated with an adaptive 15-point Gauss-Kronrod rule.
+ *         Since the integrand is smooth on every piece, this converges
+ *         to the requested precision (1e-9 by default) with a few
+ *         hundred evaluations, instead of the generic adaptive
+ *         integrator subdividing around the kinks.
+ *
+ *         In cached-normalisation mode (setCacheNorm), the decay is
+ *         evaluated once on a fixed grid (10-point Gauss-Legendre nodes
+ *         in equal cells), and only the acceptance is evaluated on the
+ *         grid when the acceptance parameters change (in one batch
+ *         for PowLawAcceptance, AcceptanceRatio, and their products).
+ *         Cells with a breakpoint are split at the breakpoint, and
+ *         integrated directly.  The decay grid is rebuilt only when
+ *         the decay parameters (or the range) change.  Integrals are
+ *         also cached by parameter values, so points revisited by the
+ *         minimiser are not integrated again.
+ *
+ *         For binned fits (setBinIntegration), the PDF evaluates to its
+ *         average over the bin containing the decay time, so the
+ *         binned likelihood uses the integral of the model over every
+ *         bin instead of the value at the bin centre.
+ *
+ */
+
+
+#ifndef __ACCEPTANCEMODEL_HXX
+#define __ACCEPTANCEMODEL_HXX
+
+#include <map>
+#include <vector>
+#include <iostream>
+
+#include <RooAbsPdf.h>
+#include <RooAbsReal.h>
+#include <RooAbsRealLValue.h>
+#include <RooAbsBinning.h>
+#include <RooRealProxy.h>
+
+
+class AcceptanceModel : public RooAbsPdf {
+public:
+
+  AcceptanceModel();
+  AcceptanceModel(const char *name, const char *title,
+		  RooAbsRealLValue& time, RooAbsPdf& decay,
+		  RooAbsReal& acceptance);
+  AcceptanceModel(const AcceptanceModel& other, const char* name=0);
+  virtual ~AcceptanceModel();
+  virtual TObject* clone(const char* newname) const;
+
+  Int_t getAnalyticalIntegral(RooArgSet& allVars, RooArgSet& analVars,
+			      const char* rangeName=0) const;
+  Double_t analyticalIntegral(Int_t code, const char* rangeName=0) const;
+
+  /// Relative precision of the normalisation integral
+  void setPrecision(Double_t epsrel) { _epsrel = epsrel; }
+  Double_t getPrecision() const { return _epsrel; }
+
+  void breakpoints(Double_t tmin, Double_t tmax,
+		   std::vector<Double_t>& points) const;
+
+  /// Cached-normalisation mode, with `ncells' grid cells
+  void setCacheNorm(Bool_t flag, Int_t ncells=50);
+  Bool_t getCacheNorm() const { return _cachenorm; }
+
+  /// Evaluate bin averages over the bins of `binning' (binned fits)
+  void setBinIntegration(const RooAbsBinning& binning);
+  void clearBinIntegration();
+  Bool_t getBinIntegration() const { return !_binedges.empty(); }
+
+  // Cache counters, shared by all clones with the same name (the
+  // clones used by the likelihood during fits)
+  ULong64_t getNormHits() const;
+  ULong64_t getNormMisses() const;
+  ULong64_t getGridHits() const;
+  ULong64_t getGridMisses() const;
+  void resetCacheStats() const;
+  void printCacheStats(std::ostream& os=std::cout) const;
+
+protected:
+
+  Double_t evaluate() const;
+
+  RooRealProxy _time;
+  RooRealProxy _decay;
+  RooRealProxy _acceptance;
+  Double_t _epsrel;
+  Bool_t _cachenorm;
+  Int_t _ncells;
+  std::vector<Double_t> _binedges; // bin edges for bin averages
+
+private:
+
+  Double_t density() const;
+  Double_t integral(Double_t tmin, Double_t tmax) const;
+  Double_t integrand(Double_t time) const;
+  Double_t integrate(Double_t tmin, Double_t tmax, unsigned depth) const;
+  Double_t cachedIntegral(Double_t tmin, Double_t tmax) const;
+  void parameters(const RooAbsArg& arg, std::vector<Double_t>& values) const;
+  bool acceptanceBatch(const std::vector<Double_t>& times,
+		       std::vector<Double_t>& out) const;
+  bool batchFactor(const RooAbsArg& arg, const std::vector<Double_t>& times,
+		   std::vector<Double_t>& out) const;
+
+  typedef std::map<std::vector<Double_t>, Double_t> NormCache;
+  mutable NormCache _normcache; //! integrals by parameter values
+  mutable std::vector<Double_t> _gridkey; //! decay parameters & range
+  mutable std::vector<Double_t> _nodes; //! grid nodes
+  mutable std::vector<Double_t> _weights; //! grid weights
+  mutable std::vector<Double_t> _decayvals; //! decay on the grid
+
+  ClassDef(AcceptanceModel, 3); // Decay PDF with a decay time acceptance
+};
+
+#endif	// __ACCEPTANCEMODEL_HXX
@@ -77,17 +77,83 @@ AcceptanceRatio& AcceptanceRatio::operator=(const AcceptanceRatio& other)
 
 Double_t AcceptanceRatio::evaluate() const
 {
-  Double_t time((Double_t)_time), turnon((Double_t)_turnon),
-    offset((Double_t)_offset), beta((Double_t)_beta);
-
-  if (time < 0.2) return 0.;	// selection in stripping
-  if (time - offset < 0.) return 0.; // exponent should be +ve
-  if (beta*time > 1.0) return 0.0; // 1-βt > 0
-  Double_t exponential = std::exp(-1.0 * turnon * (time - offset));
-
-  if (1.0 <= exponential) {
-    return 0.0;
-  } else {
-    return ((1.0 - exponential) * (1.0 - beta*time));
-  }
+  return shape(_time, _turnon, _offset, _beta);
+}
+
+
+/**
+ * Evaluate the ratio for an array of decay times, with one set of
+ * parameters.  Python can pass numpy arrays (see python/accfns.py).
+ *
+ * @param times Decay times
+ * @param out Ratio values (output)
+ * @param n Number of decay times
+ * @param turnon Turn-on
+ * @param offset Offset
+ * @param beta Beta
+ */
+void AcceptanceRatio::evaluateBatch(const Double_t* times, Double_t* out,
+				    UInt_t n, Double_t turnon,
+				    Double_t offset, Double_t beta)
+{
+  for (UInt_t i = 0; i < n; ++i)
+    out[i] = shape(times[i], turnon, offset, beta);
+}
+
+
+/**
+ * Evaluate the ratio for an array of decay times, for several sets of
+ * parameters.
+ *
+ * @param times Decay times
+ * @param out Ratio values (output), nsets × n, one row per set
+ * @param n Number of decay times
+ * @param turnon Turn-on, one per set
+ * @param offset Offset, one per set
+ * @param beta Beta, one per set
+ * @param nsets Number of parameter sets
+ */
+void AcceptanceRatio::evaluateGrid(const Double_t* times, Double_t* out,
+				   UInt_t n, const Double_t* turnon,
+				   const Double_t* offset, const Double_t* beta,
+				   UInt_t nsets)
+{
+  for (UInt_t j = 0; j < nsets; ++j)
+    evaluateBatch(times, out + j*n, n, turnon[j], offset[j], beta[j]);
+}
+
+
+/**
+ * Evaluate the ratio for an array of decay times, with the current
+ * parameter values.
+ *
+ * @param times Decay times
+ * @param out Ratio values (output)
+ * @param n Number of decay times
+ */
+void AcceptanceRatio::evaluateBatch(const Double_t* times, Double_t* out,
+				    UInt_t n) const
+{
+  evaluateBatch(times, out, n, _turnon, _offset, _beta);
+}
+
+
+/**
+ * Add the decay times in (tmin, tmax) where the ratio is not smooth:
+ * the 0.2 ps cut, the offset, and 1/β (see AcceptanceModel).
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ * @param points Breakpoints are appended
+ */
+void AcceptanceRatio::breakpoints(Double_t tmin, Double_t tmax,
+				  std::vector<Double_t>& points) const
+{
+  Double_t offset((Double_t)_offset), beta((Double_t)_beta);
+
+  std::vector<Double_t> kinks(1, 0.2);
+  kinks.push_back(offset);
+  if (beta > 0.0) kinks.push_back(1.0/beta);
+  for (unsigned i = 0; i < kinks.size(); ++i)
+    if (kinks[i] > tmin && kinks[i] < tmax) points.push_back(kinks[i]);
 }
@@ -22,6 +22,9 @@
 #include <RooAbsCategory.h>
 #include <RooConstVar.h>
 
+#include <cmath>
+#include <vector>
+
 
 class AcceptanceRatio : public RooAbsReal {
 public:
@@ -35,6 +38,28 @@ public:
   virtual TObject* clone(const char* newname) const;
   AcceptanceRatio& operator=(const AcceptanceRatio& other);
 
+  void breakpoints(Double_t tmin, Double_t tmax,
+		   std::vector<Double_t>& points) const;
+
+  /// Ratio for one decay time
+  static Double_t shape(Double_t time, Double_t turnon, Double_t offset,
+			Double_t beta)
+  {
+    if (time < 0.2) return 0.;	// selection in stripping
+    if (time - offset < 0.) return 0.; // exponent should be +ve
+    if (beta*time > 1.0) return 0.0; // 1-βt > 0
+    Double_t exponential = std::exp(-1.0 * turnon * (time - offset));
+    if (1.0 <= exponential) return 0.0;
+    return ((1.0 - exponential) * (1.0 - beta*time));
+  }
+
+  static void evaluateBatch(const Double_t* times, Double_t* out, UInt_t n,
+			    Double_t turnon, Double_t offset, Double_t beta);
+  void evaluateBatch(const Double_t* times, Double_t* out, UInt_t n) const;
+  static void evaluateGrid(const Double_t* times, Double_t* out, UInt_t n,
+			   const Double_t* turnon, const Double_t* offset,
+			   const Double_t* beta, UInt_t nsets);
+
 protected:
 
   Double_t evaluate() const;
@@ -10,6 +10,8 @@
 #include "Riostream.h"
 
 #include "PowLawAcceptance.hxx"
+#include "AcceptanceRatio.hxx"
+#include "RooAbsRealLValue.h"
 #include "RooAbsReal.h"
 #include "RooAbsCategory.h"
 #include <cmath>
@@ -114,27 +116,125 @@ PowLawAcceptance& PowLawAcceptance::operator=(const PowLawAcceptance& other)
 
 Double_t PowLawAcceptance::evaluate() const
 {
-  Double_t turnon((Double_t)_turnon), time((Double_t)_time),
-    offset((Double_t)_offset), exponent((Double_t)_exponent),
-    beta((Double_t)_beta), ratio(1.0);
-
+  Double_t ratio(1.0);
   // check if underlying data type is valid
   if (_correction.absArg()) ratio = (Double_t)_correction;
 
-  if (time < 0.2) return 0.;
-  if (beta < -0.0) return 0.0;
-  if (beta*time > 1.0) return 0.0;
-  Double_t expnoff = std::pow(turnon*time, exponent) - offset;
+  return ratio * shape(_time, _turnon, _offset, _exponent, _beta);
+}
+
+
+/**
+ * Evaluate the acceptance (no correction) for an array of decay
+ * times, with one set of parameters.  Python can pass numpy arrays
+ * (see python/accfns.py).
+ *
+ * @param times Decay times
+ * @param out Acceptance values (output)
+ * @param n Number of decay times
+ * @param turnon Turn-on
+ * @param offset Offset
+ * @param exponent Exponent
+ * @param beta Beta
+ */
+void PowLawAcceptance::evaluateBatch(const Double_t* times, Double_t* out,
+				     UInt_t n, Double_t turnon,
+				     Double_t offset, Double_t exponent,
+				     Double_t beta)
+{
+  for (UInt_t i = 0; i < n; ++i)
+    out[i] = shape(times[i], turnon, offset, exponent, beta);
+}
+
+
+/**
+ * Evaluate the acceptance (no correction) for an array of decay
+ * times, for several sets of parameters (e.g. sampled from the
+ * covariance matrix of a fit).
+ *
+ * @param times Decay times
+ * @param out Acceptance values (output), nsets × n, one row per set
+ * @param n Number of decay times
+ * @param turnon Turn-on, one per set
+ * @param offset Offset, one per set
+ * @param exponent Exponent, one per set
+ * @param beta Beta, one per set
+ * @param nsets Number of parameter sets
+ */
+void PowLawAcceptance::evaluateGrid(const Double_t* times, Double_t* out,
+				    UInt_t n, const Double_t* turnon,
+				    const Double_t* offset,
+				    const Double_t* exponent,
+				    const Double_t* beta, UInt_t nsets)
+{
+  for (UInt_t j = 0; j < nsets; ++j)
+    evaluateBatch(times, out + j*n, n, turnon[j], offset[j], exponent[j],
+		  beta[j]);
+}
+
+
+/**
+ * Evaluate the acceptance (including correction) for an array of
+ * decay times, with the current parameter values.  An AcceptanceRatio
+ * correction is also evaluated in a batch, any other correction that
+ * depends on decay time is evaluated one time at a time.
+ *
+ * @param times Decay times
+ * @param out Acceptance values (output)
+ * @param n Number of decay times
+ */
+void PowLawAcceptance::evaluateBatch(const Double_t* times, Double_t* out,
+				     UInt_t n) const
+{
+  evaluateBatch(times, out, n, _turnon, _offset, _exponent, _beta);
 
-  if (expnoff <= 0.0) {
-    return 0.0;
+  const RooAbsArg* correction(_correction.absArg());
+  if (!correction || correction == &_one) return;
+  if (const AcceptanceRatio* ratio =
+      dynamic_cast<const AcceptanceRatio*>(correction)) {
+    std::vector<Double_t> buf(n);
+    ratio->evaluateBatch(times, &buf[0], n);
+    for (UInt_t i = 0; i < n; ++i) out[i] *= buf[i];
+  } else if (!correction->dependsOn(*_time.absArg())) {
+    Double_t value((Double_t)_correction);
+    for (UInt_t i = 0; i < n; ++i) out[i] *= value;
   } else {
-    Double_t denominator(1.0 + expnoff);
-    return (ratio * (1.0 - 1.0/denominator) * (1.0 - beta*time));
+    RooAbsRealLValue* time(dynamic_cast<RooAbsRealLValue*>(_time.absArg()));
+    Double_t saved(time->getVal());
+    for (UInt_t i = 0; i < n; ++i) {
+      time->setVal(times[i]);
+      out[i] *= (Double_t)_correction;
+    }
+    time->setVal(saved);
   }
 }
 
 
+/**
+ * Add the decay times in (tmin, tmax) where the acceptance is not
+ * smooth: the 0.2 ps cut, the turn-on (where (a*t)ⁿ = offset), and
+ * 1/β.  Integrals over decay time converge much faster when split at
+ * these points (see AcceptanceModel).
+ *
+ * @param tmin Lower limit
+ * @param tmax Upper limit
+ * @param points Breakpoints are appended
+ */
+void PowLawAcceptance::breakpoints(Double_t tmin, Double_t tmax,
+				   std::vector<Double_t>& points) const
+{
+  Double_t turnon((Double_t)_turnon), offset((Double_t)_offset),
+    exponent((Double_t)_exponent), beta((Double_t)_beta);
+
+  std::vector<Double_t> kinks(1, 0.2);
+  if (offset > 0.0 && turnon > 0.0)
+    kinks.push_back(std::pow(offset, 1.0/exponent) / turnon);
+  if (beta > 0.0) kinks.push_back(1.0/beta);
+  for (unsigned i = 0; i < kinks.size(); ++i)
+    if (kinks[i] > tmin && kinks[i] < tmax) points.push_back(kinks[i]);
+}
+
+
 /* // disable analytical integral
 Int_t PowLawAcceptance::getAnalyticalIntegral(RooArgSet& allVars,
 					      RooArgSet& analVars,
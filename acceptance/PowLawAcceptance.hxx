@@ -22,6 +22,9 @@
 #include "RooAbsCategory.h"
 #include "RooConstVar.h"
 
+#include <cmath>
+#include <vector>
+
 
 class PowLawAcceptance : public RooAbsReal {
 public:
@@ -38,6 +41,30 @@ public:
   virtual TObject* clone(const char* newname) const;
   PowLawAcceptance& operator=(const PowLawAcceptance& other);
 
+  void breakpoints(Double_t tmin, Double_t tmax,
+		   std::vector<Double_t>& points) const;
+
+  /// Acceptance for one decay time (no correction)
+  static Double_t shape(Double_t time, Double_t turnon, Double_t offset,
+			Double_t exponent, Double_t beta)
+  {
+    if (time < 0.2) return 0.;
+    if (beta < -0.0) return 0.0;
+    if (beta*time > 1.0) return 0.0;
+    Double_t expnoff = std::pow(turnon*time, exponent) - offset;
+    if (expnoff <= 0.0) return 0.0;
+    return (1.0 - 1.0/(1.0 + expnoff)) * (1.0 - beta*time);
+  }
+
+  static void evaluateBatch(const Double_t* times, Double_t* out, UInt_t n,
+			    Double_t turnon, Double_t offset,
+			    Double_t exponent, Double_t beta);
+  void evaluateBatch(const Double_t* times, Double_t* out, UInt_t n) const;
+  static void evaluateGrid(const Double_t* times, Double_t* out, UInt_t n,
+			   const Double_t* turnon, const Double_t* offset,
+			   const Double_t* exponent, const Double_t* beta,
+			   UInt_t nsets);
+
 /* // disable analytical integral
   Int_t getAnalyticalIntegral(RooArgSet& allVars, RooArgSet& analVars,
 			      const char* rangeName=0) const;
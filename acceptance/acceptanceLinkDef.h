@@ -7,6 +7,7 @@
 
 #pragma link C++ class PowLawAcceptance;
 #pragma link C++ class AcceptanceRatio;
+#pragma link C++ class AcceptanceModel;
 // #pragma link C++ class ErfAcceptance;
 // #pragma link C++ class BdPTAcceptance;
 
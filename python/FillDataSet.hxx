@@ -0,0 +1,66 @@
+/**
+ * @file   FillDataSet.hxx
+ * @author Suvayu Ali <Suvayu.Ali@cern.ch>
+ *
+ * @brief  Fill a RooDataSet from column arrays in one pass.
+ *
+ *         Meant to be loaded from Python (see factory.py), where the
+ *         columns are numpy arrays:
+ *
+ *           ROOT.gROOT.ProcessLine('#include "FillDataSet.hxx"')
+ *
+ */
+
+#ifndef __FILLDATASET_HXX
+#define __FILLDATASET_HXX
+
+#include <string>
+#include <vector>
+#include <stdexcept>
+
+#include <RooDataSet.h>
+#include <RooArgList.h>
+#include <RooArgSet.h>
+#include <RooRealVar.h>
+#include <RooAbsCategoryLValue.h>
+
+
+/**
+ * Add events to a dataset from an array of values.
+ *
+ * @param dataset Dataset to fill
+ * @param vars Variables (RooRealVar or category, values are the state
+ *             indices), in the order of the columns
+ * @param data Values, row-major (nevents rows, one column per variable)
+ * @param weights Event weights (ignored by unweighted datasets)
+ * @param nevents Number of events
+ *
+ * @throw std::invalid_argument if a variable is of any other type
+ */
+void fill_from_arrays(RooDataSet& dataset, const RooArgList& vars,
+		      const Double_t* data, const Double_t* weights,
+		      Long64_t nevents)
+{
+  const int nvars(vars.getSize());
+  std::vector<RooRealVar*> realvars(nvars);
+  std::vector<RooAbsCategoryLValue*> cats(nvars);
+  for (int v = 0; v < nvars; ++v) {
+    realvars[v] = dynamic_cast<RooRealVar*>(vars.at(v));
+    if (not realvars[v])
+      cats[v] = dynamic_cast<RooAbsCategoryLValue*>(vars.at(v));
+    if (not realvars[v] and not cats[v])
+      throw std::invalid_argument(std::string("fill_from_arrays: ")
+				  + vars.at(v)->GetName() + " is not a "
+				  "RooRealVar or a category");
+  }
+  RooArgSet row(vars);
+  for (Long64_t i = 0; i < nevents; ++i) {
+    for (int v = 0; v < nvars; ++v) {
+      if (realvars[v]) realvars[v]->setVal(data[i*nvars + v]);
+      else cats[v]->setIndex(Int_t(data[i*nvars + v]));
+    }
+    dataset.add(row, weights[i]);
+  }
+}
+
+#endif	// __FILLDATASET_HXX
@@ -0,0 +1,78 @@
+# coding=utf-8
+"""Evaluate acceptance functions over numpy arrays of decay times
+
+The functions call the batch interface of PowLawAcceptance and
+AcceptanceRatio (libacceptance.so), so a curve is evaluated in one C++
+loop, instead of building and evaluating a TF1 for every parameter set.
+
+  >>> times = numpy.linspace(0.2, 15, 150)
+  >>> acc = powlaw(times, turnon=1.5, offset=0., exponent=2., beta=0.04)
+
+With arrays of parameters (one set per element, e.g. sampled from a
+fit covariance matrix), the result has one row per parameter set:
+
+  >>> accs = powlaw(times, turnons, 0., exponents, betas) # (nsets, 150)
+
+"""
+
+import numpy
+
+
+def _load():
+    from factory import load_library
+    load_library('libacceptance.so')
+    from rplot.fixes import ROOT
+    return ROOT
+
+
+def _batch(func, times, *params):
+    times = numpy.ascontiguousarray(times, dtype=numpy.float64)
+    out = numpy.empty_like(times)
+    if len(times):
+        func(times, out, len(times), *params)
+    return out
+
+
+def _grid(func, times, *params):
+    times = numpy.ascontiguousarray(times, dtype=numpy.float64)
+    params = [numpy.ascontiguousarray(par, dtype=numpy.float64).ravel()
+              for par in numpy.broadcast_arrays(*params)]
+    nsets = len(params[0])
+    out = numpy.empty(nsets * len(times))
+    if len(out):
+        func(times, out, len(times), *(params + [nsets]))
+    return out.reshape(nsets, len(times))
+
+
+def _isgrid(*params):
+    return any(numpy.ndim(par) for par in params)
+
+
+def powlaw(times, turnon, offset, exponent, beta):
+    """Power law acceptance (PowLawAcceptance, without correction)"""
+    ROOT = _load()
+    if _isgrid(turnon, offset, exponent, beta):
+        return _grid(ROOT.PowLawAcceptance.evaluateGrid, times,
+                     turnon, offset, exponent, beta)
+    return _batch(ROOT.PowLawAcceptance.evaluateBatch, times,
+                  turnon, offset, exponent, beta)
+
+
+def ratio(times, turnon, offset, beta):
+    """Acceptance ratio (AcceptanceRatio)"""
+    ROOT = _load()
+    if _isgrid(turnon, offset, beta):
+        return _grid(ROOT.AcceptanceRatio.evaluateGrid, times,
+                     turnon, offset, beta)
+    return _batch(ROOT.AcceptanceRatio.evaluateBatch, times,
+                  turnon, offset, beta)
+
+
+def evaluate(func, times):
+    """Evaluate a PowLawAcceptance or AcceptanceRatio object
+
+    The current parameter values of the object are used, including the
+    correction of a PowLawAcceptance.
+
+    """
+    return _batch(func.evaluateBatch, times)
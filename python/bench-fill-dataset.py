@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Benchmark factory.fill_dataset against the per-event loop
+
+A tree with a decay time, a weight and a trigger flag is generated in
+memory.  A weighted dataset is then filled from it with fill_dataset
+(bulk, from arrays) and with the old per-event loop (GetEntry,
+TTreeFormula and RooDataSet::add for every event).  Both datasets
+should have the same number of entries and sum of weights.
+
+"""
+
+import argparse
+from rplot.utils import RawArgDefaultFormatter
+
+optparser = argparse.ArgumentParser(formatter_class=RawArgDefaultFormatter,
+                                    description=__doc__)
+optparser.add_argument('-n', '--nevents', type=int, default=1000000,
+                       help='Number of events in the tree')
+optparser.add_argument('-c', '--chunk', type=int, default=100000,
+                       help='Chunk size for fill_dataset')
+options = optparser.parse_args()
+
+from rplot.fixes import ROOT
+ROOT.gROOT.SetBatch(True)
+from ROOT import TTree, TTreeFormula, RooRealVar, RooArgSet, RooDataSet, RooFit
+from helpers import suppress_warnings
+from factory import fill_dataset
+
+from time import time
+from array import array
+import random
+
+
+def loop_fill(varargset, ftree, wt, wtvar, cut=''):
+    """Reference: fill event by event"""
+    wtname = wtvar.GetName()
+    formulae = {}
+    for var in varargset:
+        name = var.GetName()
+        formulae[name] = TTreeFormula(name, wt if name == wtname else name,
+                                      ftree)
+    sel = TTreeFormula('sel', cut or '1', ftree)
+    dataset = RooDataSet('loopdataset', 'Dataset', varargset,
+                         RooFit.WeightVar(wtvar))
+    for i in xrange(ftree.GetEntries()):
+        ftree.GetEntry(i)
+        if not sel.EvalInstance():
+            continue
+        for name, expr in formulae.iteritems():
+            varargset.find(name).setVal(expr.EvalInstance())
+        dataset.add(varargset, varargset[wtname].getVal())
+    return dataset
+
+# generate tree
+random.seed(42)
+tree = TTree('ftree', 'Benchmark tree')
+branches = dict((name, array('d', [0.])) for name in ('time', 'wt', 'trig'))
+for name, buf in branches.iteritems():
+    tree.Branch(name, buf, '{}/D'.format(name))
+for i in xrange(options.nevents):
+    branches['time'][0] = random.expovariate(1/1.5)
+    branches['wt'][0] = random.uniform(0, 1)
+    branches['trig'][0] = random.randint(0, 1)
+    tree.Fill()
+
+time_ = RooRealVar('time', 'Decay time', 0.2, 15.)
+wtvar = RooRealVar('wt', 'weight', 0., 1.)
+cut = 'trig > 0 && time > 0.2 && time < 15'
+suppress_warnings()
+
+res = []
+for name, filler in [('fill_dataset', lambda *args: fill_dataset(
+        *args, chunk=options.chunk)), ('per-event loop', loop_fill)]:
+    start = time()
+    dataset = filler(RooArgSet(time_, wtvar), tree, 'wt', wtvar, cut)
+    elapsed = time() - start
+    res.append(elapsed)
+    print '{:>15}: {:8.2f}s, {} entries, sum of weights {:.6g}'.format(
+        name, elapsed, dataset.numEntries(), dataset.sumEntries())
+print '{:>15}: {:8.1f}x'.format('speed up', res[1]/res[0])
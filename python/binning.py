@@ -0,0 +1,137 @@
+# coding=utf-8
+"""Variable width binning schemes
+
+Bins of one or more samples are merged until their relative errors are
+small enough (see merge_bins).  Schemes are saved as a binary array of
+bin edges (see dump-var-bins.py), and read with read_scheme.
+
+"""
+
+import numpy
+
+
+def _buffer(buf, size):
+    """Copy of a ROOT array buffer of doubles"""
+    buf.SetSize(size)
+    return numpy.frombuffer(buf, dtype=numpy.float64, count=size).copy()
+
+
+def hist_arrays(hist):
+    """Return bin edges, contents and sum of squared weights of a TH1
+
+    The arrays are read in one go from the histogram buffers; under and
+    overflow bins are excluded.  Without Sumw2, the contents are used
+    as the sum of squared weights.
+
+    """
+    nbins = hist.GetNbinsX()
+    axis = hist.GetXaxis()
+    if axis.GetXbins().GetSize():
+        edges = _buffer(axis.GetXbins().GetArray(), nbins + 1)
+    else:
+        edges = numpy.linspace(axis.GetXmin(), axis.GetXmax(), nbins + 1)
+    contents = _buffer(hist.GetArray(), nbins + 2)[1:-1]
+    if hist.GetSumw2N():
+        sumw2 = _buffer(hist.GetSumw2().GetArray(), nbins + 2)[1:-1]
+    else:
+        sumw2 = contents.copy()
+    return edges, contents, sumw2
+
+
+def merge_bins(edges, contents, sumw2=None, maxrelerr=0.1, mincount=0,
+               maxwidth=None, keep=1, require='any'):
+    """Merge bins until the relative error is below maxrelerr
+
+    Starting after the first `keep' bins (left as is), consecutive bins
+    are merged until the relative error of the merged bin is below
+    maxrelerr for any (require='any') or all (require='all') of the
+    samples, and the merged bin has at least mincount (sum of weights)
+    in every sample.  A merged bin is closed before it gets wider than
+    maxwidth, even if the criteria are not met.  Bins left over at the
+    end (not meeting the criteria) are merged into one last bin, as
+    the original loop did, rather than with the bin before them.
+
+    edges    -- bin edges (nbins + 1)
+    contents -- bin contents, one row per sample (or a 1-D array)
+    sumw2    -- sum of squared weights, like contents (default:
+                unweighted, same as contents)
+
+    Returns the new bin edges.
+
+    """
+    edges = numpy.asarray(edges, dtype=float)
+    contents = numpy.atleast_2d(numpy.asarray(contents, dtype=float))
+    if sumw2 is None:
+        sumw2 = contents
+    sumw2 = numpy.atleast_2d(numpy.asarray(sumw2, dtype=float))
+    nbins = contents.shape[1]
+    combine = {'any': numpy.any, 'all': numpy.all}[require]
+
+    # cumulative sums with a leading 0: bins [i, j) sum to c[j] - c[i]
+    cumw = numpy.zeros((contents.shape[0], nbins + 1))
+    cumw[:, 1:] = numpy.cumsum(contents, axis=1)
+    cumw2 = numpy.zeros_like(cumw)
+    cumw2[:, 1:] = numpy.cumsum(sumw2, axis=1)
+
+    keep = min(keep, nbins)
+    bounds = range(keep + 1)
+    start = keep
+    while start < nbins:
+        # merged bins [start, end) for all possible ends
+        w = cumw[:, start + 1:] - cumw[:, start, None]
+        w2 = cumw2[:, start + 1:] - cumw2[:, start, None]
+        ok = combine((w > 0) & (w2 < (maxrelerr * w)**2), axis=0)
+        ok &= (w >= mincount).all(axis=0)
+        nmax = nbins - start
+        if maxwidth is not None:
+            widths = edges[start + 1:] - edges[start]
+            nmax = max(1, numpy.searchsorted(widths, maxwidth * (1 + 1e-12),
+                                             side='right'))
+        if ok[:nmax].any():
+            start += numpy.argmax(ok[:nmax]) + 1
+        elif nmax < nbins - start:
+            start += nmax       # too wide
+        else:
+            break
+        bounds.append(start)
+    if bounds[-1] != nbins:
+        bounds.append(nbins)
+    return edges[bounds]
+
+
+def quantile_bins(edges, contents, nbins):
+    """Merge bins into nbins bins with equal statistics
+
+    The new edges are the original edges closest to the quantiles of
+    the (summed) contents, so bins can have more or less than an equal
+    share, and there can be less than nbins bins.
+
+    """
+    edges = numpy.asarray(edges, dtype=float)
+    contents = numpy.atleast_2d(numpy.asarray(contents, dtype=float))
+    cumw = numpy.zeros(contents.shape[1] + 1)
+    cumw[1:] = numpy.cumsum(contents.sum(axis=0))
+    targets = numpy.linspace(0, cumw[-1], nbins + 1)[1:-1]
+    idx = numpy.searchsorted(cumw, targets)
+    # closest edge: step back if the previous one is nearer
+    prev = numpy.clip(idx - 1, 0, len(cumw) - 1)
+    idx = numpy.where(targets - cumw[prev] < cumw[idx] - targets, prev, idx)
+    bounds = numpy.unique(numpy.concatenate(([0], idx, [len(edges) - 1])))
+    return edges[bounds]
+
+
+def roobinning(edges, name=''):
+    """RooBinning with the given edges"""
+    from rplot.fixes import ROOT
+    edges = numpy.ascontiguousarray(edges, dtype=numpy.float64)
+    return ROOT.RooBinning(len(edges) - 1, edges, name)
+
+
+def save_scheme(edges, fname='data/binning_scheme.dat'):
+    """Save bin edges as a binary array (see read_scheme)"""
+    numpy.asarray(edges, dtype=numpy.float64).tofile(fname)
+
+
+def read_scheme(fname='data/binning_scheme.dat'):
+    """Read bin edges saved by dump-var-bins.py"""
+    return numpy.fromfile(fname, dtype=numpy.float64)
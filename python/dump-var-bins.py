@@ -8,14 +8,22 @@
 import argparse
 optparser = argparse.ArgumentParser(description=__doc__)
 optparser.add_argument('filename', help='ROOT file with fit result')
+optparser.add_argument('-o', dest='output', default='data/binning_scheme.dat',
+                       help='Output file')
+optparser.add_argument('--maxrelerr', type=float, default=0.1,
+                       help='Maximum relative error of merged bins')
+optparser.add_argument('--mincount', type=float, default=0,
+                       help='Minimum (weighted) count of merged bins')
+optparser.add_argument('--maxwidth', type=float, default=None,
+                       help='Maximum width of merged bins')
+optparser.add_argument('--quantiles', type=int, default=0,
+                       help='Equal statistics bins instead (number of bins)')
 options = optparser.parse_args()
 fname = options.filename
 
 # Python modules
 import os
 import sys
-import math
-import numpy
 
 # FIXME: Batch running fails on importing anything but gROOT
 # ROOT global variables
@@ -32,6 +40,7 @@ from ROOT import RooArgSet, RooArgList, RooDataHist
 
 # my stuff
 from factory import get_workspace, get_file, get_object, load_library
+from binning import hist_arrays, merge_bins, quantile_bins, save_scheme
 
 # Load custom ROOT classes
 load_library('libacceptance.so')
@@ -83,67 +92,19 @@ for hist in (dspihist, dskhist):
 dspihist = dspi_data.fillHistogram(dspihist, RooArgList(time))
 dskhist = dsk_data.fillHistogram(dskhist, RooArgList(time))
 
-# old binning
-obins = numpy.zeros(nbins, dtype=float)
-dspihist.GetLowEdge(obins)
-
-# bin content and bin error arrays
-dspicons = numpy.zeros(nbins, dtype=float)
-dspierrs = numpy.zeros(nbins, dtype=float)
-dskcons = numpy.zeros(nbins, dtype=float)
-dskerrs = numpy.zeros(nbins, dtype=float)
-
-# fill arrays
-for i in range(nbins):
-    dspicons[i] = dspihist.GetBinContent(i + 1)
-    dspierrs[i] = dspihist.GetBinContent(i + 1)
-    dskcons[i] = dskhist.GetBinContent(i + 1)
-    dskerrs[i] = dskhist.GetBinContent(i + 1)
-
-# find new binning
-newbinedges = [obins[0]]
-# start from 2nd bin (i=1) because first bin is in the rising region
-# and might have fewer entries
-i = 1
-
-## Bin merging algorithm:
-# 1. if δ/n > 0.1
-# 2. merge with next bin
-# 3. recalculate δ(=√(n₁+n₂)) & n(=n₁+n₂)
-# 4. if new δ/n > 0.1, repeat 2-3, else continue
-while i < nbins:
-    dspideln = dspierrs[i] / dspicons[i]
-    dskdeln = dskerrs[i] / dskcons[i]
-    if dspideln < 0.1 or dskdeln < 0.1:
-        newbinedges += [obins[i]]
-        i += 1
-    else:
-        dspicon = dspicons[i]
-        dskcon = dskcons[i]
-        n = 1                   # start merging bins
-        while i + n < nbins:
-            dspicon += dspicons[i + n]
-            dskcon += dskcons[i + n]
-            tdspideln = math.sqrt(dspicon) / dspicon
-            tdskdeln = math.sqrt(dskcon) / dskcon
-            if not (tdspideln < 0.1 or tdskdeln < 0.1):
-                n += 1
-            else:
-                newbinedges += [obins[i + n]]
-                break
-        i += n
-
-# new number of bins
-oldnbins = nbins
-nbins = len(newbinedges)
-
-# add upper bin edge for last bin
-newbinedges += [dspihist.GetBinLowEdge(oldnbins) + dspihist.GetBinWidth(oldnbins)]
-newbins = numpy.array(newbinedges)
+obins, dspicons, dspisumw2 = hist_arrays(dspihist)
+obins, dskcons, dsksumw2 = hist_arrays(dskhist)
+
+# first bin is in the rising region and might have fewer entries,
+# left as is
+if options.quantiles:
+    newbins = quantile_bins(obins, [dspicons, dskcons], options.quantiles)
+else:
+    newbins = merge_bins(obins, [dspicons, dskcons], [dspisumw2, dsksumw2],
+                         maxrelerr=options.maxrelerr,
+                         mincount=options.mincount, maxwidth=options.maxwidth)
 print '='*5, ' Dynamic bin merging summary ', '='*5
-print '# of bins %d -> %d ' % (oldnbins, nbins)
+print '# of bins %d -> %d ' % (nbins, len(newbins) - 1)
 
-binfile = open('data/binning_scheme.dat', 'wb')
-print 'Dumping binning scheme to binary file: %s' % binfile.name
-newbins.tofile(binfile)
-binfile.close()
+print 'Dumping binning scheme to binary file: %s' % options.output
+save_scheme(newbins, options.output)
@@ -26,6 +26,13 @@ def get_timestamp(fmt='%Y-%m-%d-%a-%H-%M'):
 
 
 # ROOT wrappers
+def _load_filler():
+    """Load FillDataSet.hxx (fill datasets from arrays)"""
+    from rplot.fixes import ROOT
+    ROOT.gROOT.ProcessLine('#include "{}/FillDataSet.hxx"'.format(
+        os.path.dirname(os.path.realpath(__file__))))
+
+
 def load_library(library):
     from rplot.fixes import ROOT
     loadstatus = {
@@ -100,16 +107,35 @@ def set_integrator_config():
     numintconf.method1DOpen().setLabel('RooAdaptiveGaussKronrodIntegrator1D')
 
 
-def get_toy_dataset(varargset, PDF=None):
+def fit_options(optimize=0, ncpu=1, split=0, verbose=True):
+    """Return the RooFit options of the acceptance fits (for fitTo)
+
+    Shared by ltFit.py and ltToys.py, so that toys are fitted like the
+    data.  Constant-term optimisation is off by default, it is not
+    safe with AcceptanceModel: the decay is evaluated away from the
+    data points to normalise.
+
+    """
+
+    from rplot.fixes import ROOT
+    from ROOT import RooFit
+    return [RooFit.Optimize(optimize), RooFit.Strategy(2), RooFit.Save(True),
+            RooFit.NumCPU(ncpu, split), RooFit.SumW2Error(True),
+            RooFit.Offset(True), RooFit.Verbose(verbose)]
+
+
+def get_toy_dataset(varargset, PDF=None, nevents=10000, name='toydataset',
+                    verbose=True):
     """Return a toy dataset for the given PDF."""
 
     from rplot.fixes import ROOT
     from ROOT import TClass, RooAbsPdf, RooFit
     objclass = TClass.GetClass(PDF.ClassName())
     if objclass.InheritsFrom(RooAbsPdf.Class()):
-        dataset = PDF.generate(varargset, 10000, RooFit.Name('toydataset'),
-                               RooFit.Verbose(True))
-        print 'Toy generation completed with %s' % PDF.GetName()
+        dataset = PDF.generate(varargset, nevents, RooFit.Name(name),
+                               RooFit.Verbose(verbose))
+        if verbose:
+            print 'Toy generation completed with %s' % PDF.GetName()
         return dataset
     else:
         raise TypeError('PDF should inherit from RooAbsPdf.')
@@ -118,68 +144,101 @@ def get_toy_dataset(varargset, PDF=None):
 def get_dataset(varargset, ftree, cut='', wt='', scale=1):
     """Return a dataset.
 
-    Return a dataset from the ntuple `ftree'. Apply a selection cut
-    using the `cutVar' variable and the selection `cut'.
+    Return a dataset from the ntuple `ftree', with the events passing
+    the selection `cut'.  If `wt' (name of a variable in `varargset')
+    is given, the dataset is weighted with `scale*wt'.
+
+    Only the branches of the variables are read, and the cut is
+    applied before filling (see formula.py).  The dataset is then
+    filled in one pass from the arrays, there are no intermediate
+    datasets.  As with RooFit import, events with a variable outside
+    its range (or a category with an undefined state) are skipped.
 
     """
 
     from rplot.fixes import ROOT
-    from rplot.tselect import Tsplice
-    splice = Tsplice(ftree)
-    splice.make_splice('sel', cut)
-    from ROOT import RooDataSet, RooFit, RooFormulaVar, RooArgList
-    tmpdst = RooDataSet('tmpdataset', '', varargset, RooFit.Import(ftree))
+    from ROOT import (RooDataSet, RooFit, RooArgSet, RooArgList, RooRealVar,
+                      RooAbsCategoryLValue)
+    from formula import evaluate
+    import numpy
+
+    names = [var.GetName() for var in varargset]
+    if not names:
+        raise ValueError('get_dataset: no variables in varargset')
+    columns = dict(zip(names, evaluate(ftree, names, cut)))
+    sel = numpy.ones(len(columns[names[0]]), dtype=bool)
+    for var in varargset:
+        col = columns[var.GetName()]
+        if isinstance(var, RooRealVar):
+            sel &= (col >= var.getMin()) & (col <= var.getMax())
+        elif isinstance(var, RooAbsCategoryLValue):
+            states = [idx for idx in numpy.unique(col)
+                      if idx == int(idx) and var.isValidIndex(int(idx))]
+            sel &= numpy.in1d(col, states)
+        else:
+            raise TypeError('get_dataset: {} is not a RooRealVar or a '
+                            'category'.format(var.GetName()))
+
+    varlist = RooArgList()
+    for var in varargset:
+        if var.GetName() != wt:
+            varlist.add(var)
+    data = numpy.column_stack([columns[var.GetName()][sel]
+                               for var in varlist])
     if wt:
-        wtvar = RooFormulaVar('wt', '{}*@0'.format(scale),
-                              RooArgList(varargset[wt]))
-        wtvar = tmpdst.addColumn(wtvar)
-        varargset.remove(varargset[wt])
-        varargset.add(wtvar)
-        dst = RooDataSet('dataset', 'Dataset', varargset,
-                         RooFit.Import(tmpdst), RooFit.WeightVar(wtvar))
-        varargset.remove(wtvar)
-        dst = dst.reduce(varargset)
+        weights = scale * columns[wt][sel]
+        wtvar = RooRealVar('wt', 'wt', 0.)
+        varset = RooArgSet(varlist)
+        varset.add(wtvar)
+        dst = RooDataSet('dataset', 'Dataset', varset,
+                         RooFit.WeightVar(wtvar))
+    else:
+        weights = numpy.ones(sel.sum())
+        dst = RooDataSet('dataset', 'Dataset', RooArgSet(varlist))
+    _load_filler()
+    ROOT.fill_from_arrays(dst, varlist, numpy.ascontiguousarray(data).ravel(),
+                          numpy.ascontiguousarray(weights), len(weights))
     return dst
 
 
-def fill_dataset(varargset, ftree, wt, wtvar, cut=''):
-    """Return a dataset (slow, get_dataset is more efficient).
+def fill_dataset(varargset, ftree, wt, wtvar, cut='', chunk=100000):
+    """Return a dataset, filled from the tree.
 
     Return a dataset from the ntuple `ftree', also apply `cut'.  Use
     `wt' as the weight expression in the tree.  `wtvar' is the
     corresponding RooRealVar weight.  Note, varargset should contain
     wtvar.
 
-    The dataset is filled by iterating over the tree.  This is needed
-    when you want to ensure different datasets have the same weight
-    variable names, so that they can be combined later on.  This is
-    needed even if they are combined as different categories.
+    The dataset is filled from the tree, without importing it.  This
+    is needed when you want to ensure different datasets have the same
+    weight variable names, so that they can be combined later on.
+    This is needed even if they are combined as different categories.
+
+    The variables, weight and cut are evaluated with numpy (see
+    formula.py), reading only the branches they need.  The dataset is
+    filled in chunks of `chunk' events from the arrays.
 
     """
 
     from rplot.fixes import ROOT
-    from ROOT import RooDataSet, RooFit, TTreeFormula
-    from helpers import suppress_warnings
-    suppress_warnings()
-    from rplot.tselect import Tsplice
-    splice = Tsplice(ftree)
-    splice.make_splice('sel', cut)
-
-    formulae = {}
+    from ROOT import RooDataSet, RooFit, RooArgList
+    from formula import iterchunks
+    import numpy
+
     wtname = wtvar.GetName()
+    varlist = RooArgList()
     for var in varargset:
-        name = var.GetName()
-        expr = wt if name == wtname else name
-        formulae[name] = TTreeFormula(name, expr, ftree)
+        if var.GetName() != wtname:
+            varlist.add(var)
+    exprs = [var.GetName() for var in varlist] + [wt]
 
     dataset = RooDataSet('dataset', 'Dataset', varargset,
                          RooFit.WeightVar(wtvar))
-    for i in xrange(ftree.GetEntries()):
-        ftree.GetEntry(i)
-        for var, expr in formulae.iteritems():
-            realvar = varargset.find(var)
-            realvar.setVal(expr.EvalInstance())
-        dataset.add(varargset, varargset[wtname].getVal())
+    _load_filler()
+    for arrays in iterchunks(ftree, exprs, cut, chunk):
+        data = numpy.column_stack(arrays[:-1])
+        ROOT.fill_from_arrays(dataset, varlist, data.ravel(), arrays[-1],
+                              len(arrays[-1]))
     return dataset
 
 
@@ -209,6 +268,19 @@ def save_in_workspace(rfile, **argsets):
     print 'Saving arguments to file: %s' % rfile.GetName()
 
 
+def get_fit_params(fitresult):
+    """Return names, values & covariance matrix (numpy) of floating
+    parameters in a RooFitResult."""
+    import numpy
+    pars = fitresult.floatParsFinal()
+    names = [par.GetName() for par in pars]
+    values = numpy.array([par.getVal() for par in pars])
+    cmatrix = fitresult.covarianceMatrix()
+    cov = numpy.array([[cmatrix(i, j) for j in xrange(len(names))]
+                       for i in xrange(len(names))])
+    return names, values, cov
+
+
 def get_workspace(fname, wname):
     """Read and return RooWorkspace from file."""
     ffile = get_file(fname, 'read')
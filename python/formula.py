@@ -0,0 +1 @@
+../tmva/formula.py
\ No newline at end of file
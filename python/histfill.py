@@ -0,0 +1,135 @@
+# coding=utf-8
+"""Fill many histograms from a tree in one pass
+
+Instead of a TTree::Draw (a full read of the tree) for every histogram,
+all histograms of a tree are filled together, reading it once in
+chunks of events:
+
+  >>> fill_hists(tree, [(hpt, 'hMom.Pt()', 'time<2'),
+  ...                   (hprof, 'PIDK:hIPchi2', 'time<2 && BDTG>0.5'),
+  ...                   (htime, 'time', '', 'wt1')])
+
+Every branch is read once per chunk, and every expression and cut is
+evaluated once per chunk (see formula.py), however many histograms use
+it.  Cuts are split at top level `&&', so histograms with cuts that
+have terms in common share the masks of those terms.
+
+"""
+
+import re
+import numpy
+
+from formula import Formula, branches, tree2arrays, _tokenise
+
+_AXES = re.compile(r'(?<!:):(?![:=])')
+
+
+def _axes(expr):
+    """Split a TTree::Draw expression into (x, y, ..)"""
+    return [axis.strip() for axis in reversed(_AXES.split(expr))]
+
+
+def _strip(tokens):
+    """Remove parentheses around the whole expression"""
+    while tokens and tokens[0][1] == '(' and tokens[-1][1] == ')':
+        depth = 0
+        for i, (kind, token) in enumerate(tokens):
+            depth += {'(': 1, ')': -1}.get(token, 0) if kind == 'op' else 0
+            if depth == 0 and i < len(tokens) - 1:
+                return tokens   # (a) && (b)
+        tokens = tokens[1:-1]
+    return tokens
+
+
+def _terms(tokens):
+    """Split tokens at top level `&&' (unless there is a top level `||')"""
+    terms, term, depth = [], [], 0
+    for kind, token in tokens:
+        if kind == 'op' and token in ('(', ')'):
+            depth += 1 if token == '(' else -1
+        elif depth == 0 and token == '||':
+            return [tokens]
+        elif depth == 0 and token == '&&':
+            terms.append(term)
+            term = []
+            continue
+        term.append((kind, token))
+    return terms + [term]
+
+
+def cut_terms(cut):
+    """Terms of a cut joined by `&&' (recursively), as a tuple of
+    normalised strings; an empty cut has no terms."""
+    tokens = _strip(_tokenise(str(cut)))
+    if not tokens:
+        return ()
+    terms = _terms(tokens)
+    if len(terms) == 1:
+        return (' '.join(token for kind, token in terms[0]),)
+    return tuple(sorted(set(sum((cut_terms(' '.join(
+        token for kind, token in term)) for term in terms), ()))))
+
+
+def fill_hists(tree, specs, chunk=100000):
+    """Fill histograms from a tree in a single pass
+
+    specs -- list of (hist, expr[, cut[, weight]]).  The histogram (TH1,
+             TH2, TProfile, ...) decides the binning, the expression is
+             as in TTree::Draw (`x', or `y:x' for 2-D histograms and
+             profiles).  Cut and weight are optional expressions, the
+             cut can be a TCut.
+
+    As in TTree::Draw, entries with a non-zero cut are filled, with the
+    value of the cut multiplying the weight (e.g. `wt1*(time<2)').  A
+    cut joined by `&&' is boolean, so only an unsplit cut scales it.
+
+    Histograms are filled with FillN, so under/overflow, sum of squared
+    weights, etc. are handled by ROOT.
+
+    Returns the number of entries filled in every histogram.
+
+    """
+    formulae = {}
+    plan = []
+    for spec in specs:
+        hist, expr, cut, weight = (tuple(spec) + ('', ''))[:4]
+        axes, terms = _axes(expr), cut_terms(cut)
+        weight = str(weight).strip()
+        for fexpr in axes + list(terms) + ([weight] if weight else []):
+            if fexpr not in formulae:
+                formulae[fexpr] = Formula(fexpr)
+        plan.append((hist, axes, terms, weight))
+
+    needed = branches(formulae.values())
+    nentries = tree.GetEntries()
+    counts = [0] * len(plan)
+    for first in xrange(0, nentries, chunk):
+        size = min(chunk, nentries - first)
+        columns = dict(zip(needed, tree2arrays(tree, needed, first=first,
+                                               nentries=size)))
+        values, masks = {}, {(): numpy.ones(size, dtype=bool)}
+
+        def value(fexpr):
+            if fexpr not in values:
+                values[fexpr] = formulae[fexpr](columns, size)
+            return values[fexpr]
+
+        def mask(terms):
+            if terms not in masks:
+                masks[terms] = numpy.logical_and(mask(terms[:-1]),
+                                                 value(terms[-1]) != 0)
+            return masks[terms]
+
+        for i, (hist, axes, terms, weight) in enumerate(plan):
+            sel = mask(terms)
+            nsel = int(numpy.count_nonzero(sel))
+            if not nsel:
+                continue
+            args = [numpy.ascontiguousarray(value(axis)[sel]) for axis in axes]
+            wts = value(weight)[sel] if weight else numpy.ones(nsel)
+            if len(terms) == 1:
+                wts = wts * value(terms[0])[sel]
+            args.append(numpy.ascontiguousarray(wts))
+            hist.FillN(nsel, *args)
+            counts[i] += nsel
+    return counts
@@ -0,0 +1,92 @@
+# coding=utf-8
+"""Bs mass and opening angle, cos(θ*), over numpy arrays
+
+The functions call the batch interface of the kinematics class
+(libreadTree.so), the same arithmetic as the event loops of readMCTree
+and readDataTree, without a TLorentzVector per candidate:
+
+  >>> bs = (px, py, pz, E)              # arrays, Bs four-momenta
+  >>> h = (hpx, hpy, hpz, hE)           # bachelor four-momenta
+  >>> mass, cosangle = mass_angle(bs, h)
+
+cos(θ*) is the cosine of the angle between the bachelor in the Bs rest
+frame and the Bs direction of flight (the `cosangle' of the noangle
+tree written by readMCTree::Loop(TTree&)).
+
+"""
+
+import numpy
+
+
+def _load():
+    from factory import load_library
+    load_library('libreadTree.so')
+    from rplot.fixes import ROOT
+    return ROOT
+
+
+def _arrays(*arrays):
+    return [numpy.ascontiguousarray(array, dtype=numpy.float64)
+            for array in numpy.broadcast_arrays(*arrays)]
+
+
+def energy(px, py, pz, m):
+    """Energy for momentum (px, py, pz) and mass m (arrays or numbers)"""
+    ROOT = _load()
+    px, py, pz, m = _arrays(px, py, pz, m)
+    out = numpy.empty_like(px)
+    if out.size:
+        ROOT.kinematics.energyBatch(px, py, pz, m, out, out.size)
+    return out
+
+
+def mass_angle(parent, daughter):
+    """Parent mass and cos(θ*) of the daughter
+
+    parent, daughter -- four-momenta (px, py, pz, E), of arrays
+
+    Returns arrays of masses and cos(θ*).
+
+    """
+    ROOT = _load()
+    arrays = _arrays(*(tuple(parent) + tuple(daughter)))
+    mass = numpy.empty_like(arrays[0])
+    cosangle = numpy.empty_like(arrays[0])
+    if mass.size:
+        ROOT.kinematics.evaluateBatch(*(arrays + [mass, cosangle,
+                                                  mass.size]))
+    return mass, cosangle
+
+
+def tree_angles(tree, cut='', hmass=493.677, exprs=()):
+    """Bs mass and cos(θ*) for the candidates of an MC ntuple
+
+    The Ds is reconstructed from lab3..5 (with their masses), and the
+    bachelor (lab1) is given the mass hmass (default: kaon, as in
+    readMCTree; None: lab1_M).  Columns are read in chunks, only for
+    the branches needed (see formula.evaluate).
+
+    Returns mass, cos(θ*), and an array for each of exprs (e.g.
+    'lab1_TRUEID'), for candidates passing the cut.
+
+    """
+    from formula import evaluate
+    momenta = ['lab{}_P{}'.format(i, c) for i in (3, 4, 5, 1) for c in 'XYZ']
+    masses = ['lab{}_M'.format(i) for i in (3, 4, 5)]
+    if hmass is None:
+        masses.append('lab1_M')
+    columns = evaluate(tree, momenta + masses + list(exprs), cut)
+    p = dict(zip(momenta, columns))
+    m = columns[len(momenta):len(momenta) + len(masses)]
+    extra = columns[len(momenta) + len(masses):]
+
+    hE = energy(p['lab1_PX'], p['lab1_PY'], p['lab1_PZ'],
+                m[3] if hmass is None else hmass)
+    bsE = hE.copy()
+    for i, mi in zip((3, 4, 5), m):
+        bsE += energy(*[p['lab{}_P{}'.format(i, c)] for c in 'XYZ'] + [mi])
+    bs = [sum(p['lab{}_P{}'.format(i, c)] for i in (3, 4, 5, 1))
+          for c in 'XYZ'] + [bsE]
+    h = [p['lab1_P{}'.format(c)] for c in 'XYZ'] + [hE]
+    mass, cosangle = mass_angle(bs, h)
+    return [mass, cosangle] + extra
@@ -34,7 +34,32 @@ parser.add_argument('ratiofn', default='exponential',
                     choices=['flat', 'linear', 'quadratic', 'exponential'],
                     help='Type of acceptance ratio (default: exponential).')
 parser.add_argument('-s', '--save', action='store_true',
-                    help='Save the fitresult in a ROOT file.')
+                    help='Save the fitresult in a ROOT file (input for '
+                    'ltToys.py).')
+parser.add_argument('--nocache', action='store_true',
+                    help='Do not cache normalisation integrals.')
+parser.add_argument('-j', '--ncpu', type=int, default=1,
+                    help='Number of parallel workers for the likelihood.')
+parser.add_argument('--split', default='hybrid',
+                    choices=['bulk', 'interleave', 'components', 'hybrid'],
+                    help='Split of the likelihood between workers: events in '
+                    'blocks (bulk) or interleaved, DsPi/DsK categories on '
+                    'separate workers (components), or categories and events '
+                    'within them (hybrid).  The single category fits use '
+                    'interleave for components/hybrid.')
+parser.add_argument('-O', '--optimize', type=int, default=0, choices=[0, 1, 2],
+                    help='Constant-term optimisation level.  Only safe once '
+                    'the PDFs are cache-safe: AcceptanceModel evaluates the '
+                    'decay away from the data points to normalise.')
+parser.add_argument('--binned', action='store_true',
+                    help='Binned likelihood fit, with the model integrated '
+                    'over every bin.')
+parser.add_argument('--binning', default='data/binning_scheme.dat',
+                    help='Binning scheme for binned fits (dump-var-bins.py), '
+                    'computed from the samples if the file does not exist.')
+parser.add_argument('--validate', action='store_true',
+                    help='Repeat the simultaneous fit serially (NumCPU(1)), '
+                    'and unbinned for binned fits, and compare the results.')
 options = parser.parse_args()
 ratiofn = options.ratiofn
 save = options.save
@@ -50,23 +75,48 @@ gSystem.Load('libRooFit')
 from ROOT import kGreen, kRed, kBlack, kBlue, kAzure, kYellow
 from ROOT import kFullTriangleUp, kOpenTriangleDown
 
-from ROOT import TFile, TCanvas
+from ROOT import TFile, TCanvas, TH1D
 
 from ROOT import (RooFit, RooArgSet, RooArgList, RooAbsReal,
                   RooRealVar, RooRealConstant, RooFormulaVar,
-                  RooDataSet, RooBDecay, RooGaussModel,
-                  RooSimultaneous, RooCategory, RooEffProd,
-                  RooProduct)
+                  RooDataSet, RooDataHist, RooBDecay, RooGaussModel,
+                  RooSimultaneous, RooCategory, RooProduct)
 
 # my stuff
 from factory import (load_library, set_integrator_config, fill_dataset,
                      get_file, get_object, get_timestamp, get_dataset,
-                     save_in_workspace)
+                     save_in_workspace, fit_options)
 
 set_integrator_config()
 # Load custom ROOT classes
 load_library('libacceptance.so')
-from ROOT import PowLawAcceptance, AcceptanceRatio
+from ROOT import PowLawAcceptance, AcceptanceRatio, AcceptanceModel
+
+## Fit options: RooFit::MPSplit
+split = {'bulk': 0, 'interleave': 1, 'components': 2, 'hybrid': 3}
+# categories can only be split for the simultaneous fit
+if options.split in ('bulk', 'interleave'):
+    split_single = split[options.split]
+else:
+    split_single = split['interleave']
+
+
+def fit(model, data, ncpu=options.ncpu, strategy=split[options.split]):
+    """Fit model to data with the common options, returns fit result"""
+    return model.fitTo(data, *fit_options(options.optimize, ncpu, strategy))
+
+
+def compare(result, reference, labels):
+    """Print parameters of two fit results, and their difference"""
+    print '{:>12} {:>14} {:>14} {:>10}'.format('parameter', labels[0],
+                                               labels[1], 'diff/err')
+    for par in result.floatParsFinal():
+        ref = reference.floatParsFinal().find(par.GetName())
+        pull = (par.getVal() - ref.getVal()) / ref.getError() \
+            if ref.getError() > 0 else 0.
+        print '{:>12} {:>14.6g} {:>14.6g} {:>10.2g}'.format(
+            par.GetName(), par.getVal(), ref.getVal(), pull)
+
 
 ## Physics constants
 # FIXME: check if the definitions are correct.  For now does not
@@ -173,6 +223,43 @@ for dset in dsetlist:
     dset.Print()
 dataset.Print()
 
+# Binned fit: datasets are binned in a variable width binning, weights
+# and sum of squared weights are kept (SumW2Error)
+fitdata, dsetfitlist = dataset, dsetlist
+if options.binned:
+    import os
+    from binning import hist_arrays, merge_bins, read_scheme, roobinning
+    if os.path.exists(options.binning):
+        print 'Reading binning scheme from: %s' % options.binning
+        edges = read_scheme(options.binning)
+    else:
+        print 'Binning scheme %s not found, merging bins' % options.binning
+        contents, sumw2 = [], []
+        for dset in dsetlist:
+            hist = TH1D('h{}'.format(dset.GetName()), '', time.getBins(),
+                        time.getMin(), time.getMax())
+            hist.Sumw2()
+            dset.fillHistogram(hist, RooArgList(time))
+            edges, hcontents, hsumw2 = hist_arrays(hist)
+            contents += [hcontents]
+            sumw2 += [hsumw2]
+        edges = merge_bins(edges, contents, sumw2)
+    if (abs(edges[0] - time.getMin()) > 1e-9 or
+            abs(edges[-1] - time.getMax()) > 1e-9):
+        sys.exit('Binning scheme [{}, {}] does not match decay time range '
+                 '[{}, {}]'.format(edges[0], edges[-1], time.getMin(),
+                                   time.getMax()))
+    fitbinning = roobinning(edges, 'fitbinning')
+    print '%d bins: %s' % (len(edges) - 1, edges)
+    time.setBinning(fitbinning)
+    dsetfitlist = [RooDataHist('{}_hist'.format(dset.GetName()), '',
+                               RooArgSet(time), dset) for dset in dsetlist]
+    fitdata = RooDataHist('datahist', 'Combined binned dataset (DsK + DsPi)',
+                          RooArgSet(time, decaycat), dataset)
+    time.setBins(150)           # for plots
+    for dset in dsetfitlist + [fitdata]:
+        dset.Print()
+
 ## Basic B decay pdf with time resolution
 # Resolution model
 mean = RooRealVar('mean', 'Mean', 0.)
@@ -218,20 +305,20 @@ beta = RooRealVar('beta', 'beta', 0.04, 0.0, 0.10)
 dspi_acceptance = PowLawAcceptance('dspi_acceptance',
                                    'DsPi Power law acceptance',
                                    turnon, time, offset, exponent, beta)
-DsPi_Model = RooEffProd('DsPi_Model', 'DsPi acceptance model B_{s}',
-                        Bdecay, dspi_acceptance)
+# same as RooEffProd, but normalised with a fast integral split at the
+# acceptance turn-on (instead of generic numerical integration)
+DsPi_Model = AcceptanceModel('DsPi_Model', 'DsPi acceptance model B_{s}',
+                             time, Bdecay, dspi_acceptance)
+DsPi_Model.setCacheNorm(not options.nocache)
+if options.binned:
+    DsPi_Model.setBinIntegration(fitbinning)
 
 varlist += [turnon, exponent, offset, beta]
 pdflist += [dspi_acceptance, DsPi_Model]
 
 # fit to Dsπ only
 print '=' * 5, ' 2-step fit: Dsπ ', '=' * 5
-dspi_fitresult = DsPi_Model.fitTo(dsetlist[0], RooFit.Optimize(0),
-                                  RooFit.Strategy(2),
-                                  RooFit.Save(True), RooFit.NumCPU(1),
-                                  RooFit.SumW2Error(True),
-                                  RooFit.Offset(True),
-                                  RooFit.Verbose(True))
+dspi_fitresult = fit(DsPi_Model, dsetfitlist[0], strategy=split_single)
 dspi_fitresult.Print()
 
 
@@ -271,8 +358,11 @@ else:
 dsk_acceptance = RooProduct('dsk_acceptance', 'DsK Acceptance with ratio',
                             RooArgList(dspi_acceptance, ratio))
 # dsk_acceptance = PowLawAcceptance(dspi_acceptance, 'dsk_acceptance', ratio)
-DsK_Model = RooEffProd('DsK_Model', 'DsK acceptance model B_{s}',
-                       Bdecay, dsk_acceptance)
+DsK_Model = AcceptanceModel('DsK_Model', 'DsK acceptance model B_{s}',
+                            time, Bdecay, dsk_acceptance)
+DsK_Model.setCacheNorm(not options.nocache)
+if options.binned:
+    DsK_Model.setBinIntegration(fitbinning)
 
 pdflist += [dsk_acceptance, DsK_Model]
 
@@ -283,12 +373,7 @@ offset.setConstant(True)
 beta.setConstant(True)
 
 print '=' * 5, ' 2-step fit: DsK ', '=' * 5
-dsk_fitresult = DsK_Model.fitTo(dsetlist[1], RooFit.Optimize(0),
-                                RooFit.Strategy(2), RooFit.Save(True),
-                                RooFit.NumCPU(1),
-                                RooFit.SumW2Error(True),
-                                RooFit.Offset(True),
-                                RooFit.Verbose(True))
+dsk_fitresult = fit(DsK_Model, dsetfitlist[1], strategy=split_single)
 dsk_fitresult.Print()
 
 # undo earlier set constant
@@ -324,17 +409,46 @@ for var in varlist:
 print 'PDFs: ', pdflist
 for pdf in pdflist:
     pdf.Print('v')
-dataset.Print('v')
+fitdata.Print('v')
 
 ## Fit
 gSystem.ListLibraries()
-fitresult = PDF.fitTo(dataset, RooFit.Optimize(0), RooFit.Strategy(2),
-                      RooFit.Save(True), RooFit.NumCPU(1),
-                      RooFit.SumW2Error(True), RooFit.Offset(True),
-                      RooFit.Verbose(True))
+from timeit import default_timer as timer
+params = PDF.getParameters(dataset)
+initial = params.snapshot()
+start = timer()
+fitresult = fit(PDF, fitdata)
+elapsed = timer() - start
 fitresult.Print()
+print 'Fit time: {:.1f}s'.format(elapsed)
 from helpers import FitStatus
 print FitStatus(fitresult.status())
+# NOTE: with more than one worker, the cache counters are in the
+# worker processes
+for model in (DsPi_Model, DsK_Model):
+    model.printCacheStats()
+
+
+if options.validate and options.ncpu > 1:
+    print '=' * 5, ' Validation: serial simultaneous fit ', '=' * 5
+    params.assignValueOnly(initial)
+    serial = fit(PDF, fitdata, ncpu=1)
+    compare(fitresult, serial, ('parallel', 'serial'))
+    params.assignValueOnly(fitresult.floatParsFinal())
+
+if options.binned:
+    # plot and save the model, not bin averages
+    for model in (DsPi_Model, DsK_Model):
+        model.clearBinIntegration()
+    if options.validate:
+        print '=' * 5, ' Validation: unbinned simultaneous fit ', '=' * 5
+        params.assignValueOnly(initial)
+        start = timer()
+        unbinned = fit(PDF, dataset)
+        print 'Fit time: {:.1f}s (binned: {:.1f}s)'.format(timer() - start,
+                                                           elapsed)
+        compare(fitresult, unbinned, ('binned', 'unbinned'))
+        params.assignValueOnly(fitresult.floatParsFinal())
 
 
 ## Plot results
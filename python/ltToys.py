@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Toy study of the decay time acceptance fit (ltFit.py)
+
+Toys are generated from the model saved by `ltFit.py --save', with the
+fitted parameter values as the truth, and fitted with the simultaneous
+PDF (DsPi & DsK).  By default, every toy has as many DsPi and DsK
+events as the saved dataset.
+
+Toys are fitted in parallel by a pool of worker processes.  Toy i is
+generated with seed `--seed + i', so a toy is reproducible irrespective
+of the worker that runs it, or the order.  Results are appended to a
+checkpoint file (<output>.ckpt) as toys finish; when a study is started
+again with the same output, toys already in the checkpoint are skipped.
+Once all toys are done, the results are saved in a numpy .npz file with
+one array (column) per quantity:
+
+  toy, seed, status, covqual, minnll
+  <par>_true, <par>_val, <par>_err, <par>_res, <par>_pull
+
+where residual = fitted - true, and pull = residual / error.
+
+"""
+
+import argparse
+from rplot.utils import RawArgDefaultFormatter
+
+optparser = argparse.ArgumentParser(formatter_class=RawArgDefaultFormatter,
+                                    description=__doc__)
+optparser.add_argument('filename', help='ROOT file with saved fit result '
+                       '(ltFit.py --save)')
+optparser.add_argument('-o', '--output', default=None,
+                       help='Output file (default: toys-<filename>.npz)')
+optparser.add_argument('-n', '--ntoys', type=int, default=1000,
+                       help='Number of toys')
+optparser.add_argument('-j', '--jobs', type=int, default=4,
+                       help='Number of toys fitted in parallel')
+optparser.add_argument('--seed', type=int, default=1000,
+                       help='Seed of the first toy')
+optparser.add_argument('--nevents', type=int, default=None,
+                       help='Events per toy, shared between DsPi and DsK as '
+                       'in the dataset (default: size of the dataset)')
+optparser.add_argument('--poisson', action='store_true',
+                       help='Fluctuate the number of events per toy')
+optparser.add_argument('--nocache', action='store_true',
+                       help='Do not cache normalisation integrals.')
+optparser.add_argument('-O', '--optimize', type=int, default=0,
+                       choices=[0, 1, 2],
+                       help='Constant-term optimisation level, as in '
+                       'ltFit.py (not safe with AcceptanceModel).')
+options = optparser.parse_args()
+
+import os
+import sys
+
+output = options.output
+if not output:
+    base = os.path.splitext(os.path.basename(options.filename))[0]
+    output = os.path.join(os.path.dirname(options.filename),
+                          'toys-{}.npz'.format(base))
+checkpoint = output + '.ckpt'
+
+from rplot.fixes import ROOT
+ROOT.gROOT.SetBatch(True)
+from ROOT import (RooFit, RooArgSet, RooDataSet, RooRandom, RooMsgService,
+                  SetOwnership)
+
+from factory import (load_library, set_integrator_config, get_workspace,
+                     get_toy_dataset, fit_options)
+
+load_library('libacceptance.so')
+set_integrator_config()
+RooMsgService.instance().setGlobalKillBelow(RooFit.WARNING)
+
+## Model and truth from the workspace
+workspace, rfile = get_workspace(options.filename, 'workspace')
+time = workspace.var('time')
+decaycat = workspace.cat('decaycat')
+PDF = workspace.pdf('PDF')
+dataset = workspace.data('dataset')
+models = [('DsPi', workspace.pdf('DsPi_Model')),
+          ('DsK', workspace.pdf('DsK_Model'))]
+if options.nocache:
+    for mode, model in models:
+        model.setCacheNorm(False)
+
+params = PDF.getParameters(dataset)
+truth = params.snapshot()
+names = [par.GetName() for par in params if not par.isConstant()]
+truthvals = [truth.find(name).getVal() for name in names]
+
+nevents = []
+for mode, model in models:
+    nevents += [dataset.reduce(RooFit.Cut('decaycat==decaycat::{}'.format(
+        mode))).numEntries()]
+if options.nevents:
+    total = float(sum(nevents))
+    nevents = [int(round(options.nevents * n / total)) for n in nevents]
+print 'Toys: {}, events: {}'.format(options.ntoys, ', '.join(
+    '{} {}'.format(mode, n) for (mode, model), n in zip(models, nevents)))
+
+columns = ['toy', 'seed', 'status', 'covqual', 'minnll']
+for name in names:
+    columns += ['{}_{}'.format(name, col)
+                for col in ('true', 'val', 'err', 'res', 'pull')]
+
+
+def generate():
+    """Generate a toy dataset for the simultaneous PDF"""
+    dsets = []
+    for (mode, model), n in zip(models, nevents):
+        if options.poisson:
+            n = RooRandom.randomGenerator().Poisson(n)
+        dset = get_toy_dataset(RooArgSet(time), model, n,
+                               'toy_{}'.format(mode), verbose=False)
+        SetOwnership(dset, True)
+        decaycat.setLabel(mode)
+        dset.addColumn(decaycat)
+        dsets += [dset]
+    toydata = RooDataSet('toydata', 'Toy dataset (DsK + DsPi)',
+                         RooArgSet(time, decaycat), RooFit.Import(dsets[0]))
+    toydata.append(dsets[1])
+    return toydata
+
+
+def run(toy):
+    """Generate and fit one toy, return row of results"""
+    seed = options.seed + toy
+    RooRandom.randomGenerator().SetSeed(seed)
+    params.assignValueOnly(truth)
+    toydata = generate()
+    params.assignValueOnly(truth)  # start the fit from the truth
+    # same options as the data fit (ltFit.py), one process per toy
+    fitresult = PDF.fitTo(toydata, *(fit_options(options.optimize,
+                                                 verbose=False) +
+                                     [RooFit.PrintLevel(-1)]))
+    SetOwnership(fitresult, True)
+    row = [toy, seed, fitresult.status(), fitresult.covQual(),
+           fitresult.minNll()]
+    floatpars = fitresult.floatParsFinal()
+    for name, true in zip(names, truthvals):
+        par = floatpars.find(name)
+        val, err = par.getVal(), par.getError()
+        res = val - true
+        row += [true, val, err, res, res / err if err > 0 else float('nan')]
+    return row
+
+
+def read_checkpoint():
+    """Read results of finished toys, drop incomplete lines"""
+    rows = {}
+    if not os.path.exists(checkpoint):
+        return rows
+    with open(checkpoint, 'r') as ckpt:
+        header = ckpt.readline().split()
+        if header != columns:
+            sys.exit('Checkpoint {} is from a different model, '
+                     'aborting'.format(checkpoint))
+        for line in ckpt:
+            fields = line.split()
+            if len(fields) == len(columns) and line.endswith('\n'):
+                row = [float(field) for field in fields]
+                rows[int(row[0])] = row
+    return rows
+
+
+def save(rows):
+    """Save results as columns (toys in order) in a .npz file"""
+    import numpy
+    table = numpy.array([rows[toy] for toy in sorted(rows)], dtype=float)
+    table = table.reshape(len(rows), len(columns))
+    arrays = dict((col, table[:, i]) for i, col in enumerate(columns))
+    for col in ('toy', 'seed', 'status', 'covqual'):
+        arrays[col] = arrays[col].astype(int)
+    tmp = output + '.tmp'
+    with open(tmp, 'wb') as out:
+        numpy.savez(out, **arrays)
+    os.rename(tmp, output)
+    print 'Saved {} toys to: {}'.format(len(rows), output)
+
+
+rows = read_checkpoint()
+todo = [toy for toy in xrange(options.ntoys) if toy not in rows]
+if rows:
+    print 'Resuming from {}: {} toys done, {} to go'.format(
+        checkpoint, len(rows), len(todo))
+
+# rewrite, without a partially written last line
+with open(checkpoint, 'w') as ckpt:
+    ckpt.write(' '.join(columns) + '\n')
+    for toy in sorted(rows):
+        ckpt.write(' '.join(repr(field) for field in rows[toy]) + '\n')
+
+if todo:
+    # workers are forked with the model already loaded; restart them
+    # every so often, since RooFit leaks memory
+    from multiprocessing import Pool
+    pool = Pool(options.jobs, maxtasksperchild=50)
+    try:
+        with open(checkpoint, 'a') as ckpt:
+            for i, row in enumerate(pool.imap_unordered(run, todo), 1):
+                ckpt.write(' '.join(repr(field) for field in row) + '\n')
+                ckpt.flush()
+                os.fsync(ckpt.fileno())
+                rows[int(row[0])] = row
+                if i % 10 == 0 or i == len(todo):
+                    print 'Finished {}/{} toys'.format(i, len(todo))
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        sys.exit('Interrupted after {} toys, run again to resume'.format(
+            len(rows)))
+    pool.join()
+
+save(rows)
+status = [row[2] for row in rows.itervalues()]
+print 'Failed fits (status != 0): {}'.format(sum(1 for s in status if s != 0))
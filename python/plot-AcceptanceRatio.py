@@ -17,8 +17,6 @@ fname = options.file
 # Python modules
 import os
 import sys
-import math
-import numpy
 
 # FIXME: Batch running fails on importing anything but gROOT
 # ROOT global variables
@@ -41,6 +39,7 @@ from ROOT import RooArgSet, RooArgList, RooDataHist
 
 # my stuff
 from factory import get_workspace, get_file, get_object, load_library
+from binning import hist_arrays, merge_bins
 
 # Load custom ROOT classes
 load_library('libacceptance.so')
@@ -100,63 +99,14 @@ for hist in (dspihist, dskhist):
 dspihist = dspi_data.fillHistogram(dspihist, RooArgList(time))
 dskhist = dsk_data.fillHistogram(dskhist, RooArgList(time))
 
-# old binning
-obins = numpy.zeros(nbins, dtype=float)
-dspihist.GetLowEdge(obins)
-
-# bin content and bin error arrays
-dspicons = numpy.zeros(nbins, dtype=float)
-dspierrs = numpy.zeros(nbins, dtype=float)
-dskcons = numpy.zeros(nbins, dtype=float)
-dskerrs = numpy.zeros(nbins, dtype=float)
-
-# fill arrays
-for i in range(nbins):
-    dspicons[i] = dspihist.GetBinContent(i + 1)
-    dspierrs[i] = dspihist.GetBinContent(i + 1)
-    dskcons[i] = dskhist.GetBinContent(i + 1)
-    dskerrs[i] = dskhist.GetBinContent(i + 1)
-
-# find new binning
-newbinedges = [obins[0]]
-# start from 2nd bin (i=1) because first bin is in the rising region
-# and might have fewer entries
-i = 1
-
-## Bin merging algorithm:
-# 1. if δ/n > 0.1
-# 2. merge with next bin
-# 3. recalculate δ(=√(n₁+n₂)) & n(=n₁+n₂)
-# 4. if new δ/n > 0.1, repeat 2-3, else continue
-while i < nbins:
-    dspideln = dspierrs[i] / dspicons[i]
-    dskdeln = dskerrs[i] / dskcons[i]
-    if dspideln < 0.1 or dskdeln < 0.1:
-        newbinedges += [obins[i]]
-        i += 1
-    else:
-        dspicon = dspicons[i]
-        dskcon = dskcons[i]
-        n = 1                   # start merging bins
-        while i + n < nbins:
-            dspicon += dspicons[i + n]
-            dskcon += dskcons[i + n]
-            tdspideln = math.sqrt(dspicon) / dspicon
-            tdskdeln = math.sqrt(dskcon) / dskcon
-            if not (tdspideln < 0.1 or tdskdeln < 0.1):
-                n += 1
-            else:
-                newbinedges += [obins[i + n]]
-                break
-        i += n
-
-# new number of bins
-oldnbins = nbins
-nbins = len(newbinedges)
+obins, dspicons, dspisumw2 = hist_arrays(dspihist)
+obins, dskcons, dsksumw2 = hist_arrays(dskhist)
 
-# add upper bin edge for last bin
-newbinedges += [dspihist.GetBinLowEdge(oldnbins) + dspihist.GetBinWidth(oldnbins)]
-newbins = numpy.array(newbinedges)
+# first bin is in the rising region and might have fewer entries,
+# left as is
+newbins = merge_bins(obins, [dspicons, dskcons], [dspisumw2, dsksumw2])
+oldnbins = nbins
+nbins = len(newbins) - 1
 print '='*5, ' Dynamic bin merging summary ', '='*5
 print '# of bins %d -> %d ' % (oldnbins, nbins)
 
@@ -26,6 +26,7 @@ if not options.stats:
 ROOT.gErrorIgnoreLevel = ROOT.kWarning
 
 from ROOT import TFile, TProfile, TGaxis
+from histfill import fill_hists
 # from pprint import pprint
 
 
@@ -83,6 +84,7 @@ plots = {
 
 # profile plots
 hprofiles = {}
+specs = dict((mode, []) for mode in modes)
 for plot in plots:
     hprofiles[plot] = {}
     for mode in modes:
@@ -95,8 +97,10 @@ for plot in plots:
         hprofiles[plot][mode].SetLineColor(modes[mode]['cols'])
         hprofiles[plot][mode].SetMaximum(plots[plot]['ybin'][2])
         hprofiles[plot][mode].SetMinimum(plots[plot]['ybin'][1])
-        modes[mode]['tree'].Draw('{}>>{}'.format(plots[plot]['expr'], hname),
-                                 'time<1', 'prof')
+        specs[mode].append((hprofiles[plot][mode], plots[plot]['expr'],
+                            'time<1'))
+for mode in modes:
+    fill_hists(modes[mode]['tree'], specs[mode])
 
 
 # legend
@@ -15,6 +15,13 @@ optparser.add_argument('file1', help='ROOT file with DsK fit result')
 optparser.add_argument('file2', help='ROOT file with Dsπ fit result')
 optparser.add_argument('-p', '--print', dest='doPrint', action='store_true',
                        help='Print plots to png/pdf files')
+optparser.add_argument('-n', '--nsamples', type=int, default=1000,
+                       help='Number of parameter sets sampled from the '
+                       'covariance matrix')
+optparser.add_argument('--seed', type=int, default=42,
+                       help='Seed for sampling parameters')
+optparser.add_argument('--linear', action='store_true',
+                       help='Linear error propagation instead of sampling')
 
 options = optparser.parse_args()
 doPrint = options.doPrint
@@ -45,12 +52,12 @@ from ROOT import kFullTriangleUp
 
 # ROOT classes
 from ROOT import TTree, TFile, TCanvas, TPad, TClass, TLatex
-from ROOT import TF1, TMatrixDSym, TH1, TH1D, TH2D
+from ROOT import TH1, TH1D, TH2D
 
 # RooFit classes
 from ROOT import RooPlot, RooWorkspace, RooFitResult, RooFit
 from ROOT import RooArgSet, RooArgList
-from ROOT import RooDataSet, RooMultiVarGaussian
+from ROOT import RooDataSet
 
 # Load custom ROOT classes
 loadstatus = { 0: 'loaded',
@@ -64,8 +71,9 @@ if status < 0: sys.exit('Problem loading %s, %s' % (library, loadstatus[status])
 from ROOT import PowLawAcceptance
 
 # my stuff
-from factory import get_workspace, get_file, get_object
-from stattools import *
+from factory import get_workspace, get_file, get_object, get_fit_params
+from stattools import sample_band, linear_band
+from accfns import powlaw
 
 # time range and bins for ratio plots
 tfloor = 0.2
@@ -91,15 +99,8 @@ for i in xrange(0, len(fnames)):
     fitresults.append(fitresult.Clone())
     ffile.Close()
 
-# order of parameters:
-# - beta
-# - exponent
-# - offset
-# - turnon
-formula = '((1.-1./(1. + ([3]*x)**[1] - [2]))*(1 - [0]*x))'
-acceptance = TF1('acceptance', formula, tfloor, tceil)
-acceptance.SetMinimum(0.5)
-acceptance.SetMaximum(1.5)
+# acceptance: ((1.-1./(1. + (turnon*x)**exponent - offset))*(1 - beta*x))
+accpars = ('turnon', 'offset', 'exponent', 'beta')
 
 # (1) DsK, (2) DsPi
 accfns = []
@@ -107,36 +108,28 @@ accfnerrs = []
 xbincs = numpy.linspace(tfloor + 0.05, tceil - 0.05, nbins)
 
 for mode, fitresult in enumerate(fitresults):
-    parlist = fitresult.floatParsFinal()
-    cmatrix = fitresult.covarianceMatrix()
-
-    veclist = RooArgList()
-    for i in range(parlist.getSize()):
-        name = '%s_%d' % (parlist[i].GetName(), i)
-        veclist.add(parlist[i].clone(name))
-
-    multigauss = RooMultiVarGaussian('multigauss', 'multigauss', veclist, parlist, cmatrix)
-    dset = multigauss.generate(RooArgSet(veclist), 1000)
-
-    fns = []
-    for entry in range(dset.numEntries()):
-        vecset = dset.get(entry)
-        veclist = RooArgList(vecset)
-        for pars in range(veclist.getSize()):
-            acceptance.SetParameter(pars, veclist[pars].getVal())
-        fns += [acceptance.Clone('%s_%d' % (acceptance.GetName(), entry))]
-
-    avgfn = BinnedAvgFunction(fns, xbincs)
-    avgfn.calculate()
-    accfns += [avgfn.get_avg_fn()]
-    accfnerrs += [avgfn.get_avg_fn_var()]
-
-
-means = numpy.zeros(nbins, dtype=float)
-varis = numpy.zeros(nbins, dtype=float)
-for ibin in range(nbins):
-    means[ibin] = accfns[0][ibin] / accfns[1][ibin]
-    varis[ibin] = accfnerrs[0][ibin] + accfnerrs[1][ibin]
+    names, values, cov = get_fit_params(fitresult)
+    # parameters fixed in the fit
+    fixed = dict((par.GetName(), par.getVal()) for par in
+                 fitresult.constPars())
+
+    def acceptance(x, params, names=names, fixed=fixed):
+        """Acceptance for all parameter sets (rows of params)"""
+        return powlaw(x, *[params[:, names.index(par)] if par in names
+                           else fixed[par] for par in accpars])
+
+    if options.linear:
+        avgfn, avgfnerr = linear_band(acceptance, xbincs, values, cov)
+    else:
+        avgfn, avgfnerr, quants = sample_band(acceptance, xbincs, values,
+                                              cov, options.nsamples,
+                                              seed=options.seed + mode)
+    accfns += [avgfn]
+    accfnerrs += [avgfnerr]
+
+
+means = accfns[0] / accfns[1]
+varis = accfnerrs[0] + accfnerrs[1]
 
 #     if 0 == (ibin % 30):
 #         hratiodist += [ TH1D('hratiodist_%d' % ibin, 'Distribution of acceptance ratio',
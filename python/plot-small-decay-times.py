@@ -32,6 +32,7 @@ from ROOT import TFile, TCut, TH1D, TLegend
 
 # my libs
 from helpers import sanitise_str_src, sanitise_str
+from histfill import fill_hists
 
 
 ## Read from file
@@ -87,6 +88,7 @@ htypes = [
 ]
 
 histograms = []                 # list of dicts, keys: dsk, dspi
+specs = dict((mode, []) for mode in modes) # filled in one pass per tree
 hprofiles = []                  # list of dicts, keys: dsk, dspi
 
 
@@ -104,7 +106,6 @@ for htype in htypes:
         else:
             print 'Unknown variable, weird things will happen.'
         hpair = {}
-        max_y_n = 0             # max Y after normalisation
         for mode in modes:
             # ensure identical binning
             hname = 'h{}_{}_{}'.format(mode, htype, sanitise_str_src(var))
@@ -124,16 +125,21 @@ for htype in htypes:
                     cut = cut + cuts['trig']
                 else:
                     print 'Unknown permutation of cuts, weird things will happen.'
-            sel = trees[mode].Draw('{}>>{}'.format(var, hist.GetName()), cut, 'goff')
+            specs[mode].append((hist, var, cut))
             hpair[mode] = hist
-            # determine max Y for normalised histograms
-            if max_y_n < hpair[mode].GetMaximum()/hpair[mode].Integral():
-                max_y_n = hpair[mode].GetMaximum() / hpair[mode].Integral()
-        # set max Y so that histograms fit in pad
-        for mode in modes:
-            hpair[mode].SetMaximum(1.1 * max_y_n * hpair[mode].Integral())
         histograms.append(hpair)
 
+for mode in modes:
+    fill_hists(trees[mode], specs[mode])
+
+for hpair in histograms:
+    # determine max Y for normalised histograms
+    max_y_n = max(hpair[mode].GetMaximum() / hpair[mode].Integral()
+                  for mode in modes)
+    # set max Y so that histograms fit in pad
+    for mode in modes:
+        hpair[mode].SetMaximum(1.1 * max_y_n * hpair[mode].Integral())
+
 hists = map(lambda hs: (hs['dsk'], hs['dspi']), histograms)
 
 from rplot.rplot import Rplot
@@ -43,6 +43,9 @@ from rootpy.tree import Tree
 from rootpy.tree import Cut
 from rootpy.plotting import Hist
 
+# my stuff
+from histfill import fill_hists
+
 
 ## Read from file
 modes = {0:'dsk', 1:'dspi'}
@@ -57,6 +60,7 @@ trees = (                       # 0 - DsK, 1 - Dsπ
 )
 
 histograms = ([], [])           # 0 - DsK, 1 - Dsπ
+specs = ([], [])                # (hist, expr, cut), filled in one pass
 
 cuts = {
     'nocuts'    : Cut(''),
@@ -104,7 +108,11 @@ for htype in htypes:
                 # handle warning, modify to say it is intended
             else:
                 print 'Unknown permutation of cuts, weird things will happen.'
-        histograms[mode].append(trees[mode].Draw('time', cut, '', hist))
+        histograms[mode].append(hist)
+        specs[mode].append((hist, 'time', cut))
+
+for mode in modes:
+    fill_hists(trees[mode], specs[mode])
 
 
 ## ratios for different cuts
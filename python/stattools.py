@@ -2,142 +2,160 @@
 
 """This module implements several statistical tools.
 
-Classes: RunningAverage, BinnedAvgFunction
+Classes: RunningAverage
+Functions: sample_band, linear_band
 
 """
 
 import sys
 import math
+import numpy
+
 
 class RunningAverage(object):
     """This class calculates running means and variances.
 
-    There are two methods to do this; the default uses associativity
-    and other properties of expectation values for the calculation
-    whereas the alternate method uses recursion relations.
+    Entries can be filled one at a time, or as arrays (with optional
+    weights).  Every fill is combined with the statistics so far with
+    the parallel variance formula (Chan et al.), which is also used to
+    merge accumulators filled separately (e.g. in worker processes, or
+    for chunks of a tree).
 
     """
 
+    __slots__ = ('_nentries', '_sumw', '_mean', '_m2', '_min', '_max')
+
     def __init__(self):
-        self.__mean__ = 0.
-        self.__var__ = 0.
-        self.__min__ = sys.float_info.max
-        self.__max__ = sys.float_info.min
-        self.__nentries__ = 0
+        self._nentries = 0
+        self._sumw = 0.
+        self._mean = 0.
+        self._m2 = 0.           # sum of weighted squared deviations
+        self._min = sys.float_info.max
+        self._max = -sys.float_info.max
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
 
     def reset(self):
         """Reset running average calculation."""
         self.__init__()
 
-    def fill(self, entry):
-        """Calculate running average and variance (default method).
-
-        Both ways of calculating variance is correct.  The default
-        method uses associativity and other properties of expectation
-        values, whereas the alternate uses recursion relations
-
-        """
-
-        self.__nentries__ += 1
-        if entry == self.__mean__ and 0. == self.__var__:
+    def _combine(self, nentries, sumw, mean, m2, vmin, vmax):
+        self._nentries += nentries
+        self._min = min(self._min, vmin)
+        self._max = max(self._max, vmax)
+        if sumw == 0.:
             return
-        newmean = self.__mean__ + (entry - self.__mean__) / self.__nentries__
-        newvar = self.__var__ - (newmean - self.__mean__) * \
-                 (newmean - self.__mean__) + (
-                    (entry - self.__mean__) * (entry - self.__mean__)
-                     - self.__var__) / self.__nentries__
-        # newvar = (entry**2 + (self.__nentries__ - 1) * (
-        #     self.__var__ + self.__mean__**2)) / self.__nentries__ - newmean**2
-        self.__mean__ = newmean
-        self.__var__ = newvar
-        if (self.__min__ > entry):
-            self.__min__ = entry
-        if (self.__max__ < entry):
-            self.__max__ = entry
-        return
-
-    def alt_fill(self, entry):
-        """Calculate running average and variance (alternate method).
-
-        Both ways of calculating variance is correct.  The default
-        method uses associativity and other properties of expectation
-        values, whereas the alternate uses recursion relations
-
-        """
-
-        self.__nentries__ += 1
-        if entry == self.__mean__ and 0. == self.__var__:
+        total = self._sumw + sumw
+        delta = mean - self._mean
+        self._mean += delta * sumw / total
+        self._m2 += m2 + delta * delta * self._sumw * sumw / total
+        self._sumw = total
+
+    def fill(self, entry, weight=None):
+        """Add entries (a number or an array), with optional weights."""
+        if weight is None and isinstance(entry, (int, long, float)):
+            self._combine(1, 1., entry, 0., entry, entry)
             return
-        newmean = self.__mean__ + (entry - self.__mean__) / self.__nentries__
-        # newvar = self.__var__ - (newmean - self.__mean__) * \
-        #          (newmean - self.__mean__) + (
-        #             (entry - self.__mean__) * (entry - self.__mean__)
-        #              - self.__var__) / self.__nentries__
-        newvar = (entry**2 + (self.__nentries__ - 1) * (
-            self.__var__ + self.__mean__**2)) / self.__nentries__ - newmean**2
-        self.__mean__ = newmean
-        self.__var__ = newvar
-        if (self.__min__ > entry):
-            self.__min__ = entry
-        if (self.__max__ < entry):
-            self.__max__ = entry
-        return
+        entries = numpy.asarray(entry, dtype=float).ravel()
+        if not entries.size:
+            return
+        if weight is None:
+            sumw = float(entries.size)
+            mean = entries.mean()
+            m2 = numpy.sum((entries - mean)**2)
+        else:
+            weights = numpy.ones_like(entries) * numpy.asarray(
+                weight, dtype=float).ravel()
+            sumw = weights.sum()
+            mean = weights.dot(entries) / sumw if sumw else 0.
+            m2 = weights.dot((entries - mean)**2)
+        self._combine(entries.size, sumw, mean, m2, entries.min(),
+                      entries.max())
+
+    def alt_fill(self, entry, weight=None):
+        """Same as fill (kept for compatibility)."""
+        self.fill(entry, weight)
+
+    def merge(self, other):
+        """Add the statistics of another RunningAverage, returns self."""
+        self._combine(other._nentries, other._sumw, other._mean, other._m2,
+                      other._min, other._max)
+        return self
+
+    __iadd__ = merge
 
     def entries(self):
         """Return number of filled entries."""
-        return self.__nentries__
+        return self._nentries
+
+    def sumw(self):
+        """Return sum of weights."""
+        return self._sumw
 
     def mean(self):
         """Return mean."""
-        return self.__mean__
+        return self._mean
 
     def var(self):
         """Return variance."""
-        return self.__var__
+        return self._m2 / self._sumw if self._sumw else 0.
 
     def rms(self):
         """Return RMS or sqrt(varaiance)."""
-        return math.sqrt(self.__var__)
+        return math.sqrt(self.var())
 
     def min(self):
         """Return minimum."""
-        return self.__min__
+        return self._min
 
     def max(self):
         """Return maximum."""
-        return self.__max__
+        return self._max
 
 
-import numpy
+def sample_band(func, x, mean, cov, nsamples=1000,
+                quantiles=(0.158655, 0.841345), seed=None):
+    """Error band of a function from sampled parameters.
 
-class BinnedAvgFunction(object):
-    """Finds binned average of an ensemble of ROOT functions.
+    Parameter vectors are drawn from a multivariate Gaussian (mean,
+    cov) into an (nsamples, npars) matrix, and func(x, params) is
+    called once with all of them.  It should return an array of shape
+    (nsamples, len(x)).
 
-    The running average of the ensemble of ROOT functions in bins are
-    used as the binned average function.  The running variances of the
-    ensemble are treated as vertical error bars for the function.
+    Returns the mean and RMS over the samples at every x, and the
+    quantiles (one row per quantile, default: ±1σ).
 
     """
+    rng = numpy.random.RandomState(seed)
+    params = rng.multivariate_normal(mean, cov, nsamples)
+    values = func(numpy.asarray(x), params)
+    quants = numpy.percentile(values, list(100. * numpy.asarray(quantiles)),
+                              axis=0)
+    return values.mean(axis=0), values.std(axis=0), numpy.asarray(quants)
+
 
-    def __init__(self, fnlist, xbins):
-        self.__fns__ = fnlist
-        self.__xbins__ = xbins
-        self.__fnavg__ = numpy.zeros(len(xbins), dtype=float)
-        self.__fnavgerr__ = numpy.zeros(len(xbins), dtype=float)
-
-    def calculate(self):
-        """Calculate average and variances."""
-        for i, xval in enumerate(self.__xbins__):
-            ravg = RunningAverage()
-            for func in self.__fns__:
-                ravg.fill(func.Eval(xval))
-            self.__fnavg__[i] = ravg.mean()
-            self.__fnavgerr__[i] = ravg.rms()
-
-    def get_avg_fn(self):
-        """Return binned average function."""
-        return self.__fnavg__
-
-    def get_avg_fn_var(self):
-        """Return variance for binned average function."""
-        return self.__fnavgerr__
+def linear_band(func, x, mean, cov, step=0.01):
+    """Error band of a function by linear error propagation.
+
+    The Jacobian is calculated with central differences (step is in
+    units of the parameter errors); func is called once, with all the
+    shifted parameter vectors (see sample_band).
+
+    Returns the function and its error at every x.
+
+    """
+    mean = numpy.asarray(mean, dtype=float)
+    cov = numpy.asarray(cov, dtype=float)
+    npars = len(mean)
+    errs = numpy.sqrt(numpy.diag(cov))
+    steps = numpy.where(errs > 0, step * errs, 1.)
+    shifts = numpy.diag(steps)
+    params = numpy.vstack([mean, mean + shifts, mean - shifts])
+    values = func(numpy.asarray(x), params)
+    jac = (values[1:npars + 1] - values[npars + 1:]) / (2 * steps[:, None])
+    return values[0], numpy.sqrt(numpy.sum(jac * cov.dot(jac), axis=0))
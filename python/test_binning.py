@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+
+import unittest
+
+import numpy
+
+
+class test_merge(unittest.TestCase):
+    def setUp(self):
+        self.edges = numpy.arange(11.)
+        # unweighted: relative error 1/sqrt(n) < 0.5 for n > 4
+        self.contents = numpy.array([1., 2, 2, 2, 10, 1, 1, 1, 1, 1])
+
+    def test_maxrelerr(self):
+        from binning import merge_bins
+        edges = merge_bins(self.edges, self.contents, maxrelerr=0.5)
+        self.assertEqual(list(edges), [0, 1, 4, 5, 10])
+        # first bins are kept as is
+        edges = merge_bins(self.edges, self.contents, maxrelerr=0.5, keep=5)
+        self.assertEqual(list(edges), [0, 1, 2, 3, 4, 5, 10])
+
+    def test_tail(self):
+        from binning import merge_bins
+        # left over bins are one last bin, not merged with the previous
+        edges = merge_bins(self.edges, self.contents[:-1].tolist() + [0.],
+                           maxrelerr=0.5)
+        self.assertEqual(list(edges), [0, 1, 4, 5, 10])
+        edges = merge_bins(self.edges, self.contents, maxrelerr=0.45)
+        self.assertEqual(list(edges), [0, 1, 4, 5, 10])
+
+    def test_weighted(self):
+        from binning import merge_bins
+        # sum w^2 < (0.5 sum w)^2: for n > 0.8 (every bin) and n > 1
+        edges = merge_bins(self.edges, self.contents, 0.2 * self.contents,
+                           maxrelerr=0.5)
+        self.assertEqual(list(edges), range(11))
+        edges = merge_bins(self.edges, self.contents, 0.25 * self.contents,
+                           maxrelerr=0.5)
+        self.assertEqual(list(edges), [0, 1, 2, 3, 4, 5, 7, 9, 10])
+
+    def test_criteria(self):
+        from binning import merge_bins
+        other = self.contents[::-1]
+        anyedges = merge_bins(self.edges, [self.contents, other],
+                              maxrelerr=0.5)
+        alledges = merge_bins(self.edges, [self.contents, other],
+                              maxrelerr=0.5, require='all')
+        self.assertEqual(list(anyedges), [0, 1, 4, 5, 6, 9, 10])
+        self.assertEqual(list(alledges), [0, 1, 6, 10])
+        edges = merge_bins(self.edges, self.contents, maxrelerr=0.5,
+                           mincount=11)
+        self.assertEqual(list(edges), [0, 1, 5, 10])
+        edges = merge_bins(self.edges, self.contents, maxrelerr=0.5,
+                           maxwidth=2)
+        self.assertEqual(list(edges), [0, 1, 3, 5, 7, 9, 10])
+
+    def test_quantiles(self):
+        from binning import quantile_bins
+        edges = quantile_bins(self.edges, numpy.ones(10), 5)
+        self.assertEqual(list(edges), [0, 2, 4, 6, 8, 10])
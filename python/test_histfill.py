@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+
+import unittest
+
+import numpy
+
+
+class test_cuts(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(42)
+        self.columns = dict((var, numpy.random.uniform(0, 3, 100))
+                            for var in 'abc')
+
+    def test_cut_terms(self):
+        from histfill import cut_terms
+        self.assertEqual(cut_terms(''), ())
+        self.assertEqual(cut_terms('a>1'), ('a > 1',))
+        # normalised and sorted: same terms for the same selection
+        self.assertEqual(cut_terms('a>1 && b<2'), ('a > 1', 'b < 2'))
+        self.assertEqual(cut_terms('(b<2)&&((a>1))'), ('a > 1', 'b < 2'))
+        self.assertEqual(cut_terms('(a>1 && b<2) && c>1 && a>1'),
+                         ('a > 1', 'b < 2', 'c > 1'))
+        # no split at a top level ||, or inside parentheses
+        self.assertEqual(cut_terms('a>1 && b<2 || c>1'),
+                         ('a > 1 && b < 2 || c > 1',))
+        self.assertEqual(cut_terms('!(a>1 && b<2) && c>1'),
+                         ('! ( a > 1 && b < 2 )', 'c > 1'))
+
+    def test_same_selection(self):
+        from histfill import cut_terms
+        from formula import Formula
+        for cut in ('a>1 && (b<2 || c>1) && !(a>2 && c<1)',
+                    '(a>1)*(b<2) && c>1', 'a>1 || b<2 && c>1'):
+            mask = numpy.ones(100, dtype=bool)
+            for term in cut_terms(cut):
+                mask &= Formula(term).mask(self.columns)
+            self.assertTrue(numpy.all(mask ==
+                                      Formula(cut).mask(self.columns)))
+
+    def test_axes(self):
+        from histfill import _axes
+        self.assertEqual(_axes('x'), ['x'])
+        self.assertEqual(_axes('y:x'), ['x', 'y'])
+        self.assertEqual(_axes('TMath::Abs(y):x'), ['x', 'TMath::Abs(y)'])
+
+
+class test_fill(unittest.TestCase):
+    """fill_hists with a fake tree and histograms (no ROOT)"""
+
+    class tree(object):
+        def __init__(self, columns):
+            self.columns = columns
+
+        def GetEntries(self):
+            return len(self.columns['a'])
+
+        def arrays(self, tree, exprs, cut='', first=0, nentries=None):
+            return [self.columns[expr][first:first + nentries]
+                    for expr in exprs]
+
+    class hist(object):
+        def __init__(self):
+            self.filled = []
+
+        def FillN(self, n, *args):
+            self.filled.append([numpy.array(arg) for arg in args])
+
+        def contents(self):
+            return [numpy.concatenate(arg) for arg in zip(*self.filled)]
+
+    def setUp(self):
+        import histfill
+        numpy.random.seed(42)
+        self.columns = dict((var, numpy.random.uniform(0, 3, 100))
+                            for var in 'abc')
+        self.tree = test_fill.tree(self.columns)
+        self.tree2arrays = histfill.tree2arrays
+        histfill.tree2arrays = self.tree.arrays
+
+    def tearDown(self):
+        import histfill
+        histfill.tree2arrays = self.tree2arrays
+
+    def test_fill_hists(self):
+        from histfill import fill_hists
+        from formula import Formula
+        specs = [(test_fill.hist(), 'a', 'a>1 && b<2'),
+                 (test_fill.hist(), 'b:a', 'b<2 && a>1', 'c'),
+                 (test_fill.hist(), '1/(a-1)', ''),
+                 (test_fill.hist(), 'a', 'c*(b<2)', 'a')]
+        counts = fill_hists(self.tree, specs, chunk=30)
+        for (hist, expr, cut), count in zip([spec[:3] for spec in specs],
+                                            counts):
+            sel = Formula(cut).mask(self.columns)
+            self.assertEqual(count, numpy.count_nonzero(sel))
+            contents = hist.contents()
+            self.assertTrue(numpy.allclose(contents[0], Formula(
+                expr.split(':')[-1])(self.columns)[sel]))
+        # weights: 1, the weight, or the weight times a non-boolean cut
+        self.assertTrue(numpy.all(specs[0][0].contents()[1] == 1))
+        sel = Formula('a>1 && b<2').mask(self.columns)
+        self.assertTrue(numpy.allclose(specs[1][0].contents()[1],
+                                       self.columns['b'][sel]))
+        self.assertTrue(numpy.allclose(specs[1][0].contents()[2],
+                                       self.columns['c'][sel]))
+        sel = Formula('c*(b<2)').mask(self.columns)
+        self.assertTrue(numpy.allclose(
+            specs[3][0].contents()[1],
+            (self.columns['a'] * self.columns['c'])[sel]))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding=utf-8
+
+import unittest
+
+import numpy
+
+
+def boost(beta):
+    """Lorentz boost matrices, for (px, py, pz, E), by velocities beta (n, 3)"""
+    b2 = numpy.sum(beta**2, axis=1)
+    gamma = 1 / numpy.sqrt(1 - b2)
+    mat = numpy.zeros((len(beta), 4, 4))
+    mat[:, :3, :3] = numpy.eye(3) + ((gamma - 1) / b2)[:, None, None] * \
+        beta[:, :, None] * beta[:, None, :]
+    mat[:, :3, 3] = mat[:, 3, :3] = gamma[:, None] * beta
+    mat[:, 3, 3] = gamma
+    return mat
+
+
+def cos_theta_star(parent, daughter):
+    """Reference cos(θ*): boost the daughter into the parent rest frame,
+    cosine of its angle to the parent direction of flight"""
+    beta = parent[:, :3] / parent[:, 3:]
+    rest = numpy.einsum('nij,nj->ni', boost(-beta), daughter)[:, :3]
+    return numpy.sum(rest * beta, axis=1) / numpy.sqrt(
+        numpy.sum(rest**2, axis=1) * numpy.sum(beta**2, axis=1))
+
+
+class test_reference(unittest.TestCase):
+    """The numpy reference itself, no ROOT"""
+
+    def test_decay(self):
+        # two body decay at rest at a known angle, boosted along z
+        numpy.random.seed(42)
+        cos = numpy.random.uniform(-1, 1, 50)
+        sin = numpy.sqrt(1 - cos**2)
+        p, m, M = 1000., 493.677, 5366.77
+        daughter = numpy.array([p * sin, numpy.zeros(50), p * cos,
+                                numpy.hypot(p, m) * numpy.ones(50)]).T
+        parent = numpy.tile([0, 0, 0, M], (50, 1))
+        beta = numpy.tile([0, 0, 0.9], (50, 1))
+        lab = boost(beta)
+        daughter = numpy.einsum('nij,nj->ni', lab, daughter)
+        parent = numpy.einsum('nij,nj->ni', lab, parent)
+        self.assertTrue(numpy.allclose(cos_theta_star(parent, daughter),
+                                       cos, rtol=0, atol=1e-12))
+        masses = numpy.sqrt(parent[:, 3]**2 -
+                            numpy.sum(parent[:, :3]**2, axis=1))
+        self.assertTrue(numpy.allclose(masses, M, rtol=1e-12))
+
+
+class test_kinematics(unittest.TestCase):
+    def setUp(self):
+        # Ds (3 bodies) + bachelor, as in readMCTree
+        numpy.random.seed(42)
+        self.momenta = [numpy.random.normal(0, 3000, (1000, 3)) +
+                        [0, 0, 30000] for i in range(4)]
+        self.masses = [493.677, 493.677, 139.57, 493.677]
+
+    def test_energy(self):
+        from kinematics import energy
+        for p, m in zip(self.momenta, self.masses):
+            self.assertTrue(numpy.allclose(
+                energy(p[:, 0], p[:, 1], p[:, 2], m),
+                numpy.sqrt(numpy.sum(p**2, axis=1) + m**2),
+                rtol=1e-13, atol=0))
+
+    def test_mass_angle(self):
+        from kinematics import mass_angle
+        fourmom = [numpy.column_stack([p, numpy.sqrt(
+            numpy.sum(p**2, axis=1) + m**2)])
+                   for p, m in zip(self.momenta, self.masses)]
+        parent, daughter = sum(fourmom), fourmom[-1]
+        mass, cosangle = mass_angle(parent.T, daughter.T)
+        self.assertTrue(numpy.allclose(mass, numpy.sqrt(
+            parent[:, 3]**2 - numpy.sum(parent[:, :3]**2, axis=1)),
+                                       rtol=1e-13, atol=0))
+        self.assertTrue(numpy.allclose(cosangle,
+                                       cos_theta_star(parent, daughter),
+                                       rtol=0, atol=1e-12))
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import unittest
+
+import numpy
+
+
+def line(x, params):
+    """p0 + p1*x for every row of params"""
+    return params[:, 0, None] + params[:, 1, None] * x
+
+
+class test_band(unittest.TestCase):
+    def setUp(self):
+        self.x = numpy.linspace(0, 10, 11)
+        self.mean = [1., 0.5]
+        self.cov = numpy.array([[0.04, -0.01], [-0.01, 0.01]])
+        # exact for a linear function
+        self.err = numpy.sqrt(0.04 - 0.02 * self.x + 0.01 * self.x**2)
+
+    def test_linear_band(self):
+        from stattools import linear_band
+        val, err = linear_band(line, self.x, self.mean, self.cov)
+        self.assertTrue(numpy.allclose(val, 1 + 0.5 * self.x))
+        self.assertTrue(numpy.allclose(err, self.err))
+
+    def test_sample_band(self):
+        from stattools import sample_band
+        mean, rms, quants = sample_band(line, self.x, self.mean, self.cov,
+                                        nsamples=100000, seed=42)
+        self.assertEqual(quants.shape, (2, len(self.x)))
+        self.assertTrue(numpy.allclose(mean, 1 + 0.5 * self.x, atol=0.01))
+        self.assertTrue(numpy.allclose(rms, self.err, rtol=0.02))
+        self.assertTrue(numpy.allclose(quants[1] - quants[0], 2 * self.err,
+                                       rtol=0.03))
+
+
+class test_average(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(42)
+        self.values = numpy.random.normal(3, 2, 1000)
+        self.weights = numpy.random.uniform(size=1000)
+
+    def check(self, avg, values, weights=None):
+        mean = numpy.average(values, weights=weights)
+        var = numpy.average((values - mean)**2, weights=weights)
+        self.assertEqual(avg.entries(), len(values))
+        self.assertAlmostEqual(avg.mean(), mean)
+        self.assertAlmostEqual(avg.var(), var)
+        self.assertEqual((avg.min(), avg.max()), (values.min(), values.max()))
+
+    def test_fill(self):
+        from stattools import RunningAverage
+        avg = RunningAverage()
+        avg.fill(self.values)
+        self.check(avg, self.values)
+        avg = RunningAverage()
+        for value in self.values:
+            avg.fill(float(value))
+        self.check(avg, self.values)
+        avg.fill([])            # no change
+        self.check(avg, self.values)
+
+    def test_weighted(self):
+        from stattools import RunningAverage
+        avg = RunningAverage()
+        avg.fill(self.values[:300], self.weights[:300])
+        avg.fill(self.values[300:], self.weights[300:])
+        self.check(avg, self.values, self.weights)
+        self.assertAlmostEqual(avg.sumw(), self.weights.sum())
+
+    def test_merge(self):
+        import pickle
+        from stattools import RunningAverage
+        # chunks filled separately (e.g. by workers), then combined
+        chunks = []
+        for chunk in numpy.array_split(numpy.arange(1000), 7):
+            avg = RunningAverage()
+            avg.fill(self.values[chunk], self.weights[chunk])
+            chunks.append(pickle.loads(pickle.dumps(avg)))
+        total = RunningAverage()
+        for avg in chunks:
+            total += avg
+        self.check(total, self.values, self.weights)
+        # merging an empty accumulator changes nothing
+        self.check(total.merge(RunningAverage()), self.values, self.weights)
@@ -0,0 +1,101 @@
+# coding=utf-8
+"""Event weights from the lookup tables used by lifetime::Loop
+
+The PID efficiency and data/MC correction histograms are read into
+lookup tables (weightTable, libreadTree.so), which are evaluated over
+numpy arrays in one C++ loop:
+
+  >>> tables = load_tables()
+  >>> wt_pid = lookup(tables.pid[0], p)        # (n, 4), PID cuts -5..10
+  >>> wt_dmc = lookup(tables.dmc[0], numpy.log(pt), numpy.log(ntracks))
+
+With tree_weights, the weights of a small tree written by the selection
+(lifetime::Loop(TTree&, TEntryList&, bool)) can be recomputed, e.g. with
+new histograms, without running the selection again.
+
+"""
+
+import numpy
+
+
+def _load():
+    from factory import load_library
+    load_library('libreadTree.so')
+    from rplot.fixes import ROOT
+    return ROOT
+
+
+def load_tables(histdir='../ntuples/histos'):
+    """Read the weight histograms in histdir into lookup tables
+
+    Returns a lifetime.weights, with tables per magnet polarity: pid
+    (4 values per bin) and dmc (1 value per bin).
+
+    """
+    ROOT = _load()
+    tables = ROOT.lifetime.weights()
+    ROOT.lifetime.LoadWeights(tables, histdir)
+    return tables
+
+
+def lookup(table, x, y=None):
+    """Look up all values of a weightTable at (x, y)
+
+    y is needed for 2-D tables only.  Returns an array of shape
+    (len(x), table.GetNvalues()), or (len(x),) for a table with a
+    single value per bin.
+
+    """
+    x = numpy.ascontiguousarray(x, dtype=numpy.float64)
+    if table.GetDimension() > 1:
+        if y is None:
+            raise ValueError('2-D table needs x and y')
+        y = numpy.ascontiguousarray(y, dtype=numpy.float64)
+    else:
+        y = x                   # ignored
+    nvalues = table.GetNvalues()
+    out = numpy.empty(len(x) * nvalues)
+    if len(x):
+        table.LookupBatch(len(x), x, y, out)
+    if nvalues == 1:
+        return out
+    return out.reshape(len(x), nvalues)
+
+
+def tree_weights(tree, tables, polarity=None):
+    """Recompute the weights of a tree written by the selection
+
+    Trees without the Polarity branch need the magnet polarity of all
+    events (as the Polarity branch, < 0 or > 0).  Trees without the
+    nTracks branch keep their data/MC weight (wt_dmc).
+
+    Returns a dict of arrays, with the names of the branches: wt0..3,
+    wt_pid0..3 and wt_dmc.
+
+    """
+    from formula import tree2arrays
+    haspol = bool(tree.GetBranch('Polarity'))
+    hasntrk = bool(tree.GetBranch('nTracks'))
+    if not haspol and polarity is None:
+        raise ValueError('Tree without Polarity, polarity needed')
+    exprs = ['hMom.P()', 'hMom.Pt()',
+             'nTracks' if hasntrk else 'wt_dmc',
+             'Polarity' if haspol else str(polarity)]
+    p, pt, ntrk, pol = tree2arrays(tree, exprs)
+
+    wt_pid = numpy.empty((len(p), 4))
+    wt_dmc = ntrk.copy() if not hasntrk else numpy.empty(len(p))
+    for i in (0, 1):
+        sel = (pol < 0) if i else (pol >= 0)    # as lifetime::Select
+        if not sel.any():
+            continue
+        wt_pid[sel] = lookup(tables.pid[i], p[sel])
+        if hasntrk:
+            wt_dmc[sel] = lookup(tables.dmc[i], numpy.log(pt[sel]),
+                                 numpy.log(ntrk[sel]))
+
+    weights = {'wt_dmc': wt_dmc}
+    for i in xrange(4):
+        weights['wt_pid{}'.format(i)] = wt_pid[:, i]
+        weights['wt{}'.format(i)] = wt_dmc * wt_pid[:, i]
+    return weights
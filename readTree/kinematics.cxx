@@ -0,0 +1,30 @@
+/**
+ * @file   kinematics.cxx
+ *
+ * @brief  Invariant mass and opening angle without TLorentzVector
+ *
+ */
+
+#include "kinematics.hxx"
+
+
+void kinematics::evaluateBatch(const Double_t* ppx, const Double_t* ppy,
+			       const Double_t* ppz, const Double_t* pE,
+			       const Double_t* dpx, const Double_t* dpy,
+			       const Double_t* dpz, const Double_t* dE,
+			       Double_t* mass, Double_t* cosangle, UInt_t n)
+{
+  for (UInt_t i = 0; i < n; ++i) {
+    mass[i] = kinematics::mass(ppx[i], ppy[i], ppz[i], pE[i]);
+    cosangle[i] = cosThetaStar(ppx[i], ppy[i], ppz[i], pE[i],
+			       dpx[i], dpy[i], dpz[i], dE[i]);
+  }
+}
+
+
+void kinematics::energyBatch(const Double_t* px, const Double_t* py,
+			     const Double_t* pz, const Double_t* m,
+			     Double_t* E, UInt_t n)
+{
+  for (UInt_t i = 0; i < n; ++i) E[i] = energy(px[i], py[i], pz[i], m[i]);
+}
@@ -0,0 +1,91 @@
+/**
+ * @file   kinematics.hxx
+ *
+ * @brief  Invariant mass and opening angle without TLorentzVector
+ *
+ */
+
+#ifndef __KINEMATICS_HXX
+#define __KINEMATICS_HXX
+
+#include <cmath>
+
+#include <Rtypes.h>
+
+
+/**
+ * Two body kinematics with plain arithmetic
+ *
+ * The scalar methods are for event loops, the batch methods (arrays of
+ * px, py, pz, E; also from Python with numpy arrays) for whole columns.
+ * Results are the same as with TLorentzVector, without building any
+ * objects.
+ */
+class kinematics {
+
+public:
+
+  /// Energy of a particle with momentum (px, py, pz) and mass m
+  static Double_t energy(Double_t px, Double_t py, Double_t pz, Double_t m)
+  {
+    return std::sqrt(px*px + py*py + pz*pz + m*m);
+  }
+
+  /// Invariant mass, negative for space-like vectors (as TLorentzVector::M)
+  static Double_t mass(Double_t px, Double_t py, Double_t pz, Double_t E)
+  {
+    Double_t mm(E*E - px*px - py*py - pz*pz);
+    return mm < 0 ? -std::sqrt(-mm) : std::sqrt(mm);
+  }
+
+  /**
+   * Cosine of the opening angle, cos(θ*)
+   *
+   * Angle between the daughter in the parent rest frame and the
+   * direction of flight of the parent (the boost vector).  Same as
+   * TLorentzVector::Boost(-β) and Angle(β).
+   *
+   * @return cos(θ*), 1 when either vector is null
+   */
+  static Double_t cosThetaStar(Double_t ppx, Double_t ppy, Double_t ppz,
+			       Double_t pE, Double_t dpx, Double_t dpy,
+			       Double_t dpz, Double_t dE)
+  {
+    // parent boost vector
+    Double_t bx(ppx/pE), by(ppy/pE), bz(ppz/pE);
+    Double_t b2(bx*bx + by*by + bz*bz);
+    Double_t gamma(1.0 / std::sqrt(1.0 - b2));
+    Double_t bp(bx*dpx + by*dpy + bz*dpz);
+    Double_t gamma2(b2 > 0 ? (gamma - 1.0)/b2 : 0.0);
+    // daughter momentum in the parent rest frame
+    Double_t k(gamma2*bp - gamma*dE);
+    Double_t px(dpx + k*bx), py(dpy + k*by), pz(dpz + k*bz);
+    Double_t norm(std::sqrt((px*px + py*py + pz*pz) * b2));
+    if (norm <= 0) return 1.0;
+    Double_t arg((px*bx + py*by + pz*bz) / norm);
+    return arg > 1.0 ? 1.0 : (arg < -1.0 ? -1.0 : arg);
+  }
+
+  /**
+   * Parent mass and cos(θ*) for n parent and daughter four-momenta
+   *
+   * @param ppx, ppy, ppz, pE Parent four-momenta
+   * @param dpx, dpy, dpz, dE Daughter four-momenta
+   * @param mass Parent masses (output, n)
+   * @param cosangle cos(θ*) (output, n)
+   * @param n Number of candidates
+   */
+  static void evaluateBatch(const Double_t* ppx, const Double_t* ppy,
+			    const Double_t* ppz, const Double_t* pE,
+			    const Double_t* dpx, const Double_t* dpy,
+			    const Double_t* dpz, const Double_t* dE,
+			    Double_t* mass, Double_t* cosangle, UInt_t n);
+
+  /// Energies of n particles with momenta (px, py, pz) and masses m
+  static void energyBatch(const Double_t* px, const Double_t* py,
+			  const Double_t* pz, const Double_t* m,
+			  Double_t* E, UInt_t n);
+
+};
+
+#endif // __KINEMATICS_HXX
@@ -11,6 +11,9 @@
 #include <iostream>
 #include <iomanip>
 #include <cmath>
+#include <algorithm>
+#include <atomic>
+#include <thread>
 
 #include <boost/format.hpp>
 
@@ -29,7 +32,53 @@
 using namespace std;
 
 
-lifetime::lifetime(TTree *tree) : readMCTree(tree) {}
+// branches read by the loops, see readTree::ReadBranches(..)
+static const char *const selBranches[] = { // CommonSelection(..)
+  "lab0_TRUEID", "lab1_TRUEID", "lab2_TRUEID",
+  "lab3_TRUEID", "lab4_TRUEID", "lab5_TRUEID", NULL
+};
+
+static const char *const accBranches[] = { // Loop()
+  "lab0_Hlt2Topo4BodyBBDTDecision_TOS", "lab1_PIDK",
+  "lab0_TAU", "lab0_TRUETAU", NULL
+};
+
+static const char *const treeBranches[] = { // Loop(TTree&)
+  "lab0_MM", "lab0_TAU", "lab0_TRUETAU",
+  "lab0_PX", "lab0_PY", "lab0_PZ",
+  "lab0_OWNPV_X", "lab0_OWNPV_Y", "lab0_OWNPV_Z",
+  "lab0_ENDVERTEX_X", "lab0_ENDVERTEX_Y", "lab0_ENDVERTEX_Z",
+  "lab0_Hlt1TrackAllL0Decision_TOS",
+  "lab0_Hlt2Topo4BodyBBDTDecision_TOS",
+  "lab0_Hlt2Topo3BodyBBDTDecision_TOS",
+  "lab0_Hlt2Topo2BodyBBDTDecision_TOS",
+  "lab0_Hlt2IncPhiDecision_TOS",
+  NULL
+};
+
+static const char *const selTreeBranches[] = { // Loop(TTree&, TEntryList&, bool)
+  "lab0_MM", "lab0_TAU", "lab0_TAUERR", "lab0_TAUCHI2", "lab0_TRUETAU",
+  "lab1_P", "lab1_PT", "lab1_PIDK", "lab1_IPCHI2_OWNPV", "lab1_M",
+  "lab2_MM", "BDTGResponse_1", "Polarity", "nTracks",
+  "lab0_PX", "lab0_PY", "lab0_PZ",
+  "lab1_PX", "lab1_PY", "lab1_PZ",
+  "lab2_PX", "lab2_PY", "lab2_PZ",
+  "lab0_TRUEP_X", "lab0_TRUEP_Y", "lab0_TRUEP_Z", "lab0_TRUEP_E",
+  "lab1_TRUEP_X", "lab1_TRUEP_Y", "lab1_TRUEP_Z", "lab1_TRUEP_E",
+  "lab2_TRUEP_X", "lab2_TRUEP_Y", "lab2_TRUEP_Z", "lab2_TRUEP_E",
+  "lab0_Hlt1TrackAllL0Decision_TOS",
+  "lab0_Hlt2Topo4BodyBBDTDecision_TOS",
+  "lab0_Hlt2Topo3BodyBBDTDecision_TOS",
+  "lab0_Hlt2Topo2BodyBBDTDecision_TOS",
+  "lab0_Hlt2IncPhiDecision_TOS",
+  NULL
+};
+
+
+lifetime::lifetime(TTree *tree) : readMCTree(tree), _nthreads(1)
+{
+  for (unsigned i = 0; i < 4; ++i) _counts[i] = 0;
+}
 
 
 lifetime::~lifetime() {}
@@ -62,6 +111,11 @@ void lifetime::Loop()
 
    // cout << setw(20) << "true τ" << endl;
 
+   branchlist branches;
+   AddBranches(AddBranches(branches, selBranches), accBranches);
+   ReadBranches(fChain, branches);
+   StartLoop();
+
    Long64_t nbytes = 0, nb = 0;
    // for (Long64_t jentry=0; jentry<nentries;jentry+=10) // for testing
    for (Long64_t jentry=0; jentry<nentries;jentry++)
@@ -123,7 +177,7 @@ void lifetime::Loop()
    // hlifetimew.Print("all");
 
    delete canvas;
-   cout << "lifetime::Loop(): Read " << nbytes << " bytes." << std::endl;
+   EndLoop("lifetime::Loop()", nentries, nbytes);
 }
 
 
@@ -154,6 +208,11 @@ void lifetime::Loop(TTree &ftree)
    ftree.Branch("HLT2Topo2BodyTOS" , &lab0_Hlt2Topo2BodyBBDTDecision_TOS);
    ftree.Branch("HLT2TopoIncPhiTOS", &lab0_Hlt2IncPhiDecision_TOS);
 
+   branchlist branches;
+   AddBranches(AddBranches(branches, selBranches), treeBranches);
+   ReadBranches(fChain, branches);
+   StartLoop();
+
    Long64_t nbytes = 0, nb = 0;
    // for (Long64_t jentry=0; jentry<nentries;jentry+=10) // for testing
    for (Long64_t jentry=0; jentry<nentries;jentry++)
@@ -174,7 +233,7 @@ void lifetime::Loop(TTree &ftree)
        ftree.Fill();
      }
 
-   std::cout << "lifetime::Loop(TTree&): Read " << nbytes << " bytes." << std::endl;
+   EndLoop("lifetime::Loop(TTree&)", nentries, nbytes);
 }
 
 
@@ -184,97 +243,241 @@ void lifetime::Loop(TTree &ftree, TEntryList &felist, bool DsK)
    Long64_t nentries = fChain->GetEntries();
    std::cout << nentries << " entries!" << std::endl;
 
-   TLorentzVector BsMom(0,0,0,0), hMom(0,0,0,0), DsMom(0,0,0,0);
-   TLorentzVector tru_BsMom(0,0,0,0), tru_hMom(0,0,0,0), tru_DsMom(0,0,0,0);
-   double time(0.0), dt(0.0), truetime(0.0);
-   double wt[4] = {0.0, 0.0, 0.0, 0.0};
-   double wt_pid[4] = {0.0, 0.0, 0.0, 0.0};
-   double wt0(0.0), wt1(0.0), wt2(0.0), wt3(0.0);
-   double wt_pid0(0.0), wt_pid1(0.0), wt_pid2(0.0), wt_pid3(0.0);
-   double wt_dmc(0.0);
-   double BDTG(0.0), PIDK(0.0);
-   double hIPchi2(0.0);
+   candidate cand;
+
+   ftree.Branch("Bsmass" , &cand.Bsmass);
+   ftree.Branch("hID"    , &cand.hID);
+   ftree.Branch("time"   , &cand.time);
+   ftree.Branch("dt"     , &cand.dt);
+   ftree.Branch("tchi2"  , &cand.tchi2);
+   ftree.Branch("truetime", &cand.truetime);
+
+   ftree.Branch("wt0"     , &cand.wt[0]);
+   ftree.Branch("wt1"     , &cand.wt[1]);
+   ftree.Branch("wt2"     , &cand.wt[2]);
+   ftree.Branch("wt3"     , &cand.wt[3]);
+   ftree.Branch("wt_pid0" , &cand.wt_pid[0]);
+   ftree.Branch("wt_pid1" , &cand.wt_pid[1]);
+   ftree.Branch("wt_pid2" , &cand.wt_pid[2]);
+   ftree.Branch("wt_pid3" , &cand.wt_pid[3]);
+   ftree.Branch("wt_dmc" , &cand.wt_dmc);
+
+   ftree.Branch("BDTG", &cand.BDTG);
+   ftree.Branch("PIDK", &cand.PIDK);
+   ftree.Branch("hIPchi2", &cand.hIPchi2);
+   ftree.Branch("Polarity", &cand.Polarity);
+   ftree.Branch("nTracks", &cand.nTracks);
+
+   ftree.Branch("HLT1TrackAllL0TOS", &cand.HLT1TrackAllL0TOS);
+   ftree.Branch("HLT2Topo4BodyTOS" , &cand.HLT2Topo4BodyTOS);
+   ftree.Branch("HLT2Topo3BodyTOS" , &cand.HLT2Topo3BodyTOS);
+   ftree.Branch("HLT2Topo2BodyTOS" , &cand.HLT2Topo2BodyTOS);
+   ftree.Branch("HLT2TopoIncPhiTOS", &cand.HLT2TopoIncPhiTOS);
+
+   ftree.Branch("BsMom", &cand.BsMom);
+   ftree.Branch("hMom" , &cand.hMom);
+   ftree.Branch("DsMom", &cand.DsMom);
+
+   ftree.Branch("tru_BsMom", &cand.tru_BsMom);
+   ftree.Branch("tru_hMom" , &cand.tru_hMom);
+   ftree.Branch("tru_DsMom", &cand.tru_DsMom);
+
+   weights wts;
+   LoadWeights(wts);
+
+   branchlist branches;
+   AddBranches(AddBranches(branches, selBranches), selTreeBranches);
+   for (unsigned i = 0; i < 4; ++i) _counts[i] = 0;
+   StartLoop();
 
-   ftree.Branch("Bsmass" , &lab0_MM);
-   ftree.Branch("hID"    , &lab1_TRUEID);
-   ftree.Branch("time"   , &time);
-   ftree.Branch("dt"     , &dt);
-   ftree.Branch("tchi2"  , &lab0_TAUCHI2);
-   ftree.Branch("truetime", &truetime);
-
-   ftree.Branch("wt0"     , &wt0);
-   ftree.Branch("wt1"     , &wt1);
-   ftree.Branch("wt2"     , &wt2);
-   ftree.Branch("wt3"     , &wt3);
-   ftree.Branch("wt_pid0" , &wt_pid0);
-   ftree.Branch("wt_pid1" , &wt_pid1);
-   ftree.Branch("wt_pid2" , &wt_pid2);
-   ftree.Branch("wt_pid3" , &wt_pid3);
-   ftree.Branch("wt_dmc" , &wt_dmc);
-
-   ftree.Branch("BDTG", &BDTG);
-   ftree.Branch("PIDK", &PIDK);
-   ftree.Branch("hIPchi2", &hIPchi2);
+   Long64_t nbytes = 0, nb = 0;
+   if (_nthreads > 1) {
+     // selected in parallel, filled in entry order
+     std::vector<std::vector<candidate> > selected;
+     nbytes = ParallelSelect(branches, DsK, wts, nentries, selected);
+     for (unsigned i = 0; i < selected.size(); ++i) {
+       for (unsigned j = 0; j < selected[i].size(); ++j) {
+	 cand = selected[i][j];
+	 ftree.Fill();
+	 felist.Enter(cand.entry, fChain);
+       }
+     }
+   } else {
+     ReadBranches(fChain, branches);
+     // for (Long64_t jentry=0; jentry<nentries;jentry+=100) // for testing
+     for (Long64_t jentry=0; jentry<nentries;jentry++)
+       {
+	 Long64_t ientry = LoadTree(jentry);
+	 if (ientry < 0) break;
+	 nb = fChain->GetEntry(jentry);   nbytes += nb;
+
+	 if (not Select(DsK, wts, cand)) continue;
+	 cand.entry = jentry;
+	 ftree.Fill();
+	 felist.Enter(jentry, fChain);
+       }
+   }
 
-   ftree.Branch("HLT1TrackAllL0TOS", &lab0_Hlt1TrackAllL0Decision_TOS);
-   ftree.Branch("HLT2Topo4BodyTOS" , &lab0_Hlt2Topo4BodyBBDTDecision_TOS);
-   ftree.Branch("HLT2Topo3BodyTOS" , &lab0_Hlt2Topo3BodyBBDTDecision_TOS);
-   ftree.Branch("HLT2Topo2BodyTOS" , &lab0_Hlt2Topo2BodyBBDTDecision_TOS);
-   ftree.Branch("HLT2TopoIncPhiTOS", &lab0_Hlt2IncPhiDecision_TOS);
+   std::cout << "Cutflow table: " << std::endl;
+   for (std::map<unsigned int,long>::const_iterator itr = _cutflow.begin();
+	itr != _cutflow.end(); ++itr) {
+     std::cout << boost::format("| %|2| | %|6| |\n") % itr->first % itr->second;
+   }
 
-   ftree.Branch("BsMom", &BsMom);
-   ftree.Branch("hMom" , &hMom);
-   ftree.Branch("DsMom", &DsMom);
+   std::cout << "Entry list: " << felist.GetN() << " DsK: " << _counts[2]
+	     << " DsPi: " << _counts[3] << std::endl;
+   std::cout << "Rejected DsK: " << _counts[0] - _counts[2]
+	     << " DsPi: " << _counts[1] - _counts[3] << std::endl;
+   EndLoop("lifetime::Loop(TTree&,TEntryList&)", nentries, nbytes);
+}
+
+
+bool lifetime::Select(bool DsK, const weights &wts, candidate &cand)
+{
+   if (std::abs(lab1_TRUEID) == 321) _counts[0]++;
+   else if (std::abs(lab1_TRUEID) == 211) _counts[1]++;
+
+   // if (( UnbiasedSelection() == false ) or ( lab1_PIDK < 5 )) return false;
+   if (CommonSelection(DsK) == false) return false;
+   // if (OldOfflineSelection(DsK) == false) return false;
+
+   if (lab0_TAUERR <= 0 or lab0_TAUERR >= 0.0002 or
+       lab0_TAUERR != lab0_TAUERR) {
+     _cutflow[12]++;
+     return false;
+   }
+
+   // since there is a cut at 0.2 ps in stripping
+   if (lab0_TAU < 2E-4) {
+     _cutflow[13]++;
+     return false;
+   }
+
+   cand.Bsmass   = lab0_MM;
+   cand.hID      = lab1_TRUEID;
+   cand.time     = lab0_TAU * 1E3;
+   cand.dt       = lab0_TAUERR * 1E3;
+   cand.tchi2    = lab0_TAUCHI2;
+   cand.truetime = lab0_TRUETAU * 1E3;
+
+   unsigned pol(Polarity < 0 ? 1 : 0);
+   cand.wt_dmc = wts.dmc[pol].Lookup(std::log(lab1_PT), std::log(nTracks));
+   wts.pid[pol].Lookup(lab1_P, 0., cand.wt_pid);
+   for (unsigned i = 0; i < 4; ++i) cand.wt[i] = cand.wt_dmc * cand.wt_pid[i];
+
+   cand.Polarity = Polarity;
+   cand.nTracks  = nTracks;
+   cand.BDTG    = BDTGResponse_1;
+   cand.PIDK    = lab1_PIDK;
+   cand.hIPchi2 = lab1_IPCHI2_OWNPV;
+
+   cand.HLT1TrackAllL0TOS = lab0_Hlt1TrackAllL0Decision_TOS;
+   cand.HLT2Topo4BodyTOS  = lab0_Hlt2Topo4BodyBBDTDecision_TOS;
+   cand.HLT2Topo3BodyTOS  = lab0_Hlt2Topo3BodyBBDTDecision_TOS;
+   cand.HLT2Topo2BodyTOS  = lab0_Hlt2Topo2BodyBBDTDecision_TOS;
+   cand.HLT2TopoIncPhiTOS = lab0_Hlt2IncPhiDecision_TOS;
+
+   cand.BsMom.SetXYZM(lab0_PX, lab0_PY, lab0_PZ, lab0_MM);
+   cand.hMom .SetXYZM(lab1_PX, lab1_PY, lab1_PZ, lab1_M);
+   cand.DsMom.SetXYZM(lab2_PX, lab2_PY, lab2_PZ, lab2_MM);
+
+   cand.tru_BsMom.SetPxPyPzE(lab0_TRUEP_X, lab0_TRUEP_Y, lab0_TRUEP_Z, lab0_TRUEP_E);
+   cand.tru_hMom .SetPxPyPzE(lab1_TRUEP_X, lab1_TRUEP_Y, lab1_TRUEP_Z, lab1_TRUEP_E);
+   cand.tru_DsMom.SetPxPyPzE(lab2_TRUEP_X, lab2_TRUEP_Y, lab2_TRUEP_Z, lab2_TRUEP_E);
+
+   if (std::abs(lab1_TRUEID) == 321) _counts[2]++;
+   else if (std::abs(lab1_TRUEID) == 211) _counts[3]++;
+   return true;
+}
+
+
+Long64_t lifetime::ParallelSelect(const branchlist &branches, bool DsK,
+				  const weights &wts, Long64_t nentries,
+				  std::vector<std::vector<candidate> > &selected)
+{
+   ROOT::EnableThreadSafety();
+   // global settings are not thread safe, set before starting threads
+   EnablePrefetching();
+
+   // entry ranges, several per thread to balance the load
+   Long64_t chunk(std::max(Long64_t(10000), nentries / (8 * _nthreads) + 1));
+   unsigned nranges((nentries + chunk - 1) / chunk);
+   selected.assign(nranges, std::vector<candidate>());
+
+   std::atomic<unsigned> next(0);
+   std::vector<Long64_t> nbytes(_nthreads, 0);
+   std::vector<lifetime*> readers(_nthreads, NULL);
+   std::vector<std::thread> pool;
+
+   for (unsigned t = 0; t < _nthreads; ++t) {
+     // every thread reads its own copy of the chain
+     readers[t] = new lifetime(CopyChain(fChain));
+     pool.push_back(std::thread([&, t]() {
+	   lifetime *reader = readers[t];
+	   TTree *chain = reader->fChain;
+	   reader->ReadBranches(chain, branches, false);
+
+	   candidate cand;
+	   for (unsigned r = next++; r < nranges; r = next++) {
+	     Long64_t first(r * chunk), last(std::min(first + chunk, nentries));
+	     chain->SetCacheEntryRange(first, last);
+	     for (Long64_t jentry = first; jentry < last; ++jentry) {
+	       if (reader->LoadTree(jentry) < 0) break;
+	       nbytes[t] += chain->GetEntry(jentry);
+	       if (not reader->Select(DsK, wts, cand)) continue;
+	       cand.entry = jentry;
+	       selected[r].push_back(cand);
+	     }
+	   }
+	 }));
+   }
 
-   ftree.Branch("tru_BsMom", &tru_BsMom);
-   ftree.Branch("tru_hMom" , &tru_hMom);
-   ftree.Branch("tru_DsMom", &tru_DsMom);
+   Long64_t total(0);
+   for (unsigned t = 0; t < _nthreads; ++t) {
+     pool[t].join();
+     total += nbytes[t];
+
+     // merge counters, in thread order
+     for (std::map<unsigned int,long>::const_iterator
+	    itr = readers[t]->_cutflow.begin();
+	  itr != readers[t]->_cutflow.end(); ++itr) {
+       _cutflow[itr->first] += itr->second;
+     }
+     for (unsigned i = 0; i < 4; ++i) _counts[i] += readers[t]->_counts[i];
+
+     TTree *chain = readers[t]->fChain;
+     readers[t]->fChain = NULL; // the chain owns its files
+     delete readers[t];
+     delete chain;
+   }
+   return total;
+}
 
-   unsigned long rdskcount(0), rdspicount(0);
-   unsigned long dskcount(0), dspicount(0);
 
+void lifetime::LoadWeights(weights &wts, std::string dir)
+{
+   dir += "/";
    // Histograms with weight
    TFile * fpid[2][2] = {
      {
-       TFile::Open("../ntuples/histos/EffHistos_Reco12_39Mom_MagDown_0123.root"),
-       TFile::Open("../ntuples/histos/EffHistos_Reco12_39Mom_MagDown_45678.root")
+       TFile::Open((dir + "EffHistos_Reco12_39Mom_MagDown_0123.root").c_str()),
+       TFile::Open((dir + "EffHistos_Reco12_39Mom_MagDown_45678.root").c_str())
      }, {
-       TFile::Open("../ntuples/histos/EffHistos_Reco12_39Mom_MagUp_012.root"),
-       TFile::Open("../ntuples/histos/EffHistos_Reco12_39Mom_MagUp_3456.root")
+       TFile::Open((dir + "EffHistos_Reco12_39Mom_MagUp_012.root").c_str()),
+       TFile::Open((dir + "EffHistos_Reco12_39Mom_MagUp_3456.root").c_str())
      }
    };
 
    TFile *fdmc[2] = {
-     TFile::Open("../ntuples/histos/MomVsnTr_Comp_DPi_Down_hist.root"),
-     TFile::Open("../ntuples/histos/MomVsnTr_Comp_DPi_Up_hist.root")
+     TFile::Open((dir + "MomVsnTr_Comp_DPi_Down_hist.root").c_str()),
+     TFile::Open((dir + "MomVsnTr_Comp_DPi_Up_hist.root").c_str())
    };
 
-   // 4 PID cuts (-5, 0, 5, 10) per polarity
-   std::vector<std::vector<TH1F*> > hpid;
-   for (unsigned i = 0; i < 2; ++i) {
-     std::vector<TH1F*> hpid_t(4, NULL);
-     boost::format fmt("hpid%d");
-     for (unsigned j = 0; j < 4; ++j) {
-       fmt % j;
-       // fpid[i][j]->ls();
-       hpid_t[j] = dynamic_cast<TH1F*>
-	 (fpid[i][0]->Get("MyPionMisID_0")->Clone(fmt.str().c_str()));
-       hpid_t[j]->Reset("icesm");
-     }
-     hpid.push_back(hpid_t);
-   }
-
-   // Magnet polarity
-   std::vector<TH2F*> hmomtrk(2, NULL);
-   boost::format fmt("hmomtrk%d");
-   for (unsigned i = 0; i < 2; ++i) {
-     fmt % i;
-     hmomtrk[i] = dynamic_cast<TH2F*>
-	(fdmc[i]->Get("histRatio")->Clone(fmt.str().c_str()));
-   }
-
-   // 4 PID cuts (-5, 0, 5, 10) per polarity, 2 samples per polarity
+   wts.pid.clear();
+   wts.dmc.clear();
    for (unsigned i = 0; i < 2; ++i) {
+     // 4 PID cuts (-5, 0, 5, 10), 2 samples per polarity
+     std::vector<TH1*> hpid(4, NULL);
      boost::format fmt("MyPionMisID_%s");
      for (unsigned j = 0; j < 4; ++j) {
        // format histogram name per PID cut
@@ -288,93 +491,27 @@ void lifetime::Loop(TTree &ftree, TEntryList &felist, bool DsK)
 					 ->Clone("hpid1"));
        TH1F* hpid2 = dynamic_cast<TH1F*>(fpid[i][1]->Get(fmt.str().c_str())
 					 ->Clone("hpid2"));
+       hpid1->SetDirectory(0);
+       hpid2->SetDirectory(0);
        double n1(hpid1->GetEntries()), n2(hpid2->GetEntries());
        double ntot(n1 + n2);
-       hpid[i][j]->Add(hpid1, hpid2, n1/ntot, n2/ntot);
+       hpid1->Add(hpid1, hpid2, n1/ntot, n2/ntot);
+       hpid[j] = hpid1;
+       delete hpid2;
      }
-   }
+     wts.pid.push_back(weightTable(hpid));
+     for (unsigned j = 0; j < 4; ++j) delete hpid[j];
 
-   Long64_t nbytes = 0, nb = 0;
-   // for (Long64_t jentry=0; jentry<nentries;jentry+=100) // for testing
-   for (Long64_t jentry=0; jentry<nentries;jentry++)
-     {
-       Long64_t ientry = LoadTree(jentry);
-       if (ientry < 0) break;
-       nb = fChain->GetEntry(jentry);   nbytes += nb;
-
-       if (std::abs(lab1_TRUEID) == 321) rdskcount++;
-       else if (std::abs(lab1_TRUEID) == 211) rdspicount++;
-
-       // if (( UnbiasedSelection() == false ) or ( lab1_PIDK < 5 )) continue;
-       if (CommonSelection(DsK) == false) continue;
-       // if (OldOfflineSelection(DsK) == false) continue;
-
-       if (lab0_TAUERR <= 0 or lab0_TAUERR >= 0.0002 or
-	   lab0_TAUERR != lab0_TAUERR) {
-	 _cutflow[12]++;
-	 continue;
-       }
-
-       // since there is a cut at 0.2 ps in stripping
-       if (lab0_TAU < 2E-4) {
-	 _cutflow[13]++;
-	 continue;
-       }
-
-       time     = lab0_TAU * 1E3;
-       dt       = lab0_TAUERR * 1E3;
-       truetime = lab0_TRUETAU * 1E3;
-
-       // FIXME: get weights from histogram
-       int bin(-1);
-       bin      = hmomtrk[Polarity < 0 ? 1 : 0]->FindBin(std::log(lab1_PT),
-							 std::log(nTracks));
-       wt_dmc   = hmomtrk[Polarity < 0 ? 1 : 0]->GetBinContent(bin);
-       for (unsigned i = 0; i < 4; ++i) {
-	 bin = hpid[Polarity < 0 ? 1 : 0][i]->FindBin(lab1_P);
-	 wt_pid[i] = hpid[Polarity < 0 ? 1 : 0][i]->GetBinContent(bin);
-	 wt[i] = wt_dmc * wt_pid[i];
-       }
-
-       // assign weights to tree branches
-       wt0 = wt[0];
-       wt1 = wt[1];
-       wt2 = wt[2];
-       wt3 = wt[3];
-       wt_pid0 = wt_pid[0];
-       wt_pid1 = wt_pid[1];
-       wt_pid2 = wt_pid[2];
-       wt_pid3 = wt_pid[3];
-
-       BDTG = BDTGResponse_1;
-       PIDK = lab1_PIDK;
-       hIPchi2 = lab1_IPCHI2_OWNPV;
-
-       BsMom.SetXYZM(lab0_PX, lab0_PY, lab0_PZ, lab0_MM);
-       hMom .SetXYZM(lab1_PX, lab1_PY, lab1_PZ, lab1_M);
-       DsMom.SetXYZM(lab2_PX, lab2_PY, lab2_PZ, lab2_MM);
-
-       tru_BsMom.SetPxPyPzE(lab0_TRUEP_X, lab0_TRUEP_Y, lab0_TRUEP_Z, lab0_TRUEP_E);
-       tru_hMom .SetPxPyPzE(lab1_TRUEP_X, lab1_TRUEP_Y, lab1_TRUEP_Z, lab1_TRUEP_E);
-       tru_DsMom.SetPxPyPzE(lab2_TRUEP_X, lab2_TRUEP_Y, lab2_TRUEP_Z, lab2_TRUEP_E);
-
-       ftree.Fill();
-       felist.Enter(jentry, fChain);
-       if (std::abs(lab1_TRUEID) == 321) dskcount++;
-       else if (std::abs(lab1_TRUEID) == 211) dspicount++;
-     }
-
-   std::cout << "Cutflow table: " << std::endl;
-   for (std::map<unsigned int,long>::const_iterator itr = _cutflow.begin();
-	itr != _cutflow.end(); ++itr) {
-     std::cout << boost::format("| %|2| | %|6| |\n") % itr->first % itr->second;
+     // data/MC correction vs log(pT), log(nTracks)
+     wts.dmc.push_back(weightTable(*dynamic_cast<TH1*>
+				   (fdmc[i]->Get("histRatio"))));
    }
 
-   std::cout << "Entry list: " << felist.GetN() << " DsK: " << dskcount
-	     << " DsPi: " << dspicount << std::endl;
-   std::cout << "Rejected DsK: " << rdskcount - dskcount
-	     << " DsPi: " << rdspicount - dspicount << std::endl;
-   std::cout << "lifetime::Loop(TTree&,TEntryList&): Read " << nbytes << " bytes." << std::endl;
+   for (unsigned i = 0; i < 2; ++i) {
+     delete fpid[i][0];
+     delete fpid[i][1];
+     delete fdmc[i];
+   }
 }
 
 
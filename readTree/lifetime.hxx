@@ -15,16 +15,74 @@
 #include <map>
 
 #include <TEntryList.h>
+#include <TLorentzVector.h>
+#include <string>
 
 #include "readMCTree.hxx"
+#include "weightTable.hxx"
 
 using namespace std;
 
 class lifetime : public readMCTree {
 
+public :
+
+  /// Selected entry, as written by Loop(TTree&, TEntryList&, bool)
+  struct candidate {
+    Long64_t entry;
+    Double_t Bsmass, time, dt, tchi2, truetime;
+    Int_t    hID;
+    double   wt[4], wt_pid[4], wt_dmc;
+    double   BDTG, PIDK, hIPchi2;
+    Short_t  Polarity;
+    Int_t    nTracks;
+    Bool_t   HLT1TrackAllL0TOS, HLT2Topo4BodyTOS, HLT2Topo3BodyTOS,
+	     HLT2Topo2BodyTOS, HLT2TopoIncPhiTOS;
+    TLorentzVector BsMom, hMom, DsMom;
+    TLorentzVector tru_BsMom, tru_hMom, tru_DsMom;
+  };
+
+  /**
+   * Weight tables, per magnet polarity (0: down, 1: up)
+   *
+   * pid: PID efficiency vs bachelor p, 4 values (PID cuts -5, 0, 5, 10)
+   * dmc: data/MC correction vs log(bachelor pT), log(nTracks)
+   */
+  struct weights {
+    std::vector<weightTable> pid;
+    std::vector<weightTable> dmc;
+  };
+
 private:
 
   std::map<unsigned int, long> _cutflow;
+  unsigned long _counts[4];	// true DsK, DsPi read (0, 1) and selected (2, 3)
+  unsigned _nthreads;
+
+  /**
+   * Select the current entry, and compute its weights
+   *
+   * @param DsK Select DsK (or DsPi)
+   * @param wts Weight histograms
+   * @param cand Filled for selected entries (except entry)
+   *
+   * @return Whether the entry is selected
+   */
+  bool Select(bool DsK, const weights &wts, candidate &cand);
+
+  /**
+   * Select all entries on _nthreads threads
+   *
+   * Entry ranges are processed by a pool of threads, every thread
+   * with its own reader (and copy of the chain) and counters.
+   * Candidates are returned per range, so in entry order; counters
+   * are added to those of this reader.
+   *
+   * @return Bytes read
+   */
+  Long64_t ParallelSelect(const branchlist &branches, bool DsK,
+			  const weights &wts, Long64_t nentries,
+			  std::vector<std::vector<candidate> > &selected);
 
 public :
 
@@ -38,6 +96,18 @@ public :
   virtual void  Loop(TTree &);
   virtual void  Loop(TTree &, TEntryList &, bool DsK);
 
+  /// Threads used by Loop(TTree&, TEntryList&, bool); 1: no threads
+  void     SetThreads(unsigned nthreads) { _nthreads = nthreads ? nthreads : 1; }
+  unsigned GetThreads() const { return _nthreads; }
+
+  /**
+   * Read the weight histograms into lookup tables
+   *
+   * @param wts Weight tables
+   * @param dir Directory with the histogram files
+   */
+  static void LoadWeights(weights &wts, std::string dir="../ntuples/histos");
+
   // overloaded non-virtual methods
   bool  CommonSelection(bool DsK=true);
   bool  UnbiasedSelection();
@@ -2,13 +2,27 @@
 #include <iostream>
 
 #include "readDataTree.hxx"
+#include "kinematics.hxx"
 #include <TH2.h>
 #include <TStyle.h>
 #include <TCanvas.h>
-#include <TLorentzVector.h>
 #include <TMath.h>
 
 
+// branches read by the loops, see readTree::ReadBranches(..)
+static const char *const selBranches[] = { // CommonSelection()
+  "lab0_MM", "lab2_MM", "lab1_P", "BDTGResponse", NULL
+};
+
+static const char *const angleBranches[] = { // Loop(TTree&), Loop(TNtuple&)
+  "pPIDcut", "lab1_PIDK",
+  "lab1_PX", "lab1_PY", "lab1_PZ", "lab1_M",
+  "lab3_PX", "lab3_PY", "lab3_PZ", "lab3_M",
+  "lab4_PX", "lab4_PY", "lab4_PZ", "lab4_M",
+  "lab5_PX", "lab5_PY", "lab5_PZ", "lab5_M", NULL
+};
+
+
 readDataTree::readDataTree(TTree *tree)
 {
 // if parameter tree is not specified (or zero), connect the file
@@ -156,15 +170,16 @@ void readDataTree::Loop(TTree &ftree)
 
   Double_t Cosoangle(0.);
   // Double_t BsM(0.0), DsM(0.0);
-  TLorentzVector BsP(0,0,0,0), DsP(0,0,0,0), hP(0,0,0,0),
-    Pi3P(0,0,0,0), K4P(0,0,0,0), K5P(0,0,0,0);
-
-  TVector3 boost(0,0,0);
 
   ftree.Branch("Bsmass"  , &lab0_MM[0]);
   ftree.Branch("cosangle", &Cosoangle);
   ftree.Branch("hPIDK"   , &lab1_PIDK[0]);
 
+  branchlist branches;
+  AddBranches(AddBranches(branches, selBranches), angleBranches);
+  ReadBranches(fChain, branches);
+  StartLoop();
+
   Long64_t nbytes = 0, nb = 0;
   for (Long64_t jentry=0; jentry<nentries;jentry++)
     {
@@ -190,26 +205,25 @@ void readDataTree::Loop(TTree &ftree)
 	mass(π) = 139.57  MeV
       */
 
-      Pi3P.SetXYZM( lab3_PX[0], lab3_PY[0], lab3_PZ[0], lab3_M[0]);
-      K4P .SetXYZM( lab4_PX[0], lab4_PY[0], lab4_PZ[0], lab4_M[0]);
-      K5P .SetXYZM( lab5_PX[0], lab5_PY[0], lab5_PZ[0], lab5_M[0]);
-      // K mass instead of lab1_M to emulate wrong mass hypothesis
-      hP  .SetXYZM( lab1_PX[0], lab1_PY[0], lab1_PZ[0], lab1_M[0]);
-
-      DsP = Pi3P + K4P + K5P;
-      BsP = DsP + hP;
+      Double_t hE(kinematics::energy(lab1_PX[0], lab1_PY[0], lab1_PZ[0], lab1_M[0]));
+      Double_t BsE(kinematics::energy(lab3_PX[0], lab3_PY[0], lab3_PZ[0], lab3_M[0]) +
+		   kinematics::energy(lab4_PX[0], lab4_PY[0], lab4_PZ[0], lab4_M[0]) +
+		   kinematics::energy(lab5_PX[0], lab5_PY[0], lab5_PZ[0], lab5_M[0]) + hE);
+      Double_t BsPx(lab3_PX[0] + lab4_PX[0] + lab5_PX[0] + lab1_PX[0]);
+      Double_t BsPy(lab3_PY[0] + lab4_PY[0] + lab5_PY[0] + lab1_PY[0]);
+      Double_t BsPz(lab3_PZ[0] + lab4_PZ[0] + lab5_PZ[0] + lab1_PZ[0]);
 
       // DsM = DsP.M();
-      // BsM = BsP.M();
+      // BsM = kinematics::mass(BsPx, BsPy, BsPz, BsE);
 
-      boost = - BsP.BoostVector();
-      hP .Boost(-boost(0), -boost(1), -boost(2));
-      Cosoangle = TMath::Cos((hP.Angle(boost)));
+      // as the MC noangle tree (readMCTree::Loop(TTree&))
+      Cosoangle = kinematics::cosThetaStar(BsPx, BsPy, BsPz, BsE,
+					   lab1_PX[0], lab1_PY[0], lab1_PZ[0], hE);
 
       ftree.Fill();
     }
 
-  std::cout << "readDataTree::Loop(TTree &): Read " << nbytes << " bytes." << std::endl;
+  EndLoop("readDataTree::Loop(TTree &)", nentries, nbytes);
 }
 
 
@@ -224,11 +238,13 @@ void readDataTree::Loop(TNtuple &noangle)
 
   std::cout << nentries << " entries!" << std::endl;
 
+  Double_t Cosoangle(0.);
   // Double_t BsM(0.0), DsM(0.0);
-  TLorentzVector BsP(0,0,0,0), DsP(0,0,0,0), hP(0,0,0,0),
-    Pi3P(0,0,0,0), K4P(0,0,0,0), K5P(0,0,0,0);
 
-  TVector3 boost(0,0,0);
+  branchlist branches;
+  AddBranches(AddBranches(branches, selBranches), angleBranches);
+  ReadBranches(fChain, branches);
+  StartLoop();
 
   Long64_t nbytes = 0, nb = 0;
   for (Long64_t jentry=0; jentry<nentries;jentry++)
@@ -255,25 +271,22 @@ void readDataTree::Loop(TNtuple &noangle)
 	mass(π) = 139.57  MeV
       */
 
-      Pi3P.SetXYZM( lab3_PX[0], lab3_PY[0], lab3_PZ[0], lab3_M[0]);
-      K4P .SetXYZM( lab4_PX[0], lab4_PY[0], lab4_PZ[0], lab4_M[0]);
-      K5P .SetXYZM( lab5_PX[0], lab5_PY[0], lab5_PZ[0], lab5_M[0]);
-      hP  .SetXYZM( lab1_PX[0], lab1_PY[0], lab1_PZ[0], lab1_M[0]);
-
-      DsP = Pi3P + K4P + K5P;
-      BsP = DsP + hP;
-
-      // DsM = DsP.M();
-      // BsM = BsP.M();
+      Double_t hE(kinematics::energy(lab1_PX[0], lab1_PY[0], lab1_PZ[0], lab1_M[0]));
+      Double_t BsE(kinematics::energy(lab3_PX[0], lab3_PY[0], lab3_PZ[0], lab3_M[0]) +
+		   kinematics::energy(lab4_PX[0], lab4_PY[0], lab4_PZ[0], lab4_M[0]) +
+		   kinematics::energy(lab5_PX[0], lab5_PY[0], lab5_PZ[0], lab5_M[0]) + hE);
+      Double_t BsPx(lab3_PX[0] + lab4_PX[0] + lab5_PX[0] + lab1_PX[0]);
+      Double_t BsPy(lab3_PY[0] + lab4_PY[0] + lab5_PY[0] + lab1_PY[0]);
+      Double_t BsPz(lab3_PZ[0] + lab4_PZ[0] + lab5_PZ[0] + lab1_PZ[0]);
 
-      boost = - BsP.BoostVector();
-      //       DsP.Boost(boost(0), boost(1), boost(2));
-      hP .Boost(boost(0), boost(1), boost(2));
+      // angle to -β
+      Cosoangle = - kinematics::cosThetaStar(BsPx, BsPy, BsPz, BsE,
+					     lab1_PX[0], lab1_PY[0], lab1_PZ[0], hE);
 
-      noangle.Fill(lab0_MM[0], TMath::Cos((hP.Angle(boost))), 0);
+      noangle.Fill(lab0_MM[0], Cosoangle, 0);
     }
 
-  std::cout << "readDataTree::Loop(TNtuple &): Read " << nbytes << " bytes." << std::endl;
+  EndLoop("readDataTree::Loop(TNtuple &)", nentries, nbytes);
 }
 
 
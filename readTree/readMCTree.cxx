@@ -11,15 +11,30 @@
 #include <iostream>
 
 #include "readMCTree.hxx"
+#include "kinematics.hxx"
 
 #include <Rtypes.h>
 #include <TNtuple.h>
 #include <TStyle.h>
 #include <TCanvas.h>
-#include <TLorentzVector.h>
 
 using namespace std;
 
+
+// branches read by the loops, see readTree::ReadBranches(..)
+static const char *const selBranches[] = { // CommonSelection()
+  "lab0_TRUEID", "lab1_TRUEID", "lab2_TRUEID",
+  "lab0_MM", "lab2_MM", "lab1_P", NULL
+};
+
+static const char *const angleBranches[] = { // Loop(TTree&), Loop(TNtuple&)
+  "lab1_PX", "lab1_PY", "lab1_PZ", "lab1_PIDK",
+  "lab3_PX", "lab3_PY", "lab3_PZ", "lab3_M",
+  "lab4_PX", "lab4_PY", "lab4_PZ", "lab4_M",
+  "lab5_PX", "lab5_PY", "lab5_PZ", "lab5_M", NULL
+};
+
+
 readMCTree::readMCTree(TTree *tree)
 {
 // if parameter tree is not specified (or zero), connect the file
@@ -694,10 +709,6 @@ void readMCTree::Loop(TTree &ftree)
 
    Double_t Cosoangle(0.), BsM(0.0);
    // Double_t BsM(0.0), DsM(0.0);
-   TLorentzVector BsP(0,0,0,0), DsP(0,0,0,0), hP(0,0,0,0),
-     Pi3P(0,0,0,0), K4P(0,0,0,0), K5P(0,0,0,0);
-
-   TVector3 boost(0,0,0);
 
    // use BsM instead of lab0_MM to emulate wrong mass hypothesis
    ftree.Branch("Bsmass"  , &BsM);
@@ -706,6 +717,11 @@ void readMCTree::Loop(TTree &ftree)
    ftree.Branch("BsID"    , &lab0_TRUEID);
    ftree.Branch("hID"     , &lab1_TRUEID);
 
+   branchlist branches;
+   AddBranches(AddBranches(branches, selBranches), angleBranches);
+   ReadBranches(fChain, branches);
+   StartLoop();
+
    Long64_t nbytes = 0, nb = 0;
    // for (Long64_t jentry=0; jentry<10000;jentry++) // for testing
    for (Long64_t jentry=0; jentry<nentries;jentry++)
@@ -719,26 +735,24 @@ void readMCTree::Loop(TTree &ftree)
        // if ( lab1_PIDK < 5 ) continue; // off so that you can apply later
        // if ( pPIDcut != 1) continue; // not in TTree,  pPIDcut = (lab5_PIDK - lab5PIDp > 0)
 
-       Pi3P.SetXYZM( lab3_PX, lab3_PY, lab3_PZ, lab3_M);
-       K4P .SetXYZM( lab4_PX, lab4_PY, lab4_PZ, lab4_M);
-       K5P .SetXYZM( lab5_PX, lab5_PY, lab5_PZ, lab5_M);
        // K mass instead of lab1_M to emulate wrong mass hypothesis
-       hP  .SetXYZM( lab1_PX, lab1_PY, lab1_PZ, 493.677);
-
-       DsP = Pi3P + K4P + K5P;
-       BsP = DsP + hP;
+       Double_t hE(kinematics::energy(lab1_PX, lab1_PY, lab1_PZ, 493.677));
+       Double_t BsE(kinematics::energy(lab3_PX, lab3_PY, lab3_PZ, lab3_M) +
+		    kinematics::energy(lab4_PX, lab4_PY, lab4_PZ, lab4_M) +
+		    kinematics::energy(lab5_PX, lab5_PY, lab5_PZ, lab5_M) + hE);
+       Double_t BsPx(lab3_PX + lab4_PX + lab5_PX + lab1_PX);
+       Double_t BsPy(lab3_PY + lab4_PY + lab5_PY + lab1_PY);
+       Double_t BsPz(lab3_PZ + lab4_PZ + lab5_PZ + lab1_PZ);
 
        // DsM = DsP.M();
-       BsM = BsP.M();
-
-       boost = BsP.BoostVector();
-       hP .Boost(-boost(0), -boost(1), -boost(2));
-       Cosoangle = TMath::Cos((hP.Angle(boost)));
+       BsM = kinematics::mass(BsPx, BsPy, BsPz, BsE);
+       Cosoangle = kinematics::cosThetaStar(BsPx, BsPy, BsPz, BsE,
+					    lab1_PX, lab1_PY, lab1_PZ, hE);
 
        ftree.Fill();
      }
 
-   cout << "readMCTree::Loop(TTree&): Read " << nbytes << " bytes." << std::endl;
+   EndLoop("readMCTree::Loop(TTree&)", nentries, nbytes);
 }
 
 
@@ -752,10 +766,11 @@ void readMCTree::Loop(TNtuple &noangle)
 
    Double_t Cosoangle(0.);
    // Double_t BsM(0.0), DsM(0.0);
-   TLorentzVector BsP(0,0,0,0), DsP(0,0,0,0), hP(0,0,0,0),
-     Pi3P(0,0,0,0), K4P(0,0,0,0), K5P(0,0,0,0);
 
-   TVector3 boost(0,0,0);
+   branchlist branches;
+   AddBranches(AddBranches(branches, selBranches), angleBranches);
+   ReadBranches(fChain, branches);
+   StartLoop();
 
    Long64_t nbytes = 0, nb = 0;
    // for (Long64_t jentry=0; jentry<10000;jentry++)
@@ -797,27 +812,25 @@ void readMCTree::Loop(TNtuple &noangle)
 	 mass(π) = 139.57  MeV
 	*/
 
-       Pi3P.SetXYZM( lab3_PX, lab3_PY, lab3_PZ, lab3_M);
-       K4P .SetXYZM( lab4_PX, lab4_PY, lab4_PZ, lab4_M);
-       K5P .SetXYZM( lab5_PX, lab5_PY, lab5_PZ, lab5_M);
        // K mass instead of lab1_M to emulate wrong mass hypothesis
-       hP  .SetXYZM( lab1_PX, lab1_PY, lab1_PZ, 493.677);
-
-       DsP = Pi3P + K4P + K5P;
-       BsP = DsP + hP;
-
-       // DsM = DsP.M();
-       // BsM = BsP.M();
-
-       boost = - BsP.BoostVector();
-       hP .Boost(boost(0), boost(1), boost(2));
-       Cosoangle = TMath::Cos((hP.Angle(boost)));
-
-       // noangle.Fill(lab0_MM, TMath::Cos((hP.Angle(boost))), lab1_TRUEID);
-       noangle.Fill(BsP.M(), Cosoangle, lab1_TRUEID); // correct
+       Double_t hE(kinematics::energy(lab1_PX, lab1_PY, lab1_PZ, 493.677));
+       Double_t BsE(kinematics::energy(lab3_PX, lab3_PY, lab3_PZ, lab3_M) +
+		    kinematics::energy(lab4_PX, lab4_PY, lab4_PZ, lab4_M) +
+		    kinematics::energy(lab5_PX, lab5_PY, lab5_PZ, lab5_M) + hE);
+       Double_t BsPx(lab3_PX + lab4_PX + lab5_PX + lab1_PX);
+       Double_t BsPy(lab3_PY + lab4_PY + lab5_PY + lab1_PY);
+       Double_t BsPz(lab3_PZ + lab4_PZ + lab5_PZ + lab1_PZ);
+
+       // angle to -β
+       Cosoangle = - kinematics::cosThetaStar(BsPx, BsPy, BsPz, BsE,
+					      lab1_PX, lab1_PY, lab1_PZ, hE);
+
+       // noangle.Fill(lab0_MM, Cosoangle, lab1_TRUEID);
+       noangle.Fill(kinematics::mass(BsPx, BsPy, BsPz, BsE), Cosoangle,
+		    lab1_TRUEID); // correct
      }
 
-   cout << "readMCTree::Loop(TNtuple&): Read " << nbytes << " bytes." << std::endl;
+   EndLoop("readMCTree::Loop(TNtuple&)", nentries, nbytes);
 }
 
 
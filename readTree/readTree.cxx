@@ -0,0 +1,89 @@
+/**
+ * @file   readTree.cxx
+ *
+ * @brief  Branch selection, prefetching and timing for the event loops
+ *
+ */
+
+#include <iostream>
+
+#include <boost/format.hpp>
+
+#include <TEnv.h>
+#include <TFile.h>
+#include <TBranch.h>
+
+#include "readTree.hxx"
+
+
+readTree::branchlist& readTree::AddBranches(branchlist &branches,
+					    const char *const names[])
+{
+  for (unsigned i = 0; names[i]; ++i) branches.push_back(names[i]);
+  return branches;
+}
+
+
+TChain* readTree::CopyChain(TTree *tree)
+{
+  TChain *copy = new TChain(tree->GetName(), tree->GetTitle());
+  TChain *chain = dynamic_cast<TChain*>(tree);
+  if (chain) copy->Add(chain);
+  else copy->Add(tree->GetCurrentFile()->GetName());
+  return copy;
+}
+
+
+void readTree::ReadBranches(TTree *tree, const branchlist &branches,
+			    bool prefetch, Long64_t cachesize)
+{
+  if (not tree) return;
+  // open the first file of a chain, so that branches can be found
+  if (tree->LoadTree(0) < 0) return;
+
+  tree->SetBranchStatus("*", 0);
+  for (branchlist::const_iterator itr = branches.begin();
+       itr != branches.end(); ++itr) {
+    if (not tree->GetBranch(itr->c_str())) {
+      std::cout << "readTree::ReadBranches: no branch " << *itr
+		<< ", ignored." << std::endl;
+      continue;
+    }
+    tree->SetBranchStatus(itr->c_str(), 1);
+  }
+
+  // read before the cache is created, chains create it for every file
+  if (prefetch) EnablePrefetching();
+  tree->SetCacheSize(cachesize);
+  for (branchlist::const_iterator itr = branches.begin();
+       itr != branches.end(); ++itr) {
+    if (tree->GetBranch(itr->c_str()))
+      tree->AddBranchToCache(itr->c_str(), kTRUE);
+  }
+  tree->StopCacheLearningPhase();
+}
+
+
+void readTree::EnablePrefetching()
+{
+  gEnv->SetValue("TFile.AsyncPrefetching", 1);
+}
+
+
+void readTree::StartLoop()
+{
+  _filebytes = TFile::GetFileBytesRead();
+  _timer.Start(kTRUE);
+}
+
+
+void readTree::EndLoop(const char *loop, Long64_t nentries, Long64_t nbytes)
+{
+  _timer.Stop();
+  double secs(_timer.RealTime());
+  double filebytes(TFile::GetFileBytesRead() - _filebytes);
+  std::cout << boost::format("%s: Read %d entries, %.1f MB (%.1f MB from "
+			     "files) in %.1f s, %.0f events/s.")
+    % loop % nentries % (nbytes / 1e6) % (filebytes / 1e6) % secs
+    % (secs > 0 ? nentries / secs : 0.) << std::endl;
+}
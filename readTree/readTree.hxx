@@ -1,19 +1,26 @@
+
 #ifndef __READTREE_HXX
 #define __READTREE_HXX
 
+#include <vector>
+#include <string>
+
 #include <TROOT.h>
 #include <TChain.h>
 #include <TNtuple.h>
 #include <TH1D.h>
 #include <TH2D.h>
+#include <TStopwatch.h>
 
 class readTree {
 
 public:
 
+  typedef std::vector<std::string> branchlist;
+
   // constructor & destructor
-  readTree() {}
-  readTree(TTree*) {}
+  readTree() : _filebytes(0) {}
+  readTree(TTree*) : _filebytes(0) {}
   virtual ~readTree() {}
 
   // accessors
@@ -25,6 +32,70 @@ public:
   virtual void  Loop(TTree&) = 0;
   virtual void  Loop(TTree &, TEntryList &, bool mode) = 0;
 
+  /**
+   * Append branch names to a list
+   *
+   * @param branches List of branch names
+   * @param names NULL terminated array of branch names
+   *
+   * @return The list
+   */
+  static branchlist& AddBranches(branchlist &branches, const char *const names[]);
+
+  /**
+   * New chain with the same files as a tree (or chain)
+   *
+   * A reader on the new chain can read entries independently, e.g. in
+   * another thread.  Entry numbers are the same in both.
+   *
+   * @param tree Tree or chain to copy
+   *
+   * @return New chain, owned by the caller
+   */
+  static TChain* CopyChain(TTree *tree);
+
+protected:
+
+  /**
+   * Read only the given branches of a tree (or chain)
+   *
+   * All other branches are disabled, so GetEntry(..) decodes only the
+   * given branches.  The tree cache is sized for, and primed with,
+   * these branches (no learning phase), and baskets are prefetched
+   * asynchronously.  Call before the event loop.
+   *
+   * @param tree Tree read by the loop
+   * @param branches Branches read by the loop
+   * @param prefetch Enable prefetching (see EnablePrefetching()); pass
+   *                 false from threads, after enabling it beforehand
+   * @param cachesize Size of the tree cache in bytes
+   */
+  void ReadBranches(TTree *tree, const branchlist &branches,
+		    bool prefetch=true, Long64_t cachesize=30000000);
+
+  /**
+   * Enable asynchronous prefetching for tree caches created from here
+   * on.  This sets a global (gEnv), call it from the main thread.
+   */
+  static void EnablePrefetching();
+
+  /// Start timing a loop, count bytes read from here on
+  void StartLoop();
+
+  /**
+   * Print bytes read and events per second since StartLoop()
+   *
+   * @param loop Name of the loop
+   * @param nentries Number of entries read
+   * @param nbytes Bytes returned by GetEntry(..)
+   */
+  void EndLoop(const char *loop, Long64_t nentries, Long64_t nbytes);
+
+private:
+
+  TStopwatch _timer;		//! timer for the current loop
+  Long64_t   _filebytes;	//! bytes read from files before the loop
+
 };
 
 #endif // __READTREE_HXX
@@ -9,5 +9,8 @@
 #pragma link C++ class readMCTree;
 #pragma link C++ class readDataTree;
 #pragma link C++ class lifetime;
+#pragma link C++ class weightTable;
+#pragma link C++ class kinematics;
+#pragma link C++ class std::vector<weightTable>;
 
 #endif
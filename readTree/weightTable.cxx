@@ -0,0 +1,107 @@
+/**
+ * @file   weightTable.cxx
+ *
+ * @brief  Flat lookup tables of histogram bin contents
+ *
+ */
+
+#include <algorithm>
+#include <stdexcept>
+
+#include <TAxis.h>
+
+#include "weightTable.hxx"
+
+
+weightTable::weightTable(const std::vector<TH1*> &hists) :
+  _ndim(0), _nvalues(0)
+{
+  Snapshot(hists);
+}
+
+
+weightTable::weightTable(const TH1 &hist) : _ndim(0), _nvalues(0)
+{
+  Snapshot(std::vector<TH1*>(1, const_cast<TH1*>(&hist)));
+}
+
+
+void weightTable::axis::Set(const TAxis &ax)
+{
+  nbins = ax.GetNbins();
+  xmin = ax.GetXmin();
+  xmax = ax.GetXmax();
+  uniform = ax.GetXbins()->GetSize() == 0;
+  edges.resize(nbins + 1);
+  for (unsigned i = 0; i <= nbins; ++i) edges[i] = ax.GetBinLowEdge(i + 1);
+}
+
+
+unsigned weightTable::axis::FindBin(double x) const
+{
+  // as TAxis::FindBin, NaN goes to the overflow
+  if (x < xmin) return 0;
+  if (not (x < xmax)) return nbins + 1;
+  if (uniform) {
+    unsigned bin(1 + unsigned(nbins * (x - xmin) / (xmax - xmin)));
+    return std::min(bin, nbins);
+  }
+  return std::upper_bound(edges.begin(), edges.end(), x) - edges.begin();
+}
+
+
+void weightTable::Snapshot(const std::vector<TH1*> &hists)
+{
+  if (hists.empty() or not hists[0])
+    throw std::invalid_argument("weightTable: no histograms");
+  const TH1 &first(*hists[0]);
+  _ndim = first.GetDimension();
+  if (_ndim > 2)
+    throw std::invalid_argument("weightTable: only 1-D and 2-D histograms");
+  _nvalues = hists.size();
+  _xaxis.Set(*first.GetXaxis());
+  if (_ndim > 1) _yaxis.Set(*first.GetYaxis());
+
+  unsigned nx(_xaxis.nbins + 2), ny(_ndim > 1 ? _yaxis.nbins + 2 : 1);
+  _contents.resize(nx * ny * _nvalues);
+  for (unsigned k = 0; k < _nvalues; ++k) {
+    const TH1 &hist(*hists[k]);
+    if (unsigned(hist.GetDimension()) != _ndim or
+	unsigned(hist.GetNbinsX()) != _xaxis.nbins or
+	(_ndim > 1 and unsigned(hist.GetNbinsY()) != _yaxis.nbins))
+      throw std::invalid_argument("weightTable: histograms with different "
+				  "binning");
+    // global bins (x + nx * y) as in TH1::GetBin
+    for (unsigned bin = 0; bin < nx * ny; ++bin)
+      _contents[bin * _nvalues + k] = hist.GetBinContent(bin);
+  }
+}
+
+
+const double* weightTable::Values(double x, double y) const
+{
+  unsigned bin(_xaxis.FindBin(x));
+  if (_ndim > 1) bin += (_xaxis.nbins + 2) * _yaxis.FindBin(y);
+  return &_contents[bin * _nvalues];
+}
+
+
+void weightTable::Lookup(double x, double y, double *out) const
+{
+  const double *values(Values(x, y));
+  std::copy(values, values + _nvalues, out);
+}
+
+
+double weightTable::Lookup(double x, double y) const
+{
+  return *Values(x, y);
+}
+
+
+void weightTable::LookupBatch(unsigned n, const double *x, const double *y,
+			      double *out) const
+{
+  for (unsigned i = 0; i < n; ++i, out += _nvalues)
+    Lookup(x[i], _ndim > 1 ? y[i] : 0., out);
+}
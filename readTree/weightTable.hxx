@@ -0,0 +1,97 @@
+/**
+ * @file   weightTable.hxx
+ *
+ * @brief  Flat lookup tables of histogram bin contents
+ *
+ */
+
+#ifndef __WEIGHTTABLE_HXX
+#define __WEIGHTTABLE_HXX
+
+#include <vector>
+
+#include <TH1.h>
+
+
+/**
+ * Bin contents of one or more histograms, with the same binning
+ *
+ * The contents (including under and overflow) and bin edges of 1-D or
+ * 2-D histograms are copied into flat arrays, the contents of all
+ * histograms of a bin next to each other, so one lookup returns the
+ * values of all histograms.  Bins are found as in TAxis::FindBin: by
+ * arithmetic for uniform axes, and by binary search for variable ones.
+ *
+ * Tables are copies, so they do not depend on the histograms after
+ * construction, and lookups are const (safe to share between threads).
+ */
+class weightTable {
+
+public:
+
+  weightTable() : _ndim(0), _nvalues(0) {}
+
+  /**
+   * Snapshot histograms with identical binning
+   *
+   * @param hists 1-D or 2-D histograms
+   */
+  weightTable(const std::vector<TH1*> &hists);
+
+  /// Snapshot a single histogram
+  weightTable(const TH1 &hist);
+
+  /// Dimension of the histograms (0: empty table)
+  unsigned GetDimension() const { return _ndim; }
+
+  /// Number of values (histograms) per bin
+  unsigned GetNvalues() const { return _nvalues; }
+
+  /**
+   * Values of all histograms at (x, y)
+   *
+   * @param x First coordinate
+   * @param y Second coordinate (ignored for 1-D tables)
+   * @param out Values, GetNvalues() of them
+   */
+  void Lookup(double x, double y, double *out) const;
+
+  /// Value of the first histogram at (x, y)
+  double Lookup(double x, double y=0.) const;
+
+  /**
+   * Values at n points
+   *
+   * @param n Number of points
+   * @param x First coordinates
+   * @param y Second coordinates (unused, can be NULL, for 1-D tables)
+   * @param out Values, n * GetNvalues() (point major)
+   */
+  void LookupBatch(unsigned n, const double *x, const double *y,
+		   double *out) const;
+
+private:
+
+  /// Bin edges of an axis, bins are numbered as in TAxis
+  struct axis {
+    std::vector<double> edges;
+    unsigned nbins;
+    bool uniform;
+    double xmin, xmax;
+
+    void Set(const TAxis &ax);
+    unsigned FindBin(double x) const;
+  };
+
+  void Snapshot(const std::vector<TH1*> &hists);
+
+  /// First value of the global bin (as in TH1::GetBin)
+  const double* Values(double x, double y) const;
+
+  unsigned _ndim, _nvalues;
+  axis _xaxis, _yaxis;
+  std::vector<double> _contents;
+
+};
+
+#endif // __WEIGHTTABLE_HXX
@@ -4,6 +4,7 @@
 #include <TTree.h>
 #include <TStyle.h>
 #include <TFile.h>
+#include <TSystem.h>
 #include <TH2D.h>
 #include <TCanvas.h>
 #include <TPad.h>
@@ -132,22 +133,23 @@ int PIDperf(TString opt)
 
   for (int i(0); i < entries; ++i) {
     ftree->GetEntry(i);
-    // if ( oPID.GetoangleDLL(i,j) == 0 ) continue;
-    TotDLL->Fill(oPID.GetoangleDLL( mass, coso));
+    double dll(oPID.GetoangleDLL( mass, coso));
+    // if ( dll == 0 ) continue;
+    TotDLL->Fill(dll);
     TotDLL3->Fill(pidK);
     if (fabs(hID) == 321) {	// K
-      DsKDLL ->Fill(oPID.GetoangleDLL( mass, coso));
+      DsKDLL ->Fill(dll);
       DsKDLL3->Fill(pidK);
     }
     if (fabs(hID) == 211) {	// pi
-      DspiDLL ->Fill(oPID.GetoangleDLL( mass, coso));
+      DspiDLL ->Fill(dll);
       DspiDLL3->Fill(pidK);
     }
     // after RICH PID
     if (pidK > 5) {
-      TotDLL2->Fill(oPID.GetoangleDLL( mass, coso));
-      if (fabs(hID) == 321) DsKDLL2 ->Fill(oPID.GetoangleDLL( mass, coso));
-      if (fabs(hID) == 211) DspiDLL2->Fill(oPID.GetoangleDLL( mass, coso));
+      TotDLL2->Fill(dll);
+      if (fabs(hID) == 321) DsKDLL2 ->Fill(dll);
+      if (fabs(hID) == 211) DspiDLL2->Fill(dll);
     }
   }
 
@@ -280,14 +282,20 @@ int PIDperf(TString opt)
 }
 
 
-oanglePID init_oanglePID()
+oanglePID init_oanglePID(const char *table)
 {
+  // DLL table saved by an earlier job, templates.root is not needed
+  if (not gSystem->AccessPathName(table)) return oanglePID(string(table));
+
   TFile *fhisto = new TFile( "templates.root", "read");
 
   TH2D *hDsK  = dynamic_cast<TH2D*> (fhisto->Get("hDsK" )->Clone());
   TH2D *hDspi = dynamic_cast<TH2D*> (fhisto->Get("hDspi")->Clone());
 
-  return oanglePID(hDsK, hDspi);
+  oanglePID oPID(hDsK, hDspi);
+  if (not oPID.Save(table))
+    cout << "init_oanglePID(): could not save DLL table " << table << endl;
+  return oPID;
 }
 
 
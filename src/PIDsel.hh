@@ -12,7 +12,7 @@ int PIDsel();
 
 int PIDperf(TString);
 
-oanglePID init_oanglePID();
+oanglePID init_oanglePID(const char *table="templates.dll");
 
 int test_oanglePID();
 
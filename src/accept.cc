@@ -4,6 +4,7 @@
 #include <cassert>
 #include <string>
 #include <vector>
+#include <thread>
 
 #include <TChain.h>
 #include <TCanvas.h>
@@ -35,6 +36,7 @@ int main()
 		       "../ntuples/MC/MC11a_AfterOfflineSel/MergedTree_Bs2DsPi_*BsHypo_BDTG.root/DecayTree");
       TChain * MCChain = initChain("DecayTree", tuplename);
       lifetime MCsample(MCChain);
+      MCsample.SetThreads(std::thread::hardware_concurrency());
       selAccTree(MCsample, ftree, felist, DsK); // remember to delete ftree and felist
     } else {
       ftree  = (TTree*)      rfile.Get("ftree");
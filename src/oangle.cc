@@ -23,6 +23,7 @@
 #include <TCanvas.h>
 
 #include "oangle.hh"
+#include "oanglePID.hxx"
 
 #include "readDataTree.hxx"
 #include "readMCTree.hxx"
@@ -268,6 +269,9 @@ int makeTemplates(TTree &noangle)
   hDspi.Draw("COLZ");
   hDspi.Write();
 
+  // keep the DLL table used by init_oanglePID() in sync
+  oanglePID(&hDsK, &hDspi).Save("templates.dll");
+
   fhisto.Close();
   return 0;
 }
@@ -2,7 +2,11 @@
 #define __OANGLEPID_HXX
 
 #include <string>
+#include <vector>
 #include <limits>
+#include <fstream>
+#include <iostream>
+#include <stdexcept>
 
 #include <TMath.h>
 #include <TH2D.h>
@@ -15,24 +19,43 @@ public:
   /**
    * Constructor for kinematic variable based PID
    *
+   * The DLL of every (global) bin, including under and overflows, is
+   * computed once here; lookups do not use the histograms.
+   *
    * @param dsk Pointer to DsK histogram
-   * @param dspi Pointer to Dspi histogram
+   * @param dspi Pointer to Dspi histogram (same binning)
    */
-  oanglePID(TH2D* dsk, TH2D* dspi) : hDsK(dsk), hDspi(dspi) {}
-
-  oanglePID(const oanglePID& other) : hDsK(other.hDsK), hDspi(other.hDspi) {}
+  oanglePID(TH2D* dsk, TH2D* dspi) : hDsK(dsk), hDspi(dspi) {
+    const TAxis *xaxis(dsk->GetXaxis()), *yaxis(dsk->GetYaxis());
+    if (xaxis->GetXbins()->GetSize() or yaxis->GetXbins()->GetSize())
+      throw std::invalid_argument("oanglePID: variable binning not supported");
+    _nx = xaxis->GetNbins();
+    _ny = yaxis->GetNbins();
+    _xmin = xaxis->GetXmin();
+    _xmax = xaxis->GetXmax();
+    _ymin = yaxis->GetXmin();
+    _ymax = yaxis->GetXmax();
+    _dll.resize((_nx + 2) * (_ny + 2));
+    for (unsigned gBin = 0; gBin < _dll.size(); ++gBin) {
+      // normalise the bin content before getting the DLL
+      double pDsK ((hDsK ->GetBinContent(gBin) + numeric_limits<double>::epsilon()));
+      double pDspi((hDspi->GetBinContent(gBin) + numeric_limits<double>::epsilon()));
+      _dll[gBin] = DLL( pDsK, pDspi );
+    }
+  }
 
-  // // FIXME: Do not use, doesn't work. Histograms go out of scope and segfaults later
-  // oanglePID(string sDsK="hDsK", string sDspi="hDspi", string fname="histos.root") {}
+  /**
+   * Constructor from a DLL table saved with Save(..)
+   *
+   * @param fname Table file name
+   */
+  explicit oanglePID(const string &fname) : hDsK(NULL), hDspi(NULL) {
+    if (not Load(fname))
+      throw std::runtime_error("oanglePID: cannot read table " + fname);
+  }
 
   ~oanglePID() {}
 
-  oanglePID& operator=(const oanglePID& other) {
-    if (&other == this) return *this;
-    hDsK  = other.hDsK;
-    hDspi = other.hDspi;
-  }
-
   /**
    * Return PID delta log likelihood based on kinematics variables for
    * DsK and Dspi events.
@@ -43,11 +66,10 @@ public:
    * @return delta log likelihood (DLL = ln[pDsK/pDspi])
    */
   double GetoangleDLL(double Bsmass, double oangleCosine) const {
-    // same binning for DsK and Dspi
-    return GetoangleDLL( hDsK->FindBin( Bsmass, oangleCosine) );
+    return _dll[FindBin(Bsmass, oangleCosine)];
   }
 
-  /** 
+  /**
    * Return PID delta log likelihood based on kinematics variables for
    * DsK and Dspi events.
    *
@@ -55,14 +77,36 @@ public:
    *
    * @return delta log likelihood (DLL = ln[pDsK/pDspi])
    */
-  double GetoangleDLL(int gBin) const { // same binning for DsK and Dspi
-    // normalise the bin content before getting the DLL
-    double pDsK ((hDsK ->GetBinContent(gBin) + numeric_limits<double>::epsilon()));
-    double pDspi((hDspi->GetBinContent(gBin) + numeric_limits<double>::epsilon()));
-    return DLL( pDsK, pDspi );
+  double GetoangleDLL(int gBin) const { return _dll[gBin]; }
+
+  /**
+   * Delta log likelihoods for n candidates
+   *
+   * @param Bsmass Bs masses
+   * @param oangleCosine Cosines of the opening angle
+   * @param dll Delta log likelihoods (output)
+   * @param n Number of candidates
+   */
+  void GetoangleDLL(const double *Bsmass, const double *oangleCosine,
+		    double *dll, unsigned n) const {
+    for (unsigned i = 0; i < n; ++i)
+      dll[i] = _dll[FindBin(Bsmass[i], oangleCosine[i])];
   }
 
-  /** 
+  /**
+   * Global bin number, as TH2::FindBin for the templates
+   *
+   * @param Bsmass Bs mass
+   * @param oangleCosine Cosine of the opening angle
+   *
+   * @return Global bin number
+   */
+  unsigned FindBin(double Bsmass, double oangleCosine) const {
+    return FindBin(Bsmass, _nx, _xmin, _xmax)
+      + (_nx + 2) * FindBin(oangleCosine, _ny, _ymin, _ymax);
+  }
+
+  /**
    * Return delta log likelihood for given numerator and denominator.
    *
    * @param num numerator
@@ -72,21 +116,100 @@ public:
    */
   static double DLL(double num, double denom) { return TMath::Log(num/denom); }
 
-  /** 
+  /**
+   * Save the DLL table in a binary file
+   *
+   * Format: "oPID", binning (nx, ny: uint32; xmin, xmax, ymin, ymax:
+   * double), then (nx+2)*(ny+2) DLLs (double) in global bin order.
+   *
+   * @param fname File name
+   *
+   * @return Success
+   */
+  bool Save(const string &fname) const {
+    std::ofstream out(fname.c_str(), std::ios::binary);
+    UInt_t nbins[2] = {_nx, _ny};
+    double range[4] = {_xmin, _xmax, _ymin, _ymax};
+    out.write(magic(), 4);
+    out.write(reinterpret_cast<const char*>(nbins), sizeof(nbins));
+    out.write(reinterpret_cast<const char*>(range), sizeof(range));
+    out.write(reinterpret_cast<const char*>(&_dll[0]),
+	      _dll.size() * sizeof(double));
+    return out.good();
+  }
+
+  /**
+   * Load a DLL table saved with Save(..)
+   *
+   * @param fname File name
+   *
+   * @return Success, the table is unchanged on failure
+   */
+  bool Load(const string &fname) {
+    std::ifstream in(fname.c_str(), std::ios::binary);
+    char sig[4] = {0, 0, 0, 0};
+    UInt_t nbins[2] = {0, 0};
+    double range[4];
+    in.read(sig, 4);
+    in.read(reinterpret_cast<char*>(nbins), sizeof(nbins));
+    in.read(reinterpret_cast<char*>(range), sizeof(range));
+    if (not in or string(sig, 4) != magic()) {
+      cout << "Error oanglePID::Load(): " << fname
+	   << " is not a DLL table." << endl;
+      return false;
+    }
+    std::vector<double> dll((nbins[0] + 2) * (nbins[1] + 2));
+    in.read(reinterpret_cast<char*>(&dll[0]), dll.size() * sizeof(double));
+    if (not in) {
+      cout << "Error oanglePID::Load(): " << fname << " is truncated." << endl;
+      return false;
+    }
+    _nx = nbins[0];
+    _ny = nbins[1];
+    _xmin = range[0];
+    _xmax = range[1];
+    _ymin = range[2];
+    _ymax = range[3];
+    _dll.swap(dll);
+    return true;
+  }
+
+  /**
    * Print reference histograms.
    *
    * @param opt Print options for TH2::Print()
    */
   void   PrintHistos (const char* opt="") const {
+    if (not hDsK) {
+      cout << "oanglePID::PrintHistos(): table loaded from file, "
+	   << "no histograms." << endl;
+      return;
+    }
     hDsK ->Print(opt);
     hDspi->Print(opt);
   }
 
 private:
 
+  /// Bin number on a uniform axis, as TAxis::FindBin
+  static unsigned FindBin(double x, unsigned nbins, double xmin, double xmax) {
+    if (x < xmin) return 0;
+    if (not (x < xmax)) return nbins + 1;
+    unsigned bin(1 + unsigned(nbins * (x - xmin) / (xmax - xmin)));
+    return bin > nbins ? nbins : bin;
+  }
+
+  /// File signature of saved tables
+  static const char* magic() { return "oPID"; }
+
   TH2D  *hDsK;                  /**< Normalised 2-D DsK histogram */
   TH2D  *hDspi;                 /**< Normalised 2-D Dspi histogram */
 
+  unsigned _nx, _ny;            /**< Number of bins: Bs mass, cosine */
+  double _xmin, _xmax;          /**< Bs mass range */
+  double _ymin, _ymax;          /**< Cosine range */
+  std::vector<double> _dll;     /**< DLL per global bin */
+
 };
 
 #endif	// __OANGLEPID_HXX
@@ -13,6 +13,8 @@ parser.add_argument('-s', '--session', default='chitra_tune_sw2',
                     help='Session name')
 parser.add_argument('-c', dest='conf', default='tmva/TMVA.conf',
                     help='TMVA config file')
+parser.add_argument('--cache', default='tmva/.cache/skims',
+                    help='Directory for cached selected samples')
 parser.add_argument('--vars', nargs='+', help='Variables to plot')
 parser.add_argument('--marks', nargs='+', type=float,
                     help='Marker positions along plot axis')
@@ -41,21 +43,21 @@ if options.ntuple in ['sig', 'sdata']:
     infile = session.sig_file
 elif options.ntuple in ['bkg', 'data']:
     infile = session.bkg_file
-tree = ROOT.TChain('MyChain')
-map(lambda f: tree.Add(f), infile)
-
-if not tree:
-    sys.exit('Unable to read input trees.')
-
-from rplot.tselect import Tsplice
-splice = Tsplice(tree)
 if options.ntuple.find('data') >= 0:
-    cut = ROOT.TCut(session.cut_both)
+    cut = session.cut_both
 elif 'sig' == options.ntuple:
-    cut = ROOT.TCut(session.cut_sig)
+    cut = session.cut_sig
 elif 'bkg' == options.ntuple:
-    cut = ROOT.TCut(session.cut_bkg)
-splice.make_splice(options.ntuple, cut)
+    cut = session.cut_bkg
+
+# selected entries, shared with training (see tmva/train.py)
+from tmva.utils import cacheskim
+try:
+    skim, nentries = cacheskim(infile, cut, cachedir=options.cache)
+except IOError as err:
+    sys.exit('Unable to read input trees: {}'.format(err))
+rfile = ROOT.TFile.Open(skim, 'read')
+tree = rfile.Get('skim')
 
 # disable fluff
 ROOT.gStyle.SetOptTitle(0)
@@ -0,0 +1,182 @@
+/**
+ * @file   BatchApply.hxx
+ * @author Suvayu Ali <Suvayu.Ali@cern.ch>
+ *
+ * @brief  Apply TMVA classifiers to a tree in chunks of events.
+ *
+ *         The input variables of a chunk are evaluated into a
+ *         contiguous array, all booked methods are evaluated over the
+ *         whole chunk, and then the output tree and the classifier
+ *         histograms are filled in bulk.  The output is identical to
+ *         evaluating event by event.
+ *
+ *         Meant to be loaded from Python (see apply.py):
+ *
+ *           ROOT.gROOT.ProcessLine('#include "BatchApply.hxx"')
+ *
+ */
+
+#ifndef __BATCHAPPLY_HXX
+#define __BATCHAPPLY_HXX
+
+#include <deque>
+#include <vector>
+#include <string>
+#include <algorithm>
+
+#include <TTree.h>
+#include <TTreeFormula.h>
+#include <TH1.h>
+#include <TMVA/Reader.h>
+
+
+class BatchApply {
+public:
+
+  BatchApply(TMVA::Reader& reader, TTree& itree, TTree& otree,
+	     Long64_t chunk=10000) :
+    _reader(reader), _itree(itree), _otree(otree), _chunk(chunk),
+    _treenumber(-1)
+  {}
+
+  ~BatchApply()
+  {
+    for (unsigned i = 0; i < _formulae.size(); ++i) delete _formulae[i];
+  }
+
+  /**
+   * Add variable (or spectator) to the reader, evaluated from the
+   * input tree with the formula `expr'.
+   *
+   * @param var Variable as passed to TMVA (e.g. var:=var1+var2)
+   * @param name Variable name (e.g. var)
+   * @param expr Formula to evaluate (e.g. var1+var2)
+   * @param spectator Add as spectator
+   */
+  void AddVariable(const char* var, const char* name, const char* expr,
+		   bool spectator=false)
+  {
+    _names.push_back(name);
+    _formulae.push_back(new TTreeFormula(name, expr, &_itree));
+    _vars.push_back(0.);	// deque: address stays valid
+    if (spectator) _reader.AddSpectator(var, &_vars.back());
+    else _reader.AddVariable(var, &_vars.back());
+  }
+
+  /**
+   * Add branch for variable `name' to the output tree.
+   *
+   * @param name Variable name
+   */
+  void AddBranch(const char* name)
+  {
+    unsigned idx = std::find(_names.begin(), _names.end(), name)
+      - _names.begin();
+    if (idx == _names.size()) return;
+    _otree.Branch(name, &_vars[idx], Form("%s/F", name));
+  }
+
+  /**
+   * Book method, and add its response to the output tree.
+   *
+   * @param method Method name
+   * @param weightfile Weight file
+   * @param hist Histogram for the method response
+   */
+  void BookMVA(const char* method, const char* weightfile, TH1& hist)
+  {
+    _reader.BookMVA(method, weightfile);
+    _methods.push_back(method);
+    _hists.push_back(&hist);
+    _resps.push_back(0.);
+    _otree.Branch(method, &_resps.back(), Form("%s/F", method));
+  }
+
+  /**
+   * Process entries in chunks.
+   *
+   * @param first First entry
+   * @param nentries Number of entries (all when negative)
+   *
+   * @return Number of processed entries
+   */
+  Long64_t Process(Long64_t first=0, Long64_t nentries=-1)
+  {
+    Long64_t last(_itree.GetEntries());
+    if (nentries >= 0) last = std::min(last, first + nentries);
+    if (first >= last) return 0;
+
+    const unsigned nvars(_vars.size()), nmethods(_methods.size());
+    std::vector<Float_t> inputs(_chunk * nvars), resps(_chunk * nmethods);
+    std::vector<Double_t> hbuf(_chunk);
+
+    for (Long64_t begin = first, nevts = 0; begin < last; begin += nevts) {
+      nevts = std::min(_chunk, last - begin);
+      // do not cross tree boundaries in a chain, so that the entries
+      // are not loaded from two different files alternately
+      Long64_t local(_itree.LoadTree(begin));
+      if (local >= 0)
+	nevts = std::min(nevts, _itree.GetTree()->GetEntries() - local);
+
+      // read chunk of input variables: the formulae read only the
+      // branches they use, the full entry is read once, for the
+      // output tree
+      for (Long64_t i = 0; i < nevts; ++i) {
+	LoadEntry(begin + i);
+	for (unsigned v = 0; v < nvars; ++v) {
+	  _formulae[v]->GetNdata();
+	  inputs[i*nvars + v] = _formulae[v]->EvalInstance();
+	}
+      }
+
+      // evaluate all methods over the chunk
+      for (Long64_t i = 0; i < nevts; ++i) {
+	std::copy(&inputs[i*nvars], &inputs[i*nvars] + nvars, _vars.begin());
+	for (unsigned m = 0; m < nmethods; ++m)
+	  resps[m*_chunk + i] = _reader.EvaluateMVA(_methods[m]);
+      }
+
+      // write output tree and histograms
+      for (Long64_t i = 0; i < nevts; ++i) {
+	_itree.GetEntry(begin + i);
+	std::copy(&inputs[i*nvars], &inputs[i*nvars] + nvars, _vars.begin());
+	for (unsigned m = 0; m < nmethods; ++m) _resps[m] = resps[m*_chunk + i];
+	_otree.Fill();
+      }
+      for (unsigned m = 0; m < nmethods; ++m) {
+	std::copy(&resps[m*_chunk], &resps[m*_chunk] + nevts, hbuf.begin());
+	_hists[m]->FillN(nevts, &hbuf[0], 0);
+      }
+    }
+    return last - first;
+  }
+
+private:
+
+  /// Load entry (no branches are read), and update formulae when the
+  /// tree changes (chains)
+  void LoadEntry(Long64_t entry)
+  {
+    _itree.LoadTree(entry);
+    if (_itree.GetTreeNumber() != _treenumber) {
+      _treenumber = _itree.GetTreeNumber();
+      for (unsigned v = 0; v < _formulae.size(); ++v)
+	_formulae[v]->UpdateFormulaLeaves();
+    }
+  }
+
+  TMVA::Reader& _reader;
+  TTree& _itree;
+  TTree& _otree;
+  Long64_t _chunk;
+  Int_t _treenumber;
+
+  std::vector<std::string> _names;
+  std::vector<TTreeFormula*> _formulae;
+  std::deque<Float_t> _vars;
+  std::vector<std::string> _methods;
+  std::vector<TH1*> _hists;
+  std::deque<Float_t> _resps;
+};
+
+#endif	// __BATCHAPPLY_HXX
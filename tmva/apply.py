@@ -1,22 +1,91 @@
 #!/usr/bin/env python
 # coding=utf-8
-"""Apply trained MVA"""
+"""Apply trained MVA
+
+Input files are chained.  With --jobs N, the entries are split into N
+contiguous ranges, each applied by a separate process (with its own
+TMVA::Reader).  The partial outputs are then merged in order, so the
+output is the same as running in one process.
+
+"""
 
 import argparse
 from rplot.utils import RawArgDefaultFormatter
 
 optparser = argparse.ArgumentParser(formatter_class=RawArgDefaultFormatter,
                                     description=__doc__)
-optparser.add_argument('filename', help='Input ROOT file')
+optparser.add_argument('filenames', nargs='+', help='Input ROOT files')
 optparser.add_argument('-s', '--session', required=True, help='Session name')
 optparser.add_argument('-o', '--out', required=True, help='Output ROOT file')
 optparser.add_argument('-n', '--name', required=True, help='Input tree name')
+optparser.add_argument('-c', '--chunk', type=int, default=10000,
+                       help='Number of events processed in one batch')
+optparser.add_argument('-j', '--jobs', type=int, default=1,
+                       help='Number of parallel processes')
+# internal: entry range (first, number) processed by one job
+optparser.add_argument('--entries', nargs=2, type=int,
+                       help=argparse.SUPPRESS)
 options = optparser.parse_args()
 
 import sys
 import os
-if not os.path.exists(options.filename):
-    sys.exit('File not found: {}'.format(options.filename))
+for filename in options.filenames:
+    if not os.path.exists(filename):
+        sys.exit('File not found: {}'.format(filename))
+
+from fixes import ROOT
+ROOT.gROOT.SetBatch(True)
+
+# input tree
+itree = ROOT.TChain(options.name)
+for filename in options.filenames:
+    itree.Add(filename)
+nentries = itree.GetEntries()
+
+from time import time
+
+
+def progress(done, total, start, prefix=''):
+    """Print progress and throughput"""
+    elapsed = time() - start
+    rate = done / elapsed if elapsed > 0 else 0.
+    print '{}Processed {}/{} ({:.0f} evts/s, {:.0f}s)'.format(
+        prefix, done, total, rate, elapsed)
+    sys.stdout.flush()
+
+# fewer entries than jobs (e.g. empty input): not worth sharding, and
+# with no entries there would be no partial outputs to merge
+if options.jobs > 1 and not options.entries and nentries >= options.jobs:
+    import subprocess
+    start = time()
+    nshard = max(1, -(-nentries // options.jobs))  # ceiling
+    basename, ext = os.path.splitext(options.out)
+    parts, jobs = [], []
+    for i, first in enumerate(xrange(0, nentries, nshard)):
+        parts.append('{}_part{}{}'.format(basename, i, ext))
+        cmd = [sys.executable, os.path.abspath(__file__)] + options.filenames
+        cmd += ['-s', options.session, '-o', parts[-1], '-n', options.name,
+                '-c', str(options.chunk),
+                '--entries', str(first), str(min(nshard, nentries - first))]
+        jobs.append(subprocess.Popen(cmd))
+    print '::: Started {} jobs for {} entries'.format(len(jobs), nentries)
+    failed = [part for part, job in zip(parts, jobs) if job.wait() != 0]
+    if failed:
+        sys.exit('Jobs failed, partial outputs: {}'.format(failed))
+
+    # merge partial outputs in order: trees are concatenated,
+    # histograms are added
+    merger = ROOT.TFileMerger(False)
+    merger.OutputFile(options.out, 'recreate')
+    for part in parts:
+        merger.AddFile(part)
+    if not merger.Merge():
+        sys.exit('Merging failed, partial outputs: {}'.format(parts))
+    for part in parts:
+        os.remove(part)
+    progress(nentries, nentries, start,
+             '::: Merged {} jobs: '.format(len(jobs)))
+    sys.exit(0)
 
 from tmvaconfig import ConfigFile
 conf = ConfigFile('TMVA.conf')
@@ -27,82 +96,69 @@ print '::: Applying {} MVAs: {}\n{}'.format(len(session.methods),
 print session
 print ':::'
 
-from fixes import ROOT
-ROOT.gROOT.SetBatch(True)
-
 # instantiate TMVA
 ROOT.TMVA.Tools.Instance()
 # reader
 reader = ROOT.TMVA.Reader('!Color:!Silent')
 
 # files
-ifile = ROOT.TFile.Open(options.filename, 'read')
 ofile = ROOT.TFile.Open(options.out, 'recreate')
 
-from ROOT import TTreeFormula, TH1D
-from array import array
-# NOTE: This is to ignore a warning from the call to
-# TTreeFormula::EvalInstance().  One of the default arguments is a
-# char**.  PyROOT does not provide converters for that, leading to the
-# warning.  As long as this feature is not accessed, ignoring is safe.
-import warnings
-warnings.filterwarnings(action='ignore', category=RuntimeWarning,
-                        message='creating converter for unknown type.*')
+from ROOT import TH1D
+# batch application: per event loop is in C++, see BatchApply.hxx
+ROOT.gROOT.ProcessLine('#include "{}/BatchApply.hxx"'.format(
+    os.path.dirname(os.path.abspath(__file__))))
 
 
-def add_var_set_br_addr(varlist, reader_method, intree, allvars):
-    """Add variables to TMVA::Reader, and associate to tree branch"""
-    for var in varlist:
-        expr = var.split(':=', 1)  # split var:=var1+var2 -> (var, var1+var2)
-        simple = (len(expr) == 1)  # if simple, (var,)
-        if simple:
-            expr = expr * 2        # expr same as key: (var,) -> (var, var)
-        allvars[expr[0]] = [
-            array('f', [0.]),      # array for TMVA::Reader
-            TTreeFormula(expr[0], expr[1], intree)
-        ]
-        reader_method(var, allvars[expr[0]][0])
+from formula import parse_var
 
-# input tree
-itree = ifile.Get(options.name)
-allvars = {}                    # {varname: (value, expr)}
-# training variables
-add_var_set_br_addr(session.all_vars(), reader.AddVariable, itree, allvars)
-# spectators
-add_var_set_br_addr(session.spectators, reader.AddSpectator, itree, allvars)
+
+def add_var_set_br_addr(varlist, batch, allvars, spectator=False):
+    """Add variables to TMVA::Reader, and associate to tree formula"""
+    for var in varlist:
+        name, expr = parse_var(var)  # var:=var1+var2 -> (var, var1+var2)
+        # anything TTreeFormula accepts (aliases, x[0], hMom.Pt(), ..)
+        if not ROOT.TTreeFormula(name, expr, itree).GetNdim():
+            sys.exit('Invalid expression for {}: {}'.format(var, expr))
+        allvars[name] = expr
+        batch.AddVariable(var, name, expr, spectator)
 
 # output tree
 ofile.cd()
 otree = itree.CloneTree(0)
+
+batch = ROOT.BatchApply(reader, itree, otree, options.chunk)
+allvars = {}                    # {varname: expr}
+# training variables
+add_var_set_br_addr(session.all_vars(), batch, allvars)
+# spectators
+add_var_set_br_addr(session.spectators, batch, allvars, True)
+
 # FIXME: I think the following two lines are redundant
-for var, val in allvars.iteritems():  # var, val = varname, (value, expr)
-    otree.Branch(var, val[0], '{}/F'.format(var))
+for var in allvars:
+    batch.AddBranch(var)
 
 # book methods
-discriminant = {}               # {MVA: (value, histogram)}
+hists = []                      # [histogram]
 for method in session.methods:
-    reader.BookMVA(method, '{0}/weights/{0}_{1}.weights.xml'
-                   .format(session._name, method))
     hname = 'MVA_{}'.format(method)
-    # discriminant for output tree
-    discriminant[method] = [array('f', [0.]), TH1D(hname, hname, 100, -1., 1.)]
-    otree.Branch(method, discriminant[method][0], '{}/F'.format(method))
+    hists.append(TH1D(hname, hname, 100, -1., 1.))
+    batch.BookMVA(method, '{0}/weights/{0}_{1}.weights.xml'
+                  .format(session._name, method), hists[-1])
 
-nentries = itree.GetEntries()
-for i in xrange(nentries):
-    itree.GetEntry(i)
-    for var, val in allvars.iteritems():
-        val[1].GetNdata()                  # load formula data
-        val[0][0] = val[1].EvalInstance()  # evaluate formula
-    for method in session.methods:
-        discriminant[method][0][0] = reader.EvaluateMVA(method)
-        discriminant[method][1].Fill(discriminant[method][0][0])
-    otree.Fill()
-    if i % 10000 == 0:
-        print "Processed {}/{}".format(i, nentries)
+if options.entries:
+    first, total = options.entries
+    prefix = '[{}-{}] '.format(first, first + total)
+else:
+    first, total = 0, nentries
+    prefix = ''
+start = time()
+for begin in xrange(first, first + total, options.chunk):
+    batch.Process(begin, min(options.chunk, first + total - begin))
+    progress(min(begin + options.chunk, first + total) - first, total, start,
+             prefix)
 
-for method in session.methods:
-    discriminant[method][1].Write()
+for hist in hists:
+    hist.Write()
 otree.Write()
 ofile.Close()
-ifile.Close()
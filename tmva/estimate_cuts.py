@@ -23,7 +23,7 @@ parser.add_argument('-c', dest='cut', type=float, required=True,
                     help='Reference MVA classifier cut')
 parser.add_argument('-r', dest='range', type=float, default=1,
                     help='Reference MVA classifier cut')
-parser.add_argument('--maxentries', default=200000,
+parser.add_argument('--maxentries', type=int, default=200000,
                     help='Maximum input tree entries to process')
 parser.add_argument('--tree', default='DecayTree', help='Tree name to use')
 options = parser.parse_args()
@@ -33,22 +33,20 @@ import sys
 if not os.path.exists(options.rfile):
     sys.exit('Non-existent input file: {}'.format(options.rfile))
 
-from fixes import ROOT
-ROOT.gROOT.SetBatch(True)
+# classifier values are read once (and cached), instead of a
+# TTree::Draw for every cut
+from utils import cachearrays
+columns = dict(zip(options.classifiers,
+                   cachearrays(options.rfile, options.tree,
+                               options.classifiers)))
 
-rfile = ROOT.TFile.Open(options.rfile, 'read')
-tree = rfile.Get(options.tree)
 
+def get_estimate(mva, cut):
+    # NOTE: only process the first maxentries entries
+    return (columns[mva][:options.maxentries] > float(cut)).sum()
 
-def get_estimate(mva, cut, tree=tree):
-    cut = ROOT.TCut('{}>{}'.format(mva, cut))
-    # NOTE: only process 200,000 entries
-    tree.Draw('{0}>>h{0}'.format(mva), cut, 'goff', options.maxentries)
-    hist = ROOT.gDirectory.Get('h{}'.format(mva))
-    return hist.GetEntries()
 
-
-def get_best_estimate(ref, mva, mvacut, refcut=options.cut, tree=tree):
+def get_best_estimate(ref, mva, mvacut, refcut=options.cut):
     import numpy as np
     expected = get_estimate(ref, refcut)
     # print expected
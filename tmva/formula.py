@@ -0,0 +1,316 @@
+# coding=utf-8
+"""Compile TTree expressions to functions of numpy column arrays
+
+The expressions use the same syntax as TTreeFormula (and TMVA.conf):
+variables (`var' or `var:=var1+var2'), selection cuts (`x>0 && y<1')
+and weight expressions.  An expression is parsed once into a Python
+function of column arrays, so evaluating it over a batch of events is a
+few numpy calls instead of a TTreeFormula evaluation per event.
+
+  >>> form = Formula('lab0_vtx:=lab0_ENDVERTEX_CHI2/lab0_ENDVERTEX_NDOF')
+  >>> form.name, form.branches
+  ('lab0_vtx', ['lab0_ENDVERTEX_CHI2', 'lab0_ENDVERTEX_NDOF'])
+  >>> form(columns)             # columns: {branch: array}
+
+Operators and precedence follow C (as TTreeFormula does), except `^'
+which is a power (as in TFormula).  All numbers are doubles, so `1/2'
+is 0.5.  As in TTreeFormula, `%' is an integer modulo (of the operands
+truncated to integers), and a division or modulo by zero gives 0.
+Array indexing (`x[0]') is not supported; methods of object
+branches without arguments (`hMom.Pt()') are read as columns.
+
+"""
+
+import re
+import numpy
+
+
+_TOKENS = re.compile(r'''\s*(?:
+  (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?) |
+  (?P<name>[A-Za-z_]\w*(?:(?:\.|::)[A-Za-z_]\w*)*) |
+  (?P<op>&&|\|\||==|!=|<=|>=|[-+*/%^<>!(),])
+)''', re.VERBOSE)
+
+_BINARY = [                     # lowest to highest precedence
+    ('||',), ('&&',), ('==', '!='), ('<', '<=', '>', '>='),
+    ('+', '-'), ('*', '/', '%')
+]
+
+
+def _divide(num, denom):
+    """num/denom, 0 where denom is 0 (as TTreeFormula)"""
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        res = numpy.divide(num, denom)
+    return numpy.where(numpy.asarray(denom) == 0, 0., res)
+
+
+def _modulo(num, denom):
+    """Integer modulo num%denom, 0 where denom is 0 (as TTreeFormula)"""
+    num, denom = numpy.trunc(num), numpy.trunc(denom)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        res = numpy.fmod(num, denom)
+    return numpy.where(denom == 0, 0., res)
+
+
+_FUNCTIONS = {
+    '&&': numpy.logical_and, '||': numpy.logical_or,
+    '!': numpy.logical_not, '/': _divide, '%': _modulo, '^': numpy.power,
+    'pi': lambda: numpy.pi,
+    'abs': numpy.abs, 'fabs': numpy.abs,
+    'sqrt': numpy.sqrt, 'exp': numpy.exp,
+    'log': numpy.log, 'log10': numpy.log10, 'pow': numpy.power,
+    'min': numpy.minimum, 'max': numpy.maximum,
+    'sin': numpy.sin, 'cos': numpy.cos, 'tan': numpy.tan,
+    'asin': numpy.arcsin, 'acos': numpy.arccos, 'atan': numpy.arctan,
+    'atan2': numpy.arctan2, 'sinh': numpy.sinh, 'cosh': numpy.cosh,
+    'tanh': numpy.tanh, 'floor': numpy.floor, 'ceil': numpy.ceil,
+}
+_FUNCTIONS.update({
+    'TMath::Abs': numpy.abs, 'TMath::Sqrt': numpy.sqrt,
+    'TMath::Exp': numpy.exp, 'TMath::Log': numpy.log,
+    'TMath::Log10': numpy.log10, 'TMath::Power': numpy.power,
+    'TMath::Min': numpy.minimum, 'TMath::Max': numpy.maximum,
+    'TMath::Sin': numpy.sin, 'TMath::Cos': numpy.cos,
+    'TMath::Tan': numpy.tan, 'TMath::ASin': numpy.arcsin,
+    'TMath::ACos': numpy.arccos, 'TMath::ATan': numpy.arctan,
+    'TMath::ATan2': numpy.arctan2, 'TMath::Floor': numpy.floor,
+    'TMath::Ceil': numpy.ceil, 'TMath::Pi': lambda: numpy.pi,
+})
+
+
+def parse_var(var):
+    """Split variable definition: var:=var1+var2 -> (var, var1+var2)
+
+    A simple variable is its own expression: var -> (var, var).
+
+    """
+    expr = var.split(':=', 1)
+    if len(expr) == 1:
+        expr = expr * 2
+    return expr[0].strip(), expr[1].strip()
+
+
+def _tokenise(expr):
+    """Split expression into (kind, token) pairs"""
+    tokens, pos = [], 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        match = _TOKENS.match(expr, pos)
+        if not match:
+            raise ValueError('Invalid expression at {}: {}'
+                             .format(pos, expr))
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+class _Parser(object):
+    """Recursive descent parser, translates to a Python expression"""
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.tokens = _tokenise(expr)
+        self.pos = 0
+        self.branches = set()
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][1]
+
+    def next(self):
+        if self.pos >= len(self.tokens):
+            raise ValueError('Unexpected end of expression: {}'
+                             .format(self.expr))
+        self.pos += 1
+        return self.tokens[self.pos - 1]
+
+    def expect(self, token):
+        if self.next()[1] != token:
+            raise ValueError('Expected `{}\' in expression: {}'
+                             .format(token, self.expr))
+
+    def parse(self):
+        res = self.binary(0)
+        if self.pos != len(self.tokens):
+            raise ValueError('Unexpected `{}\' in expression: {}'
+                             .format(self.peek(), self.expr))
+        return res
+
+    def binary(self, level):
+        if level == len(_BINARY):
+            return self.unary()
+        lhs = self.binary(level + 1)
+        while self.peek() in _BINARY[level]:
+            op = self.next()[1]
+            rhs = self.binary(level + 1)
+            if op in _FUNCTIONS:
+                lhs = '_f[{!r}]({}, {})'.format(op, lhs, rhs)
+            else:
+                lhs = '({} {} {})'.format(lhs, op, rhs)
+        return lhs
+
+    def unary(self):
+        if self.peek() == '-':
+            self.next()
+            return '(-{})'.format(self.unary())
+        if self.peek() == '+':
+            self.next()
+            return self.unary()
+        if self.peek() == '!':
+            self.next()
+            return "_f['!']({})".format(self.unary())
+        return self.power()
+
+    def power(self):
+        base = self.atom()
+        if self.peek() == '^':  # right associative, binds tighter than -
+            self.next()
+            return "_f['^']({}, {})".format(base, self.unary())
+        return base
+
+    def atom(self):
+        kind, token = self.next()
+        if kind == 'num':
+            return repr(float(token))
+        if kind == 'name':
+            if self.peek() != '(':
+                self.branches.add(token)
+                return '_c[{!r}]'.format(token)
+            if ('.' in token and token not in _FUNCTIONS and
+                    self.tokens[self.pos + 1:self.pos + 2] == [('op', ')')]):
+                self.pos += 2   # object method, a column read by ROOT
+                token += '()'
+                self.branches.add(token)
+                return '_c[{!r}]'.format(token)
+            if token not in _FUNCTIONS:
+                raise ValueError('Unknown function `{}\' in expression: {}'
+                                 .format(token, self.expr))
+            self.next()
+            args = []
+            while self.peek() != ')':
+                if args:
+                    self.expect(',')
+                args.append(self.binary(0))
+            self.next()
+            return '_f[{!r}]({})'.format(token, ', '.join(args))
+        if token == '(':
+            res = self.binary(0)
+            self.expect(')')
+            return res
+        raise ValueError('Unexpected `{}\' in expression: {}'
+                         .format(token, self.expr))
+
+
+class Formula(object):
+    """Expression compiled to a function of numpy column arrays
+
+    name     -- variable name (the expression itself, unless `name:=expr')
+    expr     -- expression
+    branches -- sorted list of branches (columns) needed for evaluation
+
+    An empty expression (e.g. no cut) evaluates to 1.
+
+    """
+
+    def __init__(self, var):
+        self.name, self.expr = parse_var(var)
+        parser = _Parser(self.expr or '1')
+        self._source = parser.parse()
+        self._code = compile(self._source, '<{}>'.format(self.expr), 'eval')
+        self.branches = sorted(parser.branches)
+
+    def __call__(self, columns, size=None):
+        """Evaluate over columns ({branch: array}), returns float64 array
+
+        The size is taken from the columns, pass `size' when evaluating
+        expressions that do not depend on any column.
+
+        """
+        # NaNs (e.g. log of negative numbers) as in TTreeFormula, but
+        # without a warning for every batch
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            res = eval(self._code, {'_c': columns, '_f': _FUNCTIONS})
+        res = numpy.asarray(res, dtype=numpy.float64)
+        if res.ndim == 0:
+            if size is None:
+                size = len(columns[self.branches[0]]) if self.branches \
+                    else len(next(iter(columns.values())))
+            res = numpy.repeat(res, size)
+        return res
+
+    def mask(self, columns, size=None):
+        """Evaluate as a selection, returns a boolean array"""
+        return self(columns, size) != 0
+
+    def __repr__(self):
+        if self.name == self.expr:
+            return 'Formula({!r})'.format(self.expr)
+        return 'Formula({!r})'.format('{}:={}'.format(self.name, self.expr))
+
+
+def branches(formulae):
+    """Sorted list of branches needed by all formulae"""
+    return sorted(set().union(*[form.branches for form in formulae]))
+
+
+def tree2arrays(tree, exprs, cut='', first=0, nentries=None):
+    """Read expressions from a tree into numpy arrays
+
+    The expressions are evaluated with TTree::Draw, four at a time
+    (TTree::GetV1..4), so the tree is read once for every four
+    expressions.  Boolean expressions (e.g. selection cuts) evaluate
+    to 0 or 1, which can be used as masks.  Only `nentries' entries
+    starting from `first' are read, all when None.
+
+    Returns a list of arrays (float64), one per expression.
+
+    """
+    if nentries is None:
+        nentries = tree.GetEntries() - first
+    tree.SetEstimate(nentries + 1)
+    arrays = []
+    for i in xrange(0, len(exprs), 4):
+        chunk = exprs[i:i+4]
+        nsel = tree.Draw(':'.join('({})'.format(expr) for expr in chunk),
+                         str(cut), 'goff', nentries, first)
+        for j in xrange(len(chunk)):
+            buf = getattr(tree, 'GetV{}'.format(j+1))()
+            if nsel > 0:
+                buf.SetSize(nsel)
+                arrays.append(numpy.frombuffer(buf, dtype=numpy.float64,
+                                               count=nsel).copy())
+            else:
+                arrays.append(numpy.zeros(0, dtype=numpy.float64))
+    return arrays
+
+
+def iterchunks(tree, exprs, cut='', chunk=100000):
+    """Iterate over a tree in chunks, evaluating expressions
+
+    Only the branches used by the expressions and the cut are read, and
+    everything else is evaluated with numpy.  Every iteration yields a list of arrays, one per
+    expression, for the events in the chunk passing the cut.
+    Expressions may be strings (as in TMVA.conf) or Formula objects.
+
+    """
+    formulae = [expr if isinstance(expr, Formula) else Formula(expr)
+                for expr in exprs]
+    cut = cut if isinstance(cut, Formula) else Formula(str(cut))
+    needed = branches(formulae + [cut])
+    nentries = tree.GetEntries()
+    for first in xrange(0, nentries, chunk):
+        size = min(chunk, nentries - first)
+        columns = dict(zip(needed, tree2arrays(tree, needed, first=first,
+                                               nentries=size)))
+        sel = cut.mask(columns, size)
+        yield [form(columns, size)[sel] for form in formulae]
+
+
+def evaluate(tree, exprs, cut='', chunk=100000):
+    """Evaluate expressions over a tree, returns a list of arrays"""
+    res = [[] for expr in exprs]
+    for arrays in iterchunks(tree, exprs, cut, chunk):
+        for acc, array in zip(res, arrays):
+            acc.append(array)
+    return [numpy.concatenate(acc) if acc else numpy.zeros(0)
+            for acc in res]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding=utf-8
+"""Train several TMVA sessions in parallel
+
+Sessions matching the names (or globs) are trained concurrently with
+train.py.  Every session is trained in its own temporary working
+directory, since TMVA writes weights to a fixed `weights/' directory.
+Once done, the output is moved to the usual `<session>/' directory in
+the current directory, along with the training log (train.log).
+
+"""
+
+import argparse
+from rplot.utils import RawArgDefaultFormatter
+from utils import is_match
+
+optparser = argparse.ArgumentParser(formatter_class=RawArgDefaultFormatter,
+                                    description=__doc__)
+optparser.add_argument('sessions', nargs='+', help='Session names (or globs)')
+optparser.add_argument('-o', dest='out', required=True, help='Output file')
+optparser.add_argument('-c', dest='conf', default='TMVA.conf',
+                       help='TMVA config file')
+optparser.add_argument('-j', '--jobs', type=int, default=4,
+                       help='Number of sessions trained in parallel')
+optparser.add_argument('--sigtree', default='SigTree',
+                       help='Signal tree name')
+optparser.add_argument('--bkgtree', default='BkgTree',
+                       help='Background tree name')
+optparser.add_argument('-n', dest='norm', action='store_true',
+                       help='Normalise (ensure similar order) sample sizes')
+optparser.add_argument('--cache', default='.cache/skims',
+                       help='Directory for cached selected samples (shared '
+                       'by all sessions)')
+options = optparser.parse_args()
+
+import sys
+import os
+if not os.path.exists(options.conf):
+    sys.exit('File not found: {}'.format(options.conf))
+
+from tmvaconfig import ConfigFile
+conf = ConfigFile(options.conf)
+conf.read()
+
+# filter out when not a match or invalid
+sessions = filter(lambda s: is_match(s, options.sessions), conf.sessions())
+if not sessions:
+    sys.exit('No matching sessions!')
+print '::: Training {} sessions ({} in parallel): {}'.format(
+    len(sessions), options.jobs, ' '.join(sessions))
+
+import shutil
+import tempfile
+import subprocess
+
+train = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'train.py')
+cmd = [sys.executable, train, '-o', options.out,
+       '-c', os.path.abspath(options.conf),
+       '--cache', os.path.abspath(options.cache),
+       '--sigtree', options.sigtree, '--bkgtree', options.bkgtree]
+if options.norm:
+    cmd += ['-n']
+
+
+def collect(src, dst):
+    """Move contents of directory src to dst, replace existing"""
+    try:
+        os.makedirs(dst)
+    except OSError as err:
+        import errno
+        if err.errno == errno.EEXIST:
+            pass
+        else:
+            raise
+    for entry in os.listdir(src):
+        old = os.path.join(dst, entry)
+        if os.path.isdir(old):
+            shutil.rmtree(old, True)
+        elif os.path.exists(old):
+            os.remove(old)
+        shutil.move(os.path.join(src, entry), old)
+
+
+def run(session):
+    """Train session in a temporary working directory"""
+    wdir = tempfile.mkdtemp(prefix='.train_{}_'.format(session), dir='.')
+    with open(os.path.join(wdir, 'train.log'), 'w') as log:
+        status = subprocess.call(cmd + [session], cwd=wdir, stdout=log,
+                                 stderr=subprocess.STDOUT)
+    if status == 0:
+        shutil.move(os.path.join(wdir, 'train.log'),
+                    os.path.join(wdir, session, 'train.log'))
+        collect(os.path.join(wdir, session), session)
+        shutil.rmtree(wdir, True)
+        print '::: {}: done'.format(session)
+    else:
+        print '::: {}: failed ({}), see {}/train.log'.format(session, status,
+                                                            wdir)
+    return status
+
+from multiprocessing.pool import ThreadPool
+pool = ThreadPool(options.jobs)
+status = pool.map(run, sessions, chunksize=1)
+pool.close()
+
+failed = [s for s, ret in zip(sessions, status) if ret != 0]
+if failed:
+    sys.exit('Failed sessions: {}'.format(' '.join(failed)))
@@ -4,7 +4,12 @@
 Draws ROC curves for different MVA classifiers from the TMVA output
 files.  It generates the curves by looking at efficiencies for
 different MVA classifier cuts from a ROOT tree where the classifier
-variable is present as a branch.
+variable is present as a branch.  The tree is read once per file, and
+the exact curve is calculated from the sorted classifier values.
+
+When many files (training sessions) are given, a summary of the ROC
+metrics (integral, and distance from (1,1)) is printed for all of
+them.
 
 """
 
@@ -31,6 +36,8 @@ optparser.add_argument('-c', dest='clnameglob', metavar='classifier',
                        help='Only plot matching classifiers (globs allowed)')
 optparser.add_argument('-m', '--marks', action='store_true',
                        help='Toggle markers')
+optparser.add_argument('-w', '--weight', default='',
+                       help='Event weight expression (e.g. weight)')
 options = optparser.parse_args()
 locals().update(_import_args(options))
 
@@ -59,56 +66,68 @@ ROOT.gROOT.SetBatch(options.batch)
 fnames = [f[0]['file'] for f in rfiles]
 
 
-def get_hists(classifiers, rfile, name, marks):
+def get_hists(classifiers, rfile, name, marks, weight=''):
     from ROOT import TProfile, TPolyMarker
-    from numpy import linspace
+    from numpy import linspace, arange, ones, isnan
     from array import array
-    rfile = ROOT.TFile.Open(rfile)
-    tree = rfile.Get(name)
-    sig, bkg = 'classID=={}'.format(0), 'classID=={}'.format(1)
-    hists = {}
+    from utils import (cachearrays, scan_passed, roc_curve, roc_integral,
+                       roc_distance)
+    # read class, weights, and all classifiers in one go
+    columns = cachearrays(rfile, name,
+                          ['classID', weight or '1'] + list(classifiers))
+    sig, bkg = columns[0] == 0, columns[0] == 1
+    wts = columns[1]
+    hists, metrics = {}, {}
     marks = {} if marks else None
-    for cl in classifiers:
-        name = '{}_{}'.format(cl, rfile.GetName().split('/', 1)[0])
-        nsig = float(tree.GetEntries(sig))
-        nbkg = float(tree.GetEntries(bkg))
+    for cl, scores in zip(classifiers, columns[2:]):
+        name = '{}_{}'.format(cl, rfile.split('/', 1)[0])
+        sel = sig | bkg
+        eff_s, eff_b, thresholds = roc_curve(scores[sel], sig[sel], wts[sel])
+        metrics[cl] = (roc_integral(eff_s, eff_b), roc_distance(eff_s, eff_b))
         # variable bin width
         bins = array('f', [1.0/(-i*0.5-1) + 1 for i in xrange(100)] + [1])
         hist = TProfile('h_{}'.format(name), 'ROC curve ({})'.format(cl),
                         100, bins)
         hist.SetDirectory(0)    # otherwise current file owns histogram
+        hist.FillN(len(eff_s), eff_s, eff_b, ones(len(eff_s)))
         if isinstance(marks, dict):
-            xmark, ymark = array('f'), array('f')
-        for i, cut in enumerate(linspace(-1, 1, 1001)):
-            cutstr = '{}>{}'.format(cl, cut)
-            eff_s = tree.GetEntries('{}&&{}'.format(sig, cutstr))/nsig
-            eff_b = 1 - tree.GetEntries('{}&&{}'.format(bkg, cutstr))/nbkg
-            hist.Fill(eff_s, eff_b)
-            if isinstance(marks, dict):
-                if cl == 'BDTB':
-                    window = -0.3 <= cut and cut <= 0.3
-                    step = not i % 10
-                else:
-                    window = -0.9 <= cut and cut <= 0.9
-                    step = not i % 50
-                if window and step:
-                    xmark.append(eff_s)
-                    ymark.append(eff_b)
-        hists[cl] = hist
-        if isinstance(marks, dict):
+            # same denominators as roc_curve: NaN scores are dropped
+            ok = ~isnan(scores)
+            nsig, nbkg = wts[sig & ok].sum(), wts[bkg & ok].sum()
+            cuts, idx = linspace(-1, 1, 1001), arange(1001)
+            if cl == 'BDTB':
+                window = (-0.3 <= cuts) & (cuts <= 0.3)
+                step = idx % 10 == 0
+            else:
+                window = (-0.9 <= cuts) & (cuts <= 0.9)
+                step = idx % 50 == 0
+            passed = scan_passed(scores, cuts[window & step], [sig, bkg],
+                                 wts, inclusive=False)
+            xmark = passed[:, 0] / nsig
+            ymark = 1 - passed[:, 1] / nbkg
             marks[cl] = TPolyMarker(len(xmark), xmark, ymark)
             print '{}: {} marks'.format(cl, len(xmark))
             for pt in zip(xmark, ymark): print pt,
             print
-    return hists, marks
+        hists[cl] = hist
+    return hists, marks, metrics
 
 # from utils import thn_print
-rocs, markers = [], []
+rocs, markers, metrics = [], [], []
 for i, rfileconf in enumerate(rfiles):
-    roc, marks = get_hists(classifiers, rfileconf[0]['file'], 'TestTree',
-                           options.marks)
+    roc, marks, metric = get_hists(classifiers, rfileconf[0]['file'],
+                                   'TestTree', options.marks, options.weight)
     rocs.append(roc)
     markers.append(marks)
+    metrics.append(metric)
+
+# summary of all sessions, best (largest area) first
+summary = [(metric[cl], cl, fnames[i]) for i, metric in enumerate(metrics)
+           for cl in metric]
+print '::: ROC summary (integral, distance):'
+for (integral, dist), cl, fname in sorted(summary, reverse=True):
+    print '{:>10.6f} {:>10.6f}  {} ({})'.format(integral, dist, cl,
+                                                sessions.get(fname, fname))
 
 # config
 axis_range = options.axis_range
@@ -166,16 +185,12 @@ else:
     legend.SetFillStyle(0)
     ROOT.gStyle.SetOptStat(False)
 
-    from utils import th1integral, distance
     for i, roc in enumerate(rocs):
         coln = 0
         for cl, hist in roc.iteritems():
             # metrics
             print '=> {}:: integral: {}, distance: {}'.format(
-                cl,
-                th1integral(hist),
-                distance(hist, (1, 1))
-            )
+                cl, *metrics[i][cl])
             hist.SetLineStyle(i+1)
             hist.SetLineColor(cols[coln])
             hist.GetXaxis().SetRangeUser(axis_range, 1.05)
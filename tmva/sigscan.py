@@ -103,19 +103,16 @@ cltitle = {
     'BDTGResponse_1': 'Old BDT cuts (w/ gradient boost)'
 }
 
-# read tree
+# tree name
 if options.tree:
     tree = options.tree
 else:
     tree = 'TestTree' if options.istmva else 'DecayTree'
-rfile = ROOT.TFile.Open(options.rfile, 'read')
-tree = rfile.Get(tree)
 
 # sig, bkg, and other cuts
 if istmva:
     sig, bkg = 'classID=={}'.format(0), 'classID=={}'.format(1)  # TMVA
-    nbkg = float(tree.GetEntries(bkg))
-    nsig = float(tree.GetEntries(sig))
+    regions = [sig, bkg]
 elif ismc:
     from tmvaconfig import ConfigFile
     conf = ConfigFile(options.conf)
@@ -124,7 +121,7 @@ elif ismc:
     else:
         sys.exit('No sesions found!')
     sig = session.cut_sig
-    nsig = float(tree.GetEntries(sig))
+    regions = [sig]
 else:                           # isdata
     ispion = 'lab1_PIDK<-5'
     # ~ s + b(w/ π) (FIXME: update range)
@@ -133,9 +130,20 @@ else:                           # isdata
     region2 = '5445<lab0_MM && lab0_MM<5800'
     # ~ b(w/ π)
     region3 = '5445<lab0_MM && lab0_MM<5800 && {}'.format(ispion)
-    nregion1 = float(tree.GetEntries(region1))
-    nregion2 = float(tree.GetEntries(region2))
-    nregion3 = float(tree.GetEntries(region3))
+    regions = [region1, region2, region3]
+
+# read the classifier and the regions once; all cuts are then
+# evaluated on the arrays instead of a pass over the tree per cut
+from utils import cachearrays
+columns = cachearrays(options.rfile, tree,
+                      [classifier] + [str(r) or '1' for r in regions])
+clvals, masks = columns[0], [col > 0 for col in columns[1:]]
+if istmva:
+    nsig, nbkg = [float(mask.sum()) for mask in masks]
+elif ismc:
+    nsig = float(masks[0].sum())
+else:                           # isdata
+    nregion1, nregion2, nregion3 = [float(mask.sum()) for mask in masks]
 
 
 # signal and background estimates from data
@@ -151,23 +159,6 @@ def get_sig(nevts1, nevts3, lo=5300, mid=5445, up=5800):
     """
     return nevts1 - float(mid-lo)/float(up-lo) * get_bkg(nevts3)
 
-nevts_passed = []
-if istmva:
-    nevts_passed += [
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(sig, cut.ge)),
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(bkg, cut.ge))
-    ]
-elif ismc:
-    nevts_passed += [
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(sig, cut.ge))
-    ]
-else:                           # isdata
-    nevts_passed += [
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(region1, cut.ge)),
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(region2, cut.ge)),
-        lambda tree, cut: tree.GetEntries('{}&&{}'.format(region3, cut.ge))
-    ]
-
 from numpy import linspace, array, isnan
 if classifier == 'BDTB':
     clrange = (-0.3, 0.3)
@@ -176,8 +167,8 @@ else:
 cuts = linspace(clrange[0], clrange[1], 101)
 
 # significance, signal selection and background rejection efficiency
-from utils import scan_range
-res = array(scan_range(nevts_passed, cuts, classifier, tree))
+from utils import scan_passed
+res = scan_passed(clvals, cuts, masks)
 
 # NOTE: filter runtime warning due to NaNs.  These entries are
 # filtered away before filling the histograms.  They occur due to 0
@@ -34,3 +34,206 @@ class test_hist(unittest.TestCase):
     def test_th1integral(self):
         from utils import th1integral
         self.assertEqual(th1integral(self.hist1), 1000)
+
+class test_scan(unittest.TestCase):
+    def setUp(self):
+        import numpy
+        numpy.random.seed(42)
+        self.values = numpy.random.uniform(-1, 1, 1000)
+        self.values[::97] = numpy.nan
+        self.masks = [numpy.random.uniform(size=1000) > 0.5 for i in (0, 1)]
+        self.weights = numpy.random.uniform(size=1000)
+        self.stops = numpy.linspace(-1, 1, 101)
+
+    def test_scan_passed(self):
+        from utils import scan_passed
+        res = scan_passed(self.values, self.stops, self.masks)
+        for i, stop in enumerate(self.stops):
+            for j, mask in enumerate(self.masks):
+                self.assertEqual(res[i, j],
+                                 (mask & (self.values >= stop)).sum())
+
+    def test_scan_passed_weighted(self):
+        from utils import scan_passed
+        res = scan_passed(self.values, self.stops, self.masks, self.weights)
+        for i, stop in enumerate(self.stops):
+            for j, mask in enumerate(self.masks):
+                sel = mask & (self.values >= stop)
+                self.assertAlmostEqual(res[i, j], self.weights[sel].sum())
+
+class test_roc(unittest.TestCase):
+    def setUp(self):
+        import numpy
+        numpy.random.seed(42)
+        self.issig = numpy.random.uniform(size=1000) > 0.5
+        self.scores = numpy.random.normal(size=1000) + self.issig
+        self.scores = numpy.round(self.scores, 1)  # ties
+        self.weights = numpy.random.uniform(size=1000)
+
+    def test_roc_curve(self):
+        from utils import roc_curve
+        eff_s, rej_b, cuts = roc_curve(self.scores, self.issig, self.weights)
+        wsig = self.weights[self.issig].sum()
+        wbkg = self.weights[~self.issig].sum()
+        for eff, rej, cut in zip(eff_s, rej_b, cuts):
+            sel = self.scores >= cut
+            self.assertAlmostEqual(eff, self.weights[sel & self.issig].sum()/wsig)
+            self.assertAlmostEqual(rej, 1 - self.weights[sel & ~self.issig].sum()/wbkg)
+        self.assertEqual((eff_s[0], rej_b[0]), (0, 1))
+        self.assertAlmostEqual(eff_s[-1], 1)
+        self.assertAlmostEqual(rej_b[-1], 0)
+
+    def test_roc_metrics(self):
+        from utils import roc_integral, roc_distance
+        import numpy
+        eff_s = numpy.array([0., 0.5, 1.])
+        rej_b = numpy.array([1., 0.5, 0.])
+        self.assertAlmostEqual(roc_integral(eff_s, rej_b), 0.5)
+        self.assertAlmostEqual(roc_distance(eff_s, rej_b), 0.5)
+
+class test_cache(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        from array import array
+        self.tmpdir = tempfile.mkdtemp()
+        self.cachedir = '{}/cache'.format(self.tmpdir)
+        self.fname = '{}/tree.root'.format(self.tmpdir)
+        rfile = ROOT.TFile.Open(self.fname, 'recreate')
+        tree = ROOT.TTree('tree', '')
+        val = array('d', [0.])
+        tree.Branch('x', val, 'x/D')
+        for i in xrange(100):
+            val[0] = i
+            tree.Fill()
+        tree.Write()
+        rfile.Close()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmpdir)
+
+    def test_cachearrays(self):
+        import numpy
+        from utils import cachearrays
+        x, = cachearrays(self.fname, 'tree', ['x'], cachedir=self.cachedir)
+        self.assertEqual(list(x), range(100))
+        # cached array is mapped, new expression is read
+        x, sel = cachearrays(self.fname, 'tree', ['x', 'x>49'],
+                             cachedir=self.cachedir)
+        self.assertTrue(isinstance(x, numpy.memmap))
+        self.assertEqual(sel.sum(), 50)
+
+    def test_evict_lru(self):
+        import glob
+        from utils import cachearrays
+        cachearrays(self.fname, 'tree', ['x'], cachedir=self.cachedir)
+        # older array evicted, the returned one is kept
+        x2, = cachearrays(self.fname, 'tree', ['2*x'], maxsize=0,
+                          cachedir=self.cachedir)
+        self.assertEqual(len(glob.glob('{}/*/*.npy'.format(self.cachedir))), 1)
+        x2, = cachearrays(self.fname, 'tree', ['2*x'], maxsize=0,
+                          cachedir=self.cachedir)
+        self.assertEqual(x2[-1], 198)
+
+    def test_invalidate(self):
+        import os
+        import glob
+        from utils import cachearrays
+        cachearrays(self.fname, 'tree', ['x'], cachedir=self.cachedir)
+        stat = os.stat(self.fname)
+        os.utime(self.fname, (stat.st_atime, stat.st_mtime + 10))
+        x, = cachearrays(self.fname, 'tree', ['x'], cachedir=self.cachedir)
+        self.assertEqual(list(x), range(100))
+        # only the new directory is left behind
+        self.assertEqual(len(os.listdir(self.cachedir)), 1)
+        self.assertEqual(len(glob.glob('{}/*/*.npy'.format(self.cachedir))), 1)
+
+    def test_cacheskim(self):
+        from utils import cacheskim
+        spec = '{}/tree'.format(self.fname)
+        skim, entries = cacheskim(spec, 'x>49', cachedir=self.cachedir)
+        self.assertEqual(entries, 50)
+        rfile = ROOT.TFile.Open(skim, 'read')
+        self.assertEqual(rfile.Get('skim').GetEntries(), 50)
+        rfile.Close()
+        # same inputs & cut, reused
+        self.assertEqual(cacheskim(spec, 'x>49', cachedir=self.cachedir),
+                         (skim, entries))
+        # different cut, new skim
+        self.assertNotEqual(cacheskim(spec, 'x>89', cachedir=self.cachedir),
+                            (skim, entries))
+
+    def test_cacheskim_evict(self):
+        import os
+        from utils import cacheskim
+        spec = '{}/tree'.format(self.fname)
+        # returned skim is never evicted
+        skim1, entries = cacheskim(spec, 'x>49', maxsize=0,
+                                   cachedir=self.cachedir)
+        self.assertTrue(os.path.exists(skim1))
+        os.utime(skim1, (0, 0))  # not recently used
+        # held by the caller
+        skim2, entries = cacheskim(spec, 'x>89', maxsize=0,
+                                   cachedir=self.cachedir, keep=[skim1])
+        self.assertTrue(os.path.exists(skim1))
+        os.utime(skim2, (0, 0))
+        skim3, entries = cacheskim(spec, 'x>94', maxsize=0,
+                                   cachedir=self.cachedir, keep=[skim1])
+        self.assertTrue(os.path.exists(skim1))
+        self.assertFalse(os.path.exists(skim2))
+        # along with its metadata
+        self.assertEqual(sorted(os.listdir(self.cachedir)),
+                         sorted(os.path.basename(skim)[:-5] + ext
+                                for skim in (skim1, skim3)
+                                for ext in ('.root', '.pickle')))
+
+class test_formula(unittest.TestCase):
+    def setUp(self):
+        import numpy
+        self.columns = {'x': numpy.arange(5.),
+                        'lab1_ID': numpy.array([211., -211, 321, 211, -13])}
+
+    def test_parse(self):
+        from formula import Formula
+        form = Formula('y:=max(x, 2)/TMath::Abs(lab1_ID)')
+        self.assertEqual((form.name, form.expr),
+                         ('y', 'max(x, 2)/TMath::Abs(lab1_ID)'))
+        self.assertEqual(form.branches, ['lab1_ID', 'x'])
+        self.assertRaises(ValueError, Formula, 'x+')
+        self.assertRaises(ValueError, Formula, 'foo(x)')
+        self.assertEqual(Formula('1/hMom.Pt()').branches, ['hMom.Pt()'])
+        self.assertRaises(ValueError, Formula, 'hMom.Pt(x)')
+
+    def test_eval(self):
+        from formula import Formula
+        self.assertEqual(list(Formula('1/2 + -x^2')(self.columns)),
+                         [0.5, -0.5, -3.5, -8.5, -15.5])
+        cut = Formula('abs(lab1_ID)==211 && !(x<1 || x>2)')
+        self.assertEqual(list(cut.mask(self.columns)),
+                         [False, True, False, False, False])
+        self.assertEqual(list(Formula('')(self.columns)), [1.] * 5)
+
+    def test_divide(self):
+        from formula import Formula
+        # as TTreeFormula: x/0 is 0, and % is an integer modulo
+        self.assertEqual(list(Formula('x/0')(self.columns)), [0.] * 5)
+        self.assertEqual(list(Formula('1/(x-2)')(self.columns)),
+                         [-0.5, -1, 0, 1, 0.5])
+        self.assertEqual(list(Formula('1/(x-2) > 0.7').mask(self.columns)),
+                         [False, False, False, True, False])
+        self.assertEqual(list(Formula('7.5%2')(self.columns)), [1.] * 5)
+        self.assertEqual(list(Formula('-x%2 + x%0')(self.columns)),
+                         [0, -1, 0, -1, 0])
+        self.assertEqual(list(Formula('1/0')(self.columns)), [0.] * 5)
+
+    def test_iterchunks(self):
+        from array import array
+        from formula import evaluate
+        tree = ROOT.TTree('tree', '')
+        val = array('d', [0.])
+        tree.Branch('x', val, 'x/D')
+        for i in xrange(100):
+            val[0] = i
+            tree.Fill()
+        sqr, = evaluate(tree, ['sqr:=x*x'], 'x>49', chunk=30)
+        self.assertEqual(list(sqr), [i*i for i in xrange(50, 100)])
@@ -17,6 +17,8 @@ optparser.add_argument('-c', dest='conf', default='TMVA.conf',
                        help='TMVA config file')
 optparser.add_argument('-n', dest='norm', action='store_true',
                        help='Normalise (ensure similar order) sample sizes')
+optparser.add_argument('--cache', default='.cache/skims',
+                       help='Directory for cached selected samples')
 options = optparser.parse_args()
 
 # variables for future proofing
@@ -40,17 +42,20 @@ print ':::'
 from fixes import ROOT
 ROOT.gROOT.SetBatch(True)
 
-# files & trees
-tree_s = ROOT.TChain(options.sigtree)
-map(lambda f: tree_s.Add(f), session.sig_file)
-tree_b = ROOT.TChain(options.bkgtree)
-map(lambda f: tree_b.Add(f), session.bkg_file)
-
-if not tree_s or not tree_b:
-    sys.exit('Unable to read input trees.')
-
-nentries_s = tree_s.GetEntries(str(session.cut_sig))
-nentries_b = tree_b.GetEntries(str(session.cut_bkg))
+# files & trees: apply selection cuts here instead of
+# PrepareTrainingAndTestTree().  If selection involves a branch present
+# in only one of the trees, it will fail.  So copy selection to a tree
+# in a (cached) skim file, and pass that to TMVA::Factory(..).  Sessions
+# with the same input files and cuts reuse the skim.
+from utils import cacheskim
+try:
+    skim_s, nentries_s = cacheskim(session.sig_file, session.cut_sig,
+                                   options.sigtree, cachedir=options.cache)
+    skim_b, nentries_b = cacheskim(session.bkg_file, session.cut_bkg,
+                                   options.bkgtree, cachedir=options.cache,
+                                   keep=[skim_s])
+except IOError as err:
+    sys.exit('Unable to read input trees: {}'.format(err))
 
 # NOTE: normalise: create option like
 # nTrain_Signal=num:nTrain_Background=num:...
@@ -64,64 +69,54 @@ if options.norm:
 
 # TODO: x-validate
 
-
-from rplot.utils import Rtmpfile
-with Rtmpfile() as tmpfile:
-    # Apply selection cuts here instead of PrepareTrainingAndTestTree().
-    # If selection involves a branch present in only one of the trees, it
-    # will fail.  So copy selection to a tree in a temporary file, and
-    # pass that to TMVA::Factory(..).
-    clone_tree_s = tree_s.CopyTree(str(session.cut_sig))
-    clone_tree_s.SetName(options.sigtree)
-    clone_tree_s.Write()
-    clone_tree_b = tree_b.CopyTree(str(session.cut_bkg))
-    clone_tree_b.SetName(options.bkgtree)
-    clone_tree_b.Write()
-
-    del tree_s, tree_b
-    tree_s, tree_b = clone_tree_s, clone_tree_b
-
-    ofile = ROOT.TFile.Open(options.out, 'recreate')
-
-    # instantiate TMVA
-    ROOT.TMVA.Tools.Instance()
-    # TMVA.gConfig.GetIONames().fWeightFileDir = wdir
-    session.factory_opts += ['!V', 'DrawProgressBar=False']
-    factory = ROOT.TMVA.Factory(session._name, ofile,
-                                ':'.join(session.factory_opts))
-
-    map(lambda var: factory.AddVariable(var, 'F'), session.all_vars())
-    map(lambda var: factory.AddSpectator(var, 'F'), session.spectators)
-
-    # get tree and perform branch name mappings if necessary
-    factory.AddSignalTree(tree_s, 1.0)
-    factory.AddBackgroundTree(tree_b, 1.0)
-
-    # apply event weights if necessary
-    if session.bkgwt:
-        factory.SetBackgroundWeightExpression(session.bkgwt)
-    if session.sigwt:
-        # FIXME: correct weights for ignored events, since sweights:
-        # MVA weight = sw - (∑sw(M<5310 && M>5430))/entries(M<5310 && M>5430)
-        factory.SetSignalWeightExpression(session.sigwt)
-
-    # selection cuts, if any
-    session.training_opts += ['!V']
-    factory.PrepareTrainingAndTestTree(ROOT.TCut(''),
-                                       ':'.join(session.training_opts))
-
-    # book methods
-    map(lambda method: factory.BookMethod(TMVAType(method), method, '!H:!V:' +
-                                          ':'.join(getattr(session, method))),
-        session.methods)
-
-    # train, test, evaluate
-    factory.TrainAllMethods()
-    factory.TestAllMethods()
-    factory.EvaluateAllMethods()
-    ofile.Close()
-
-    print '::: Training MVAs done!'
+file_s = ROOT.TFile.Open(skim_s, 'read')
+tree_s = file_s.Get('skim')
+tree_s.SetName(options.sigtree)
+file_b = ROOT.TFile.Open(skim_b, 'read')
+tree_b = file_b.Get('skim')
+tree_b.SetName(options.bkgtree)
+
+ofile = ROOT.TFile.Open(options.out, 'recreate')
+
+# instantiate TMVA
+ROOT.TMVA.Tools.Instance()
+# TMVA.gConfig.GetIONames().fWeightFileDir = wdir
+session.factory_opts += ['!V', 'DrawProgressBar=False']
+factory = ROOT.TMVA.Factory(session._name, ofile,
+                            ':'.join(session.factory_opts))
+
+map(lambda var: factory.AddVariable(var, 'F'), session.all_vars())
+map(lambda var: factory.AddSpectator(var, 'F'), session.spectators)
+
+# get tree and perform branch name mappings if necessary
+factory.AddSignalTree(tree_s, 1.0)
+factory.AddBackgroundTree(tree_b, 1.0)
+
+# apply event weights if necessary
+if session.bkgwt:
+    factory.SetBackgroundWeightExpression(session.bkgwt)
+if session.sigwt:
+    # FIXME: correct weights for ignored events, since sweights:
+    # MVA weight = sw - (∑sw(M<5310 && M>5430))/entries(M<5310 && M>5430)
+    factory.SetSignalWeightExpression(session.sigwt)
+
+# selection cuts, if any
+session.training_opts += ['!V']
+factory.PrepareTrainingAndTestTree(ROOT.TCut(''),
+                                   ':'.join(session.training_opts))
+
+# book methods
+map(lambda method: factory.BookMethod(TMVAType(method), method, '!H:!V:' +
+                                      ':'.join(getattr(session, method))),
+    session.methods)
+
+# train, test, evaluate
+factory.TrainAllMethods()
+factory.TestAllMethods()
+factory.EvaluateAllMethods()
+ofile.Close()
+
+print '::: Training MVAs done!'
 
 # move output to session directory
 import os
@@ -35,6 +35,227 @@ def cacheobj(name, obj):
         print 'No cached file: {}/{}'.format(cachedir, cachefile)
 
 
+def cachearrays(fname, tname, exprs, cut='', maxsize=4*1024**3,
+                cachedir='.cache/arrays'):
+    """Return arrays of expressions from a tree, cached on disk
+
+    On a cache miss, the expressions are read with tree2arrays and
+    saved as .npy files.  Later calls memory map the saved arrays
+    (read-only, no copy) instead of reading the tree again.
+
+    Cache entries are keyed by the absolute file path, tree name, cut,
+    and expression (so a different list of branches reuses the ones
+    already cached).  An entry is valid as long as the modification
+    time and size of the file are unchanged, otherwise all entries for
+    that file & tree are discarded.  The cache directory is limited to
+    `maxsize' bytes, the least recently used arrays are evicted first
+    (never the ones returned).
+
+    """
+    import os
+    import errno
+    import shutil
+    import hashlib
+    import tempfile
+    import numpy
+    fname = os.path.abspath(fname)
+    stat = os.stat(fname)
+    version = '{}:{}'.format(stat.st_mtime, stat.st_size)
+    tdir = os.path.join(cachedir,
+                        hashlib.sha1('{}:{}'.format(fname, tname)).hexdigest())
+    vfile = os.path.join(tdir, 'version')
+    if os.path.exists(vfile):
+        with open(vfile, 'r') as vers:
+            stale = vers.read() != version
+        if stale:               # file changed, invalidate
+            # move aside first, concurrent jobs keep their open files
+            # and never see a partially removed directory
+            old = tempfile.mkdtemp(suffix='.stale', dir=cachedir)
+            try:
+                os.rename(tdir, os.path.join(old, 'arrays'))
+            except OSError as err:
+                if err.errno != errno.ENOENT:  # already moved
+                    raise
+            shutil.rmtree(old, True)
+    if not os.path.exists(tdir):
+        # the version is written before the directory appears
+        try:
+            os.makedirs(cachedir)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+        new = tempfile.mkdtemp(suffix='.tmp', dir=cachedir)
+        with open(os.path.join(new, 'version'), 'w') as vers:
+            vers.write(version)
+        try:
+            os.rename(new, tdir)
+        except OSError as err:  # made by a concurrent job
+            if err.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+            shutil.rmtree(new, True)
+
+    paths = [os.path.join(tdir, '{}.npy'.format(
+        hashlib.sha1('{}:{}'.format(cut, expr)).hexdigest())) for expr in exprs]
+    arrays = []
+    for path in paths:
+        try:
+            os.utime(path, None)    # mark as recently used
+            arrays.append(numpy.load(path, mmap_mode='r'))
+        except (IOError, OSError):
+            arrays.append(None)
+    missing = [i for i, array in enumerate(arrays) if array is None]
+    if missing:
+        from fixes import ROOT
+        from formula import tree2arrays
+        rfile = ROOT.TFile.Open(fname, 'read')
+        read = tree2arrays(rfile.Get(tname), [exprs[i] for i in missing], cut)
+        rfile.Close()
+        for i, array in zip(missing, read):
+            arrays[i] = array
+            # atomic w.r.t. other jobs; if the directory was invalidated
+            # meanwhile, the array is returned without being cached
+            try:
+                fd, tmpfile = tempfile.mkstemp(suffix='.tmp', dir=tdir)
+                with os.fdopen(fd, 'wb') as cfile:
+                    numpy.save(cfile, array)
+                os.rename(tmpfile, paths[i])
+            except (IOError, OSError):
+                pass
+    evict_lru(cachedir, maxsize, keep=paths)
+    return arrays
+
+
+def cacheskim(files, cut, tname='DecayTree', maxsize=20*1024**3,
+              cachedir='.cache/skims', keep=()):
+    """Return the selection of entries from trees, cached on disk
+
+    The trees in `files' are chained, and the entries passing `cut'
+    are copied to a new file in the cache directory.  Files can include
+    the tree name (/path/file.root/tree), `tname' is used otherwise.
+    Wildcards are expanded.
+
+    The skims are content addressed: the key is made of the files,
+    their tree names, modification times and sizes, and the cut.  So a
+    change to any of the input files invalidates the skim.  The cache
+    directory is limited to `maxsize' bytes, the least recently used
+    skims are evicted first.  The returned skim, skims in `keep' (held
+    by the caller), and skims used in the last 10 minutes (possibly by
+    concurrent jobs) are never evicted.
+
+    Returns (file name, number of entries); the selected entries are in
+    the tree `skim'.
+
+    """
+    import os
+    import errno
+    import glob
+    import pickle
+    import hashlib
+    import tempfile
+    if isinstance(files, str):
+        files = [files]
+    inputs = []                 # [(file, tree, mtime, size)]
+    for spec in files:
+        idx = spec.find('.root')
+        if idx >= 0:
+            fname, tree = spec[:idx+5], spec[idx+6:]
+        else:
+            fname, tree = spec, ''
+        fnames = sorted(glob.glob(fname))
+        if not fnames:
+            raise IOError('File {} does not exist!'.format(fname))
+        for fname in fnames:
+            stat = os.stat(fname)
+            inputs.append((os.path.abspath(fname), tree or tname,
+                           stat.st_mtime, stat.st_size))
+    key = hashlib.sha1(repr((inputs, str(cut)))).hexdigest()
+    skim = os.path.join(cachedir, '{}.root'.format(key))
+    meta = os.path.join(cachedir, '{}.pickle'.format(key))
+    if os.path.exists(skim) and os.path.exists(meta):
+        os.utime(skim, None)    # mark as recently used
+        with open(meta, 'r') as mfile:
+            return skim, pickle.load(mfile)['entries']
+
+    try:
+        os.makedirs(cachedir)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+    from fixes import ROOT
+    chain = ROOT.TChain(tname)
+    for fname, tree, mtime, size in inputs:
+        chain.Add('{}/{}'.format(fname, tree))
+    # write to temporary files first, concurrent jobs might be making
+    # the same skim
+    fd, tmpskim = tempfile.mkstemp(suffix='.tmp', dir=cachedir)
+    os.close(fd)
+    rfile = ROOT.TFile.Open(tmpskim, 'recreate')
+    stree = chain.CopyTree(str(cut))
+    stree.SetName('skim')
+    stree.Write()
+    entries = stree.GetEntries()
+    rfile.Close()
+    os.rename(tmpskim, skim)
+    fd, tmpmeta = tempfile.mkstemp(suffix='.tmp', dir=cachedir)
+    with os.fdopen(fd, 'w') as mfile:
+        pickle.dump({'inputs': inputs, 'cut': str(cut), 'entries': entries},
+                    mfile)
+    os.rename(tmpmeta, meta)
+    evict_lru(cachedir, maxsize, '.root', keep=[skim] + list(keep),
+              minage=600, companions=('.pickle',))
+    return skim, entries
+
+
+def evict_lru(cachedir, maxsize, suffix='.npy', keep=(), minage=0,
+              companions=()):
+    """Evict least recently used files until cache fits in `maxsize'
+
+    Only files ending with `suffix' are considered.  Files in `keep'
+    (e.g. about to be returned), and files used less than `minage'
+    seconds ago (e.g. by concurrent jobs) are never evicted, even if
+    the cache does not fit.  Files with the same name but ending with
+    one of `companions' (e.g. metadata) are removed together, or when
+    they are left without their file.
+
+    """
+    import os
+    import time
+    keep = set(os.path.abspath(path) for path in keep)
+    recent = time.time() - minage
+    entries = []
+    for root, dirs, files in os.walk(cachedir):
+        for fname in files:
+            stem, ext = os.path.splitext(fname)
+            if ext in companions and stem + suffix not in files:
+                try:
+                    os.remove(os.path.join(root, fname))  # orphaned
+                except OSError:
+                    pass
+            elif fname.endswith(suffix):
+                path = os.path.join(root, fname)
+                try:
+                    stat = os.stat(path)
+                except OSError:  # evicted by a concurrent job
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+    size = sum(entry[1] for entry in entries)
+    for mtime, fsize, path in sorted(entries):
+        if size <= maxsize:
+            break
+        if os.path.abspath(path) in keep or mtime > recent:
+            continue
+        try:
+            os.remove(path)     # already open files remain valid
+        except OSError:
+            continue
+        size -= fsize
+        for ext in companions:
+            try:
+                os.remove(path[:-len(suffix)] + ext)
+            except OSError:
+                pass
+
+
 # ROOT utilities
 def th1integral(hist, bins=None):
     """Return integral of 1D histogram (excludes overflow & underflow)
@@ -77,6 +298,64 @@ def distance(hist, pt):
     return dist
 
 
+# ROC tools
+def roc_curve(scores, issig, weights=None):
+    """Return the exact ROC curve for classifier scores
+
+    Entries are sorted by score (descending), and the signal and
+    background weights are accumulated; every distinct score is a
+    point on the curve.
+
+       scores  -- array of classifier values
+       issig   -- boolean array, True for signal (e.g. classID==0)
+       weights -- optional array of event weights
+
+    Returns (eff_s, rej_b, thresholds) arrays, where the point i
+    corresponds to the cut `scores >= thresholds[i]'.  The first point
+    (no entries selected) has an infinite threshold.
+
+    """
+    import numpy
+    scores = numpy.asarray(scores, dtype=float)
+    issig = numpy.asarray(issig, dtype=bool)
+    if weights is None:
+        weights = numpy.ones(len(scores))
+    weights = numpy.asarray(weights, dtype=float)
+    keep = ~numpy.isnan(scores)
+    scores, issig, weights = scores[keep], issig[keep], weights[keep]
+    order = numpy.argsort(-scores, kind='mergesort')
+    scores, issig, weights = scores[order], issig[order], weights[order]
+    cum_s = numpy.cumsum(numpy.where(issig, weights, 0.))
+    cum_b = numpy.cumsum(numpy.where(issig, 0., weights))
+    # last entry of every group of tied scores
+    last = numpy.append(scores[1:] != scores[:-1], True)
+    eff_s = numpy.append(0., cum_s[last]) / cum_s[-1]
+    rej_b = 1 - numpy.append(0., cum_b[last]) / cum_b[-1]
+    thresholds = numpy.append(numpy.inf, scores[last])
+    return eff_s, rej_b, thresholds
+
+
+def roc_integral(eff_s, rej_b):
+    """Return area under the ROC curve (trapezoidal rule)
+
+    Array equivalent of th1integral for a ROC curve histogram.
+
+    """
+    import numpy
+    return numpy.trapz(rej_b, eff_s)
+
+
+def roc_distance(eff_s, rej_b, pt=(1, 1)):
+    """Calculate minimum distance of a ROC curve from a given point
+
+    Array equivalent of distance; like distance, it returns the
+    squared distance.
+
+    """
+    import numpy
+    return numpy.min((eff_s - pt[0])**2 + (rej_b - pt[1])**2)
+
+
 # Generic range scanning tools
 class Cut(object):
     """Cut object"""
@@ -122,6 +401,49 @@ def scan_range(predicates, stops, var, tree, plotvar=''):
     return res
 
 
+def scan_passed(values, stops, masks, weights=None, inclusive=True):
+    """Count entries passing `values >= stop' at all stops, per mask.
+
+    This is a single pass equivalent of running scan_range with
+    `tree.GetEntries('<mask>&&<cut.ge>')' predicates.  The values
+    selected by each mask are sorted once, and the entries passing
+    every stop are found with a binary search.
+
+       values  -- array of the scanned variable (e.g. classifier)
+       stops   -- cut values
+       masks   -- list of boolean arrays (e.g. regions, classID==0)
+       weights -- optional array of event weights
+       inclusive -- count `values >= stop' when True, `values > stop'
+                    otherwise
+
+    Returns an array of shape (len(stops), len(masks)); integer counts
+    when unweighted, sum of weights otherwise.
+
+    """
+    import numpy
+    values = numpy.asarray(values, dtype=float)
+    # NOTE: Cut formats the value as a string before it is parsed by
+    # TTreeFormula, round trip the same way so that the comparisons
+    # are identical to the tree based ones.
+    stops = numpy.array([float('{}'.format(stop)) for stop in stops])
+    dtype = int if weights is None else float
+    res = numpy.zeros((len(stops), len(masks)), dtype=dtype)
+    for i, mask in enumerate(masks):
+        # NaNs never pass a cut, and would sort as the largest value
+        mask = numpy.asarray(mask, dtype=bool) & ~numpy.isnan(values)
+        order = numpy.argsort(values[mask], kind='mergesort')
+        svalues = values[mask][order]
+        idx = numpy.searchsorted(svalues, stops,
+                                 side='left' if inclusive else 'right')
+        if weights is None:
+            res[:, i] = len(svalues) - idx
+        else:
+            cumwts = numpy.concatenate(
+                ([0.], numpy.cumsum(numpy.asarray(weights)[mask][order])))
+            res[:, i] = cumwts[-1] - cumwts[idx]
+    return res
+
+
 def make_varefffn(hist, refcut):
     """Return a function to pass to scan_range.
 